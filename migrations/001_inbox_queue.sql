@@ -20,3 +20,12 @@ CREATE TABLE IF NOT EXISTS inbox_queue (
 
 CREATE UNIQUE INDEX IF NOT EXISTS ux_inbox_queue_source_chat_update
 ON inbox_queue(source, tg_chat_id, tg_update_id);
+
+CREATE INDEX IF NOT EXISTS idx_inbox_queue_new
+ON inbox_queue(status, priority, id) WHERE status='NEW';
+
+CREATE INDEX IF NOT EXISTS idx_inbox_queue_failed
+ON inbox_queue(status, id) WHERE status='FAILED';
+
+CREATE INDEX IF NOT EXISTS idx_inbox_queue_claimed
+ON inbox_queue(status, lease_until);
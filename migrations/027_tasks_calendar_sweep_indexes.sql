@@ -0,0 +1,7 @@
+-- Partial indexes for the worker's P3 create / P4 cancel calendar ticks; they only hold tasks
+-- still waiting for a calendar write, so each tick is a short index scan instead of a table scan.
+CREATE INDEX IF NOT EXISTS ix_tasks_planned_unsynced ON tasks(state, id)
+WHERE state = 'PLANNED' AND planned_at IS NOT NULL AND calendar_event_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_tasks_cancelled_synced ON tasks(state, updated_at)
+WHERE state = 'CANCELLED' AND calendar_event_id IS NOT NULL AND calendar_event_id != '';
@@ -1,21 +1,29 @@
+import contextlib
+import functools
+import heapq
 import importlib
 import importlib.util as importlib_util
 import json
 import logging
 import os
+import queue
+import random
 import re
 import sqlite3
 import time
+import signal
 import socket
 import sys
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta, timezone, date
 from typing import Any
 from http.server import BaseHTTPRequestHandler, HTTPServer
-import urllib.request
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
 _SRC_DIR = Path(__file__).resolve().parent / "src"
@@ -34,6 +42,18 @@ WORKER_INTERVAL_SEC = int(os.getenv("WORKER_INTERVAL_SEC", "5"))
 WORKER_HEARTBEAT_SEC = int(os.getenv("WORKER_HEARTBEAT_SEC", "7"))
 MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", "5"))
 CALENDAR_MAX_ATTEMPTS = int(os.getenv("CALENDAR_MAX_ATTEMPTS", "5"))
+# In-sweep retries of transient calendar errors (429/5xx/timeouts) before an attempt is spent.
+CALENDAR_RETRIES = int(os.getenv("CALENDAR_RETRIES", "2"))
+CALENDAR_RETRY_BASE_SEC = float(os.getenv("CALENDAR_RETRY_BASE_SEC", "0.5"))
+CALENDAR_RETRY_MAX_SEC = float(os.getenv("CALENDAR_RETRY_MAX_SEC", "8"))
+CALENDAR_HTTP_TIMEOUT_SEC = float(os.getenv("CALENDAR_HTTP_TIMEOUT_SEC", "30"))
+# A "not configured" verdict is reused this long before the file/libs are probed again.
+CALENDAR_CONFIG_RECHECK_SEC = float(os.getenv("CALENDAR_CONFIG_RECHECK_SEC", "300"))
+# Cross-sweep retry schedule of PENDING items: doubling delay per attempt, plus a periodic full
+# scan that picks up PENDING items the schedule does not know about (e.g. after a restart).
+CALENDAR_RETRY_DELAY_SEC = float(os.getenv("CALENDAR_RETRY_DELAY_SEC", "30"))
+CALENDAR_RETRY_DELAY_MAX_SEC = float(os.getenv("CALENDAR_RETRY_DELAY_MAX_SEC", "900"))
+CALENDAR_RETRY_RESCAN_SEC = float(os.getenv("CALENDAR_RETRY_RESCAN_SEC", "300"))
 GOOGLE_CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "")
 GOOGLE_SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE", "")
 CALENDAR_DEBUG = os.getenv("CALENDAR_DEBUG", "0") == "1"
@@ -62,7 +82,10 @@ ASR_SERVICE_URL = os.getenv("ASR_SERVICE_URL", "http://asr-service:8001")
 TG_HTTP_CONNECT_TIMEOUT = int(os.getenv("TG_HTTP_CONNECT_TIMEOUT", "3"))
 TG_HTTP_READ_TIMEOUT = int(os.getenv("TG_HTTP_READ_TIMEOUT", "90"))
 TG_HTTP_RETRIES = int(os.getenv("TG_HTTP_RETRIES", "2"))
-TG_HTTP_RETRY_SLEEP = float(os.getenv("TG_HTTP_RETRY_SLEEP", "0.3"))
+TG_HTTP_RETRY_SLEEP = float(os.getenv("TG_HTTP_RETRY_SLEEP", "0.3"))  # base of the exponential backoff
+TG_HTTP_RETRY_MAX_SEC = float(os.getenv("TG_HTTP_RETRY_MAX_SEC", "30"))
+TG_OUTBOX_FLUSH_SEC = float(os.getenv("TG_OUTBOX_FLUSH_SEC", "0.3"))  # 0 = send inline
+TG_OUTBOX_DRAIN_SEC = float(os.getenv("TG_OUTBOX_DRAIN_SEC", "5"))  # max wait for queued sends on exit
 ASR_HTTP_READ_TIMEOUT = int(os.getenv("ASR_HTTP_READ_TIMEOUT", "180"))
 MEETING_DEFAULT_MINUTES = int(os.getenv("MEETING_DEFAULT_MINUTES", "30"))
 LOCAL_TZ_OFFSET_MIN = int(os.getenv("LOCAL_TZ_OFFSET_MIN", "180"))  # +03:00 default
@@ -79,7 +102,6 @@ DEFAULT_WEEKDAY = int(os.getenv("DT_DEFAULT_WEEKDAY", "0"))  # 0=Mon..6=Sun
 DEFAULT_MONTHDAY = int(os.getenv("DT_DEFAULT_MONTHDAY", "1"))  # for month-only refs
 DEFAULT_YEAR_MONTH = int(os.getenv("DT_DEFAULT_YEAR_MONTH", "1"))  # 1..12
 DEFAULT_YEAR_MONTHDAY = int(os.getenv("DT_DEFAULT_YEAR_MONTHDAY", "1"))  # 1..31
-CLARIFY_STATE_PATH = os.getenv("CLARIFY_STATE_PATH", "/data/bot.clarify.json")
 CLARIFY_TTL_SEC = int(os.getenv("CLARIFY_TTL_SEC", "180"))
 
 # Notifications back to user after actual creation
@@ -92,6 +114,11 @@ B2_MAX_ATTEMPTS = int(os.getenv("B2_MAX_ATTEMPTS", "5"))
 B2_REQUEUE_FAILED_EVERY_SEC = int(os.getenv("B2_REQUEUE_FAILED_EVERY_SEC", "15"))
 B2_REQUEUE_FAILED_BATCH = int(os.getenv("B2_REQUEUE_FAILED_BATCH", "10"))
 B2_IDLE_SLEEP_SEC = float(os.getenv("B2_IDLE_SLEEP_SEC", "0.5"))
+# Rows the single-threaded loop (WORKER_CONCURRENCY=1) claims per transaction.
+B2_CLAIM_BATCH = max(1, int(os.getenv("B2_CLAIM_BATCH", "8")))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# How often an idle main loop checks for commits by other connections (e.g. the bot enqueueing).
+WORKER_WAKE_POLL_SEC = float(os.getenv("WORKER_WAKE_POLL_SEC", "0.2"))
 SCHEMA_PATH = os.getenv("B2_SCHEMA_PATH", "/app/migrations/001_inbox_queue.sql")
 MIGRATIONS_DIR = os.getenv("MIGRATIONS_DIR", "/app/migrations")
 P2_ENFORCE_STATUS = os.getenv("P2_ENFORCE_STATUS", "0") == "1"
@@ -106,8 +133,52 @@ _P5_DRIFT_COUNT_TODAY: int = 0
 _P5_OVERLOAD_COUNT_TODAY: int = 0
 _P5_NUDGE_EMITTED: bool = False
 
+_LOCAL_TZ = timezone(timedelta(minutes=LOCAL_TZ_OFFSET_MIN))
+
+
 def _local_tz() -> timezone:
-    return timezone(timedelta(minutes=LOCAL_TZ_OFFSET_MIN))
+    return _LOCAL_TZ
+
+try:
+    _orjson: Any = importlib.import_module("orjson")
+except ImportError:
+    _orjson = None
+
+
+def _json_loads(data: str | bytes) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    # UTF-8 output without ASCII escaping; other iterables serialize as lists.
+    if _orjson is not None:
+        return _orjson.dumps(obj, default=list)
+    return json.dumps(obj, ensure_ascii=False, default=list).encode("utf-8")
+
+
+try:
+    _msgpack: Any = importlib.import_module("msgpack")
+except ImportError:
+    _msgpack = None
+
+
+class _Trunc:
+    """Logging arg that truncates str(obj) only if the record is actually formatted."""
+
+    __slots__ = ("obj", "limit")
+
+    def __init__(self, obj: Any, limit: int = 200) -> None:
+        self.obj = obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return str(self.obj)[: self.limit]
+
+    def __repr__(self) -> str:
+        return repr(str(self.obj)[: self.limit])
+
 
 def as_dict(row: sqlite3.Row | dict | None) -> dict:
     if row is None:
@@ -161,14 +232,14 @@ def _parse_iso_dt(value: str) -> datetime:
     return dt.astimezone(timezone.utc)
 
 def _local_day_bounds_utc(dt_utc: datetime) -> tuple[datetime, datetime]:
-    local = dt_utc.astimezone(_local_tz())
+    local = dt_utc.astimezone(_LOCAL_TZ)
     day = local.date()
-    start_local = datetime(day.year, day.month, day.day, tzinfo=_local_tz())
+    start_local = datetime(day.year, day.month, day.day, tzinfo=_LOCAL_TZ)
     end_local = start_local + timedelta(days=1)
     return start_local.astimezone(timezone.utc), end_local.astimezone(timezone.utc)
 
 def _ensure_same_local_day(start_utc: datetime, end_utc: datetime) -> None:
-    if start_utc.astimezone(_local_tz()).date() != end_utc.astimezone(_local_tz()).date():
+    if start_utc.astimezone(_LOCAL_TZ).date() != end_utc.astimezone(_LOCAL_TZ).date():
         raise ValueError("block must fit within a single local day")
 
 
@@ -185,6 +256,11 @@ _RU_WEEKDAYS = {
     "суббота": 5, "сб": 5,
     "воскресенье": 6, "вс": 6,
 }
+# Both tables list keys in value order, so the smallest value among all hits is the
+# entry a dict-order scan would return first. The month pattern is a lookahead so that
+# overlapping stems ("март"/"ма") are all reported.
+_RU_MONTHS_RE = re.compile("(?=(" + "|".join(re.escape(k) for k in _RU_MONTHS) + "))")
+_RU_WEEKDAYS_RE = re.compile(r"\b(" + "|".join(re.escape(k) for k in _RU_WEEKDAYS) + r")\b")
 
 ORDINAL_GENITIVE_DAY = {
     "первого": 1, "второго": 2, "третьего": 3, "четвертого": 4, "пятого": 5, "шестого": 6,
@@ -199,32 +275,65 @@ _ORDINAL_GENITIVE_RE = re.compile(
     r"\b(" + "|".join(sorted((re.escape(k) for k in ORDINAL_GENITIVE_DAY.keys()), key=len, reverse=True)) + r")\b"
 )
 MEETING_HINT_RE = re.compile(r"\b(встреча|созвон|звонок|совещание|митинг)\b", re.IGNORECASE)
+# Every word that can anchor a date when the text has no digits: relative days, week/month/year
+# references, month stems, ordinal days and weekdays. A miss means no branch of the parser fires.
+_DT_WORD_SIGNAL_RE = re.compile(
+    "|".join(
+        ["завтра", "сегодня", "недел", "месяц", "год"]
+        + [re.escape(k) for k in _RU_MONTHS]
+        + [re.escape(k) for k in ORDINAL_GENITIVE_DAY]
+    )
+    + r"|\b(?:" + "|".join(re.escape(k) for k in _RU_WEEKDAYS) + r")\b"
+)
+
+# Datetime parsing patterns, compiled once instead of going through re's cache per message.
+_WORD_CHAR_RE = re.compile(r"\w")
+_DIGIT_RE = re.compile(r"\d")
+_TIME_RU_RE = re.compile(r"\bв\s*(\d{1,2})(?:\s*[:\.]\s*(\d{2})|\s+(\d{2}))?\b")
+_EVENING_RE = re.compile(r"\bвечер(а|ом)?\b")
+_DAYTIME_RE = re.compile(r"\bдня\b")
+_AMPM_RE = re.compile(r"\b(утра|вечера|дня|ночью)\b")
+_HOURS_WORD_RE = re.compile(r"\bчас(ов|а)?\b")
+_IN_N_UNITS_RE = re.compile(r"\bчерез\s+(\d{1,3})\s*(дн(я|ей)?|недел(ю|и|ь)|месяц(а|ев)?|год(а|ов)?)\b")
+_SMALL_NUMBER_RE = re.compile(r"\b(\d{1,2})\b")
+_TIME_DOT_RE = re.compile(r"\s*(\d{1,2})\.(\d{2})\s*")
+_TIME_DOT_INLINE_RE = re.compile(r"\b(\d{1,2})\.(\d{2})\b")
+_NUMERIC_DAY_MONTH_RE = re.compile(r"\b\d{1,2}[./]\d{1,2}\b")
+_DAY_OF_MONTH_RE = re.compile(r"\b(?P<day>\d{1,2})\s*(?:-?\s*го|ого)?\b")
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?\b")
+# "на этой/прошлой/следующей неделе", "в этом/прошлом/следующем месяце|году", "через ...".
+_PERIOD_LIKE_RE = re.compile(r"на (?:этой|прошлой|следующей) неделе|в (?:этом|прошлом|следующем) (?:месяце|году)|через ")
+
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 def _clamp_day(y: int, m: int, d: int) -> int:
-    # clamp day to last day of month (no external deps)
+    # clamp day to last day of month (no external deps, no date allocations)
     if d < 1:
         return 1
     # hard-guard month range to avoid crashing worker
-    if m < 1 or m > 12:
-        # keep deterministic but safe
-        m = 12 if m > 12 else 1
-    if m == 12:
-        next_m = date(y + 1, 1, 1)
+    if m < 1:
+        m = 1
+    elif m > 12:
+        m = 12
+    if m == 2 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0):
+        last = 29
     else:
-        next_m = date(y, m + 1, 1)
-    last = (next_m - timedelta(days=1)).day
-    return min(d, last)
+        last = _MONTH_DAYS[m - 1]
+    return last if d > last else d
 
 
-def _parse_time_ru(t: str) -> tuple[int, int] | None:
+@functools.lru_cache(maxsize=4096)
+def _parse_time_full(t: str) -> tuple[int, int, bool] | None:
     """
-    Returns (hh, mm) or None. Supports:
+    Returns (hh, mm, ambiguous) or None from one pass over the text. Supports:
       'в 11', 'в 11:30', 'в 11 30', 'в 11 утра/вечера', 'в 7 часов'
     """
     if not t:
         return None
     s = t.lower()
-    m = re.search(r"\bв\s*(\d{1,2})(?:\s*[:\.]\s*(\d{2})|\s+(\d{2}))?\b", s)
+    m = _TIME_RU_RE.search(s)
     if not m:
         return None
     hh = int(m.group(1))
@@ -233,45 +342,49 @@ def _parse_time_ru(t: str) -> tuple[int, int] | None:
         return None
 
     # parts of day heuristics
-    if re.search(r"\bвечер(а|ом)?\b", s) and 1 <= hh <= 11:
+    if _EVENING_RE.search(s) and 1 <= hh <= 11:
         hh += 12
-    if re.search(r"\bдня\b", s) and 1 <= hh <= 7:
+    if _DAYTIME_RE.search(s) and 1 <= hh <= 7:
         hh += 12
     # explicit "утра" keeps as-is
-    return hh, mm
+    # B7: 1-8 ambiguous unless a part of day or "часов" is given (matched on the text as passed),
+    # 9-18 day auto-accept, 19-23 evening auto-accept
+    ambiguous = (
+        bool(DT_REQUIRE_AMPM_FOR_SHORT_HOURS)
+        and 1 <= hh <= 8
+        and _AMPM_RE.search(t) is None
+        and _HOURS_WORD_RE.search(t) is None
+    )
+    return hh, mm, ambiguous
+
+
+def _parse_time_ru(t: str) -> tuple[int, int] | None:
+    tm = _parse_time_full(t)
+    return (tm[0], tm[1]) if tm else None
 
 
 def _is_time_ambiguous(t: str) -> bool:
-    if not DT_REQUIRE_AMPM_FOR_SHORT_HOURS:
-        return False
-    tm = _parse_time_ru(t or "")
-    if not tm:
-        return False
-    hh, _ = tm
-    if re.search(r"\b(утра|вечера|дня|ночью)\b", t):
-        return False
-    if re.search(r"\bчас(ов|а)?\b", t):
-        return False
-    # B7: 1-8 ambiguous, 9-18 day auto-accept, 19-23 evening auto-accept
-    if 1 <= hh <= 8:
-        return True
-    return False
+    tm = _parse_time_full(t or "")
+    return tm is not None and tm[2]
 
 
 def _parse_weekday_ru(t: str) -> int | None:
-    s = (t or "").lower()
-    for k, v in _RU_WEEKDAYS.items():
-        if re.search(rf"\b{re.escape(k)}\b", s):
-            return v
-    return None
+    return _parse_weekday_low((t or "").lower())
 
 
 def _parse_month_ru(t: str) -> int | None:
-    s = (t or "").lower()
-    for k, v in _RU_MONTHS.items():
-        if k in s:
-            return v
-    return None
+    return _parse_month_low((t or "").lower())
+
+
+# *_low variants take text the caller already lower-cased (the _extract_datetime pipeline).
+def _parse_weekday_low(s: str) -> int | None:
+    found = _RU_WEEKDAYS_RE.findall(s)
+    return min(_RU_WEEKDAYS[k] for k in found) if found else None
+
+
+def _parse_month_low(s: str) -> int | None:
+    found = _RU_MONTHS_RE.findall(s)
+    return min(_RU_MONTHS[k] for k in found) if found else None
 
 
 def _week_start(d: date) -> date:
@@ -280,16 +393,10 @@ def _week_start(d: date) -> date:
 
 
 def _add_months(d: date, delta: int) -> date:
-    y = d.year
-    m = d.month + delta
-    while m > 12:
-        y += 1
-        m -= 12
-    while m < 1:
-        y -= 1
-        m += 12
-    day = _clamp_day(y, m, d.day)
-    return date(y, m, day)
+    years, m0 = divmod(d.month - 1 + delta, 12)
+    y = d.year + years
+    m = m0 + 1
+    return date(y, m, _clamp_day(y, m, d.day))
 
 
 def _resolve_relative_period(s: str, base: datetime) -> date | None:
@@ -300,13 +407,14 @@ def _resolve_relative_period(s: str, base: datetime) -> date | None:
       - в этом/прошлом/следующем месяце (+ day optional)
       - в этом/прошлом/следующем году (+ month/day optional)
       - через N дней/недель/месяцев/лет
+    `s` must already be lower-cased.
     Returns date or None.
     """
-    txt = s.lower()
+    txt = s
     base_date = base.date()
 
     # через N ...
-    m = re.search(r"\bчерез\s+(\d{1,3})\s*(дн(я|ей)?|недел(ю|и|ь)|месяц(а|ев)?|год(а|ов)?)\b", txt)
+    m = _IN_N_UNITS_RE.search(txt)
     if m:
         n = int(m.group(1))
         unit = m.group(2)
@@ -339,7 +447,7 @@ def _resolve_relative_period(s: str, base: datetime) -> date | None:
         else:
             anchor = base_date
         ws = _week_start(anchor)
-        wd = _parse_weekday_ru(txt)
+        wd = _parse_weekday_low(txt)
         if wd is None:
             wd = DEFAULT_WEEKDAY
         return ws + timedelta(days=wd)
@@ -350,7 +458,7 @@ def _resolve_relative_period(s: str, base: datetime) -> date | None:
         md = _add_months(base_date.replace(day=1), delta)  # first day of target month
         # optional day number: "в следующем месяце 12"
         mday = None
-        m2 = re.search(r"\b(\d{1,2})\b", txt)
+        m2 = _SMALL_NUMBER_RE.search(txt)
         if m2:
             mday = int(m2.group(1))
         if mday is None:
@@ -362,10 +470,10 @@ def _resolve_relative_period(s: str, base: datetime) -> date | None:
     if "год" in txt and ("эт" in txt or "прошл" in txt or "след" in txt):
         y = base_date.year + (-1 if "прошл" in txt else (1 if "след" in txt else 0))
         # optional month/day inside: "в следующем году 3 марта"
-        mon = _parse_month_ru(txt) or DEFAULT_YEAR_MONTH
+        mon = _parse_month_low(txt) or DEFAULT_YEAR_MONTH
         # day: take first number found or default
         mday = None
-        m2 = re.search(r"\b(\d{1,2})\b", txt)
+        m2 = _SMALL_NUMBER_RE.search(txt)
         if m2:
             mday = int(m2.group(1))
         if mday is None:
@@ -376,6 +484,14 @@ def _resolve_relative_period(s: str, base: datetime) -> date | None:
     return None
 
 
+# Exact normalized phrase -> day offset from today (time defaults to DEFAULT_HOUR:DEFAULT_MINUTE).
+_FAST_SHAPES: dict[str, int] = {
+    "сегодня": 0,
+    "завтра": 1,
+    "послезавтра": 2,
+}
+
+
 def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime | None:
     """
     Minimal RU datetime extractor (deterministic).
@@ -399,41 +515,63 @@ def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime
       - "встреча третьего" -> ближайшее 03-е число в 06:00
       - "в 9.30 четвертого" -> ближайшее 04-е число в 09:30
     """
+    # Results depend on "now" only at minute precision (parsed times have no seconds),
+    # so the same text within the same minute is served from the cache.
+    # Every pattern below needs a letter or a digit; blank/punctuation-only text never parses.
+    if not text or _WORD_CHAR_RE.search(text) is None:
+        return None
+    if now_local is None:
+        now_local = datetime.now(_LOCAL_TZ)
+    now_minute = now_local.replace(second=0, microsecond=0)
+    return _extract_datetime_cached(text, now_minute, now_minute.utcoffset())
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_datetime_cached(text: str, now_local: datetime, _utcoffset: timedelta | None) -> datetime | None:
+    # _utcoffset is part of the key: equal instants in different zones resolve to different dates.
+    return _extract_datetime_uncached(text, now_local)
+
+
+def _extract_datetime_uncached(text: str, now_local: datetime | None = None) -> datetime | None:
     if not text:
         return None
-    # If ASR returned time as "HH.MM" (e.g. "21.16", "12.00"), treat it as time, not date.
-    # This prevents crashes and wrong date parsing.
-    m_time_dot = re.fullmatch(r"\s*(\d{1,2})\.(\d{2})\s*", text.strip())
-    if m_time_dot:
-        hh = int(m_time_dot.group(1))
-        mm = int(m_time_dot.group(2))
-        if 0 <= hh <= 23 and 0 <= mm <= 59:
-            now_local = datetime.now(_local_tz())
-            d0 = now_local.date()
-            return datetime(d0.year, d0.month, d0.day, hh, mm, tzinfo=_local_tz())
-
-    # Also if inside a longer phrase we see "HH.MM" and it looks like time, normalize to "HH:MM"
-    text_norm = re.sub(r"\b(\d{1,2})\.(\d{2})\b", r"\1:\2", text)
-    text = text_norm
+    tz = _LOCAL_TZ
+    if now_local is None:
+        now_local = datetime.now(tz)
+    has_digit = _DIGIT_RE.search(text) is not None
+    if has_digit:
+        # If ASR returned time as "HH.MM" (e.g. "21.16", "12.00"), treat it as time, not date.
+        # This prevents crashes and wrong date parsing.
+        m_time_dot = _TIME_DOT_RE.fullmatch(text.strip())
+        if m_time_dot:
+            hh = int(m_time_dot.group(1))
+            mm = int(m_time_dot.group(2))
+            if 0 <= hh <= 23 and 0 <= mm <= 59:
+                d0 = now_local.date()
+                return datetime(d0.year, d0.month, d0.day, hh, mm, tzinfo=tz)
+
+        # Also if inside a longer phrase we see "HH.MM" and it looks like time, normalize to "HH:MM"
+        text = _TIME_DOT_INLINE_RE.sub(r"\1:\2", text)
     t = text.strip().lower()
     t = t.replace("—", "-").replace("–", "-")
 
-    tz = _local_tz()
-    if now_local is None:
-        now_local = datetime.now(tz)
+    # Bare day words are the most common utterance; resolve them without the regex pipeline.
+    fast_days = _FAST_SHAPES.get(" ".join(t.split()))
+    if fast_days is not None:
+        d0 = now_local.date() + timedelta(days=fast_days)
+        return datetime(d0.year, d0.month, d0.day, DEFAULT_HOUR, DEFAULT_MINUTE, tzinfo=tz)
 
-    period_like = any(x in t for x in (
-        "на этой неделе", "на прошлой неделе", "на следующей неделе",
-        "в этом месяце", "в прошлом месяце", "в следующем месяце",
-        "в этом году", "в прошлом году", "в следующем году", "через ",
-    ))
-    tm = _parse_time_ru(t)
+    # Digit-free text needs at least one date word; one scan replaces the full branch cascade.
+    if not has_digit and _DT_WORD_SIGNAL_RE.search(t) is None:
+        return None
+
+    period_like = _PERIOD_LIKE_RE.search(t) is not None
+    tm = _parse_time_full(t)
     time_ambiguous = False
     if tm:
-        hh, mm = tm
-        time_ambiguous = _is_time_ambiguous(t)
+        hh, mm, time_ambiguous = tm
         if time_ambiguous:
-            logging.info("time_ambiguous=True text=%r", text[:200])
+            logging.info("time_ambiguous=True text=%r", _Trunc(text))
     else:
         hh, mm = (MARKER_HOUR, MARKER_MINUTE) if period_like else (DEFAULT_HOUR, DEFAULT_MINUTE)
     time_explicit = tm is not None
@@ -446,15 +584,15 @@ def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime
         return datetime(rel_date.year, rel_date.month, rel_date.day, hh_use, mm_use, tzinfo=tz)
 
     # day-of-month without month (e.g., "третьего в 9", "4-го", "4-го в 15:30")
-    has_month_name = _parse_month_ru(t) is not None
-    has_numeric_date = re.search(r"\b\d{1,2}[./]\d{1,2}\b", t) is not None
-    if not has_month_name and not has_numeric_date:
+    mon = _parse_month_low(t)
+    has_numeric_date = has_digit and _NUMERIC_DAY_MONTH_RE.search(t) is not None
+    if mon is None and not has_numeric_date:
         day = None
         m_dayw = _ORDINAL_GENITIVE_RE.search(t)
         if m_dayw:
             day = ORDINAL_GENITIVE_DAY.get(m_dayw.group(1))
         if day is None:
-            m_dayn = re.search(r"\b(?P<day>\d{1,2})\s*(?:-?\s*го|ого)?\b", t)
+            m_dayn = _DAY_OF_MONTH_RE.search(t)
             if m_dayn:
                 day = int(m_dayn.group("day"))
             if day is not None:
@@ -480,10 +618,9 @@ def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime
 
     # explicit date: "3 марта", "12.05", "12/05/2025", etc.
     # month name in RU
-    mon = _parse_month_ru(t)
     if mon:
         mday = None
-        m2 = re.search(r"\b(\d{1,2})\b", t)
+        m2 = _SMALL_NUMBER_RE.search(t)
         if m2:
             mday = int(m2.group(1))
         if mday is None:
@@ -498,7 +635,7 @@ def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime
         return dt
 
     # numeric date with separators
-    m = re.search(r"\b(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?\b", t)
+    m = _NUMERIC_DATE_RE.search(t) if has_digit else None
     if m:
         d = int(m.group(1))
         mo = int(m.group(2))
@@ -525,7 +662,7 @@ def _extract_datetime(text: str, now_local: datetime | None = None) -> datetime
         return dt
 
     # only weekday reference, no "неделя" word
-    wd = _parse_weekday_ru(t)
+    wd = _parse_weekday_low(t)
     if wd is not None:
         base_date = now_local.date()
         cur_wd = base_date.weekday()
@@ -554,15 +691,133 @@ def _selfcheck_asr_datetime() -> None:
 
 
 def _get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # The pooled connections live for the whole process; keep every hot-path statement prepared.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA busy_timeout=5000")
+    # WAL keeps the db consistent with NORMAL; only the last commits may roll back on power loss.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # Same FK enforcement as the API and p2 runtime connections.
+    conn.execute("PRAGMA foreign_keys=ON")
+    # ~20 MB page cache (negative = KiB).
+    conn.execute("PRAGMA cache_size=-20000")
     return conn
 
 
+# SQLite allows one writer at a time: the queue, item inserts and calendar sweeps write through
+# a single shared connection serialised by _WRITE_LOCK, and read through a small pool of idle
+# connections.
+# Both remember the DB_PATH they were opened for.
+_READ_POOL_SIZE = 4
+_READ_POOL: queue.LifoQueue = queue.LifoQueue()
+_WRITE_LOCK = threading.RLock()
+_WRITE_CONN: tuple[str, sqlite3.Connection] | None = None
+
+
+@contextlib.contextmanager
+def _read_conn():
+    path, conn = DB_PATH, None
+    while conn is None:
+        try:
+            pooled_path, pooled = _READ_POOL.get_nowait()
+        except queue.Empty:
+            conn = _get_conn()
+            break
+        if pooled_path == path:
+            conn = pooled
+        else:
+            pooled.close()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        if _READ_POOL.qsize() < _READ_POOL_SIZE:
+            _READ_POOL.put((path, conn))
+        else:
+            conn.close()
+
+
+@contextlib.contextmanager
+def _write_conn():
+    global _WRITE_CONN
+    with _WRITE_LOCK:
+        if _WRITE_CONN is None or _WRITE_CONN[0] != DB_PATH:
+            if _WRITE_CONN is not None:
+                _WRITE_CONN[1].close()
+            _WRITE_CONN = (DB_PATH, _get_conn())
+        conn = _WRITE_CONN[1]
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+@contextlib.contextmanager
+def _tx():
+    # Shared writer with the write lock taken up front; commits or rolls back like _write_conn.
+    with _write_conn() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        yield conn
+
+
+def _close_db_conns() -> None:
+    global _WRITE_CONN
+    with _WRITE_LOCK:
+        if _WRITE_CONN is not None:
+            _WRITE_CONN[1].close()
+            _WRITE_CONN = None
+    while True:
+        try:
+            _READ_POOL.get_nowait()[1].close()
+        except queue.Empty:
+            break
+
+
+# schema_migrations marker for a completed _init_db bootstrap. Bump it whenever the bootstrap
+# below changes so existing databases run it once more.
+_INIT_DB_MARK = "worker_init_db.v1"
+
+# Columns added to items after its first release; plain ALTERs without backfill.
+_ITEMS_ADDED_COLUMNS = (
+    ("tg_update_id", "INTEGER NULL"),
+    ("tg_chat_id", "INTEGER NULL"),
+    ("tg_message_id", "INTEGER NULL"),
+    ("tg_voice_file_id", "TEXT NULL"),
+    ("tg_voice_unique_id", "TEXT NULL"),
+    ("tg_voice_duration", "INTEGER NULL"),
+    ("asr_text", "TEXT NULL"),
+    ("ingested_at", "DATETIME NULL"),
+    ("calendar_event_id", "TEXT NULL"),
+    ("calendar_ok_at", "DATETIME NULL"),
+    ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+    ("last_error", "TEXT NULL"),
+    ("updated_at", "DATETIME NULL"),
+    ("tg_accepted_sent", "INTEGER NOT NULL DEFAULT 0"),
+    ("tg_result_sent", "INTEGER NOT NULL DEFAULT 0"),
+    ("dt_probe_title", "TEXT NULL"),
+)
+
+
 def _init_db() -> None:
     with _get_conn() as conn:
+        # Restarts of an already bootstrapped database skip the table_info probes, ALTERs and
+        # the schema script entirely.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TEXT NOT NULL
+            )
+            """
+        )
+        if conn.execute("SELECT 1 FROM schema_migrations WHERE name = ?", (_INIT_DB_MARK,)).fetchone():
+            return
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS items (
@@ -590,7 +845,8 @@ def _init_db() -> None:
                 last_error TEXT NULL,
                 updated_at DATETIME NULL,
                 tg_accepted_sent INTEGER NOT NULL DEFAULT 0,
-                tg_result_sent INTEGER NOT NULL DEFAULT 0
+                tg_result_sent INTEGER NOT NULL DEFAULT 0,
+                dt_probe_title TEXT NULL
             )
             """
         )
@@ -604,36 +860,42 @@ def _init_db() -> None:
                 "UPDATE items SET parent_id_int = CAST(parent_id AS INTEGER) WHERE parent_id IS NOT NULL"
             )
             conn.execute("CREATE INDEX IF NOT EXISTS ix_items_parent_id_int ON items(parent_id_int)")
-        if "tg_update_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_update_id INTEGER NULL")
-        if "tg_chat_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_chat_id INTEGER NULL")
-        if "tg_message_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_message_id INTEGER NULL")
-        if "tg_voice_file_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_voice_file_id TEXT NULL")
-        if "tg_voice_unique_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_voice_unique_id TEXT NULL")
-        if "tg_voice_duration" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_voice_duration INTEGER NULL")
-        if "asr_text" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN asr_text TEXT NULL")
-        if "ingested_at" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN ingested_at DATETIME NULL")
-        if "calendar_event_id" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN calendar_event_id TEXT NULL")
-        if "calendar_ok_at" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN calendar_ok_at DATETIME NULL")
-        if "attempts" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
-        if "last_error" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN last_error TEXT NULL")
-        if "updated_at" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN updated_at DATETIME NULL")
-        if "tg_accepted_sent" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_accepted_sent INTEGER NOT NULL DEFAULT 0")
-        if "tg_result_sent" not in columns:
-            conn.execute("ALTER TABLE items ADD COLUMN tg_result_sent INTEGER NOT NULL DEFAULT 0")
+        for name, ddl in _ITEMS_ADDED_COLUMNS:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE items ADD COLUMN {name} {ddl}")
+        # clarify_queue.item_json is dual-format despite its name and TEXT affinity: a BLOB of
+        # MessagePack when the writer had msgpack installed, JSON text otherwise (_clarify_pack).
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS clarify_queue (
+                id INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                item_json TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_clarify_queue_chat_id ON clarify_queue(chat_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_clarify_queue_expires_at ON clarify_queue(expires_at)")
+        # Partial indexes matching the calendar sweep WHERE clauses; they only hold rows still waiting.
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_items_inbox_unscheduled ON items(id)
+            WHERE status = 'inbox'
+              AND (start_at IS NULL OR start_at = '')
+              AND (calendar_event_id IS NULL OR calendar_event_id = '')
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_items_pending_retry ON items(id)
+            WHERE calendar_event_id = 'PENDING' AND status = 'active'
+            """
+        )
+        # Voice dedup lookups in _process_queue_item; the 005 migration only adds the first index
+        # when it had to ALTER an old table, so fresh databases never got it.
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_items_tg_voice_unique_id ON items(tg_voice_unique_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_items_tg_update_message ON items(tg_update_id, tg_message_id)")
         conn.commit()
         sql = Path(SCHEMA_PATH).read_text(encoding="utf-8")
         conn.executescript(sql)
@@ -642,7 +904,11 @@ def _init_db() -> None:
         columns_q = {as_dict(row).get("name") for row in conn.execute("PRAGMA table_info(inbox_queue)").fetchall()}
         if "ingested_at" not in columns_q:
             conn.execute("ALTER TABLE inbox_queue ADD COLUMN ingested_at TEXT")
-            conn.commit()
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_migrations (name, applied_at) VALUES (?, ?)",
+            (_INIT_DB_MARK, datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
 
 
 def _apply_sql_migrations(conn: sqlite3.Connection) -> None:
@@ -735,55 +1001,61 @@ def _apply_sql_migrations(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 
-def reap_claims(conn: sqlite3.Connection, now_ts: float) -> tuple[int, int]:
-    now_iso = datetime.fromtimestamp(now_ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%fZ")
-    cur_reclaim = conn.execute(
-        """
-        UPDATE inbox_queue
-        SET status='NEW',
-            claimed_by=NULL,
-            claimed_at=NULL,
-            lease_until=NULL,
-            updated_at=?
-        WHERE status='CLAIMED'
-          AND lease_until IS NOT NULL
-          AND lease_until < ?
-          AND attempts < ?
-        """,
-        (now_iso, now_iso, B2_MAX_ATTEMPTS),
-    )
-    cur_dead = conn.execute(
+def reap_claims(conn: sqlite3.Connection) -> tuple[int, int]:
+    # One pass over expired leases: back to NEW while attempts remain, DEAD otherwise.
+    rows = conn.execute(
         """
         UPDATE inbox_queue
-        SET status='DEAD',
+        SET status=CASE WHEN attempts >= ? THEN 'DEAD' ELSE 'NEW' END,
             claimed_by=NULL,
             claimed_at=NULL,
             lease_until=NULL,
-            updated_at=?
+            updated_at=strftime('%Y-%m-%dT%H:%M:%fZ','now')
         WHERE status='CLAIMED'
           AND lease_until IS NOT NULL
-          AND lease_until < ?
-          AND attempts >= ?
+          AND lease_until < strftime('%Y-%m-%dT%H:%M:%fZ','now')
+        RETURNING status
         """,
-        (now_iso, now_iso, B2_MAX_ATTEMPTS),
-    )
-    reclaimed = int(cur_reclaim.rowcount or 0)
-    dead = int(cur_dead.rowcount or 0)
+        (B2_MAX_ATTEMPTS,),
+    ).fetchall()
+    dead = sum(1 for r in rows if r[0] == "DEAD")
+    reclaimed = len(rows) - dead
     if reclaimed or dead:
         logging.info("reap_claims reclaimed=%s dead=%s", reclaimed, dead)
     return reclaimed, dead
 
 
 def _queue_reaper() -> None:
-    with _get_conn() as conn:
-        reap_claims(conn, time.time())
-        conn.commit()
+    # Rows handed to the pool (running, or parked behind an earlier row of the same chat) may
+    # outlive B2_CLAIM_LEASE_SEC; renew their lease first so they are not reclaimed mid-flight.
+    with _QUEUE_CHAT_LOCK:
+        in_flight = list(_QUEUE_IN_FLIGHT)
+    with _write_conn() as conn:
+        if in_flight:
+            conn.execute(
+                f"""
+                UPDATE inbox_queue
+                SET lease_until=strftime('%Y-%m-%dT%H:%M:%fZ','now', '+' || ? || ' seconds')
+                WHERE status='CLAIMED' AND claimed_by=? AND id IN ({",".join("?" * len(in_flight))})
+                """,
+                (str(B2_CLAIM_LEASE_SEC), WORKER_ID, *in_flight),
+            )
+        reap_claims(conn)
 
 
-def _queue_claim() -> dict | None:
-    with _get_conn() as conn:
-        conn.execute("BEGIN IMMEDIATE")
-        cur = conn.execute(
+def _queue_claim_batch(limit: int) -> list[dict]:
+    """Claim up to `limit` NEW rows in one statement; returned in claim (priority, id) order."""
+    if limit <= 0:
+        return []
+    # An idle queue is the common case: answer it from a pooled reader without taking the
+    # write lock or opening an IMMEDIATE transaction.
+    with _read_conn() as conn:
+        if conn.execute("SELECT 1 FROM inbox_queue WHERE status='NEW' LIMIT 1").fetchone() is None:
+            return []
+    with _write_conn() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
             """
             UPDATE inbox_queue
             SET status='CLAIMED',
@@ -792,35 +1064,117 @@ def _queue_claim() -> dict | None:
                 lease_until=strftime('%Y-%m-%dT%H:%M:%fZ','now', '+' || ? || ' seconds'),
                 attempts=attempts+1,
                 updated_at=strftime('%Y-%m-%dT%H:%M:%fZ','now')
-            WHERE id = (
+            WHERE id IN (
               SELECT id
               FROM inbox_queue
               WHERE status='NEW'
               ORDER BY priority ASC, id ASC
-              LIMIT 1
+              LIMIT ?
             )
+            RETURNING *
             """,
-            (WORKER_ID, str(B2_CLAIM_LEASE_SEC)),
-        )
-        if cur.rowcount != 1:
-            conn.commit()
-            return None
-        row = conn.execute(
-            """
-            SELECT *
-            FROM inbox_queue
-            WHERE status='CLAIMED' AND claimed_by=?
-            ORDER BY claimed_at DESC
-            LIMIT 1
-            """,
-            (WORKER_ID,),
-        ).fetchone()
-        conn.commit()
-        return dict(row) if row else None
+            (WORKER_ID, str(B2_CLAIM_LEASE_SEC), int(limit)),
+        ).fetchall()
+    # RETURNING order is unspecified; per-chat processing order depends on claim order.
+    claimed = [dict(row) for row in rows]
+    claimed.sort(key=lambda row: (row["priority"], row["id"]))
+    return claimed
+
+
+def _queue_claim() -> dict | None:
+    rows = _queue_claim_batch(1)
+    return rows[0] if rows else None
+
+
+# Concurrent queue processing: at most WORKER_CONCURRENCY claimed rows in flight, and rows of
+# one chat run strictly in claim order (clarify replies must not overtake the item they refer to).
+_QUEUE_SLOTS = threading.BoundedSemaphore(max(1, WORKER_CONCURRENCY))
+_QUEUE_CHAT_LOCK = threading.Lock()
+_QUEUE_CHAT_PENDING: dict[int, deque] = {}
+_QUEUE_IN_FLIGHT: set[int] = set()
+_QUEUE_POOL: ThreadPoolExecutor | None = None
+_WORKER_WAKEUP = threading.Event()
+
+
+def _worker_wait(timeout: float) -> None:
+    # Idle wait of the main loop. Ends early when a queue slot frees up (_WORKER_WAKEUP) or when
+    # any other connection, in this process or the bot's, commits to the database: SQLite bumps
+    # PRAGMA data_version for every commit not made through the connection asking.
+    deadline = time.monotonic() + timeout
+    with _read_conn() as conn:
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or _WORKER_WAKEUP.wait(min(remaining, WORKER_WAKE_POLL_SEC)):
+                break
+            if conn.execute("PRAGMA data_version").fetchone()[0] != version:
+                break
+    _WORKER_WAKEUP.clear()
+
+
+def _worker_poll_delay(idle_streak: int) -> float:
+    # Next main-loop wait: short right after work, then doubling from B2_IDLE_SLEEP_SEC up to
+    # WORKER_INTERVAL_SEC while idle. _worker_wait still ends early on any commit.
+    if idle_streak <= 0:
+        return max(0.05, WORKER_INTERVAL_SEC * 0.1)
+    return min(float(WORKER_INTERVAL_SEC), B2_IDLE_SLEEP_SEC * 2 ** min(idle_streak - 1, 32))
+
+
+def _queue_drain_chat(chat_id: int, row: dict | None) -> None:
+    while row is not None:
+        try:
+            _process_queue_item(row)
+        except Exception as exc:
+            logging.exception("queue item error id=%s: %s", row.get("id"), exc)
+        finally:
+            _QUEUE_SLOTS.release()
+            _WORKER_WAKEUP.set()
+        with _QUEUE_CHAT_LOCK:
+            _QUEUE_IN_FLIGHT.discard(int(row["id"]))
+            waiting = _QUEUE_CHAT_PENDING[chat_id]
+            if waiting:
+                row = waiting.popleft()
+            else:
+                del _QUEUE_CHAT_PENDING[chat_id]
+                row = None
+
+
+def _queue_submit(row: dict) -> None:
+    global _QUEUE_POOL
+    chat_id = int(row.get("tg_chat_id") or 0)
+    with _QUEUE_CHAT_LOCK:
+        _QUEUE_IN_FLIGHT.add(int(row["id"]))
+        waiting = _QUEUE_CHAT_PENDING.get(chat_id)
+        if waiting is not None:
+            waiting.append(row)
+            return
+        _QUEUE_CHAT_PENDING[chat_id] = deque()
+        if _QUEUE_POOL is None:
+            _QUEUE_POOL = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="queue")
+    _QUEUE_POOL.submit(_queue_drain_chat, chat_id, row)
+
+
+def _queue_dispatch() -> int:
+    """Claim rows while there are free slots and hand them to the pool; returns rows claimed."""
+    free = 0
+    while _QUEUE_SLOTS.acquire(blocking=False):
+        free += 1
+    if not free:
+        return 0
+    try:
+        rows = _queue_claim_batch(free)
+    except Exception:
+        _QUEUE_SLOTS.release(free)
+        raise
+    if len(rows) < free:
+        _QUEUE_SLOTS.release(free - len(rows))
+    for row in rows:
+        _queue_submit(row)
+    return len(rows)
 
 
 def _queue_mark(queue_id: int, status: str, last_error: str | None = None) -> None:
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         conn.execute(
             """
             UPDATE inbox_queue
@@ -831,7 +1185,6 @@ def _queue_mark(queue_id: int, status: str, last_error: str | None = None) -> No
             """,
             (status, last_error, queue_id),
         )
-        conn.commit()
 
 
 def _queue_requeue_failed(limit: int) -> int:
@@ -840,7 +1193,7 @@ def _queue_requeue_failed(limit: int) -> int:
     """
     if limit <= 0:
         return 0
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         cur = conn.execute(
             f"""
             UPDATE inbox_queue
@@ -857,92 +1210,215 @@ def _queue_requeue_failed(limit: int) -> int:
             """,
             (B2_MAX_ATTEMPTS,),
         )
-        conn.commit()
-        return int(cur.rowcount or 0)
+    return int(cur.rowcount or 0)
+
+
+def _new_http_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Keep-alive pool for the ASR service and organizer API (both local to the compose network).
+_LOCAL_SESSION = _new_http_session(8, 32)
+# Telegram Bot API: one host, so the TLS connections are reused across sends and downloads.
+_TG_SESSION = _new_http_session(1, max(4, WORKER_CONCURRENCY))
+
+
+def _tg_redact(value: Any) -> str:
+    # requests puts the request URL, and with it the bot token, into connection and HTTP errors.
+    text = str(value)
+    return text.replace(TELEGRAM_BOT_TOKEN, "<token>") if TELEGRAM_BOT_TOKEN else text
+
 
 def _tg_download_voice(file_id: str) -> bytes:
     if not TELEGRAM_BOT_TOKEN:
         raise RuntimeError("TELEGRAM_BOT_TOKEN not set")
     base = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
-    resp = requests.get(f"{base}/getFile", params={"file_id": file_id}, timeout=(3, WORKER_TG_HTTP_READ_TIMEOUT))
-    resp.raise_for_status()
-    data = resp.json()
-    if not data.get("ok"):
-        raise RuntimeError("telegram getFile failed")
-    file_path = data["result"]["file_path"]
-    file_resp = requests.get(
-        f"{base.replace('/bot', '/file/bot')}/{file_path}",
-        timeout=(3, WORKER_TG_HTTP_READ_TIMEOUT),
-    )
-    file_resp.raise_for_status()
+    try:
+        resp = _TG_SESSION.get(
+            f"{base}/getFile", params={"file_id": file_id}, timeout=(3, WORKER_TG_HTTP_READ_TIMEOUT)
+        )
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
+        if not data.get("ok"):
+            raise RuntimeError("telegram getFile failed")
+        file_path = data["result"]["file_path"]
+        file_resp = _TG_SESSION.get(
+            f"{base.replace('/bot', '/file/bot')}/{file_path}",
+            timeout=(3, WORKER_TG_HTTP_READ_TIMEOUT),
+        )
+        file_resp.raise_for_status()
+    except requests.RequestException as exc:
+        # Re-raised without the chain: the original message and traceback both carry the token.
+        raise RuntimeError(f"telegram download failed: {_tg_redact(exc)}") from None
     return file_resp.content
 
 
-def _tg_send_message(chat_id: int, text: str) -> bool:
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _tg_retry_after(resp: requests.Response) -> float | None:
+    # 429s carry the wait both as a header and as parameters.retry_after in the JSON body.
+    value: Any = resp.headers.get("Retry-After")
+    if value is None:
+        try:
+            value = ((resp.json() or {}).get("parameters") or {}).get("retry_after")
+        except (ValueError, AttributeError):
+            return None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _tg_backoff_sleep(attempt: int, retry_after: float | None = None) -> None:
+    # Same shape as _calendar_backoff_sleep: exponential step with +-50% jitter, capped.
+    delay = min(TG_HTTP_RETRY_MAX_SEC, TG_HTTP_RETRY_SLEEP * (2**attempt)) * random.uniform(0.5, 1.5)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, TG_HTTP_RETRY_MAX_SEC))
+    time.sleep(delay)
+
+
+def _tg_send_now(chat_id: int, text: str, reply_markup: dict | None = None) -> bool:
     """
     Send message to Telegram user from worker. Best-effort with retries.
     """
     if not TELEGRAM_BOT_TOKEN:
         return False
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    body: dict[str, Any] = {"chat_id": chat_id, "text": text}
+    if reply_markup is not None:
+        body["reply_markup"] = reply_markup
+    payload = _json_dumps_bytes(body)
     last_exc: Exception | None = None
-    for _ in range(max(1, TG_HTTP_RETRIES)):
+    attempts = max(1, TG_HTTP_RETRIES)
+    for attempt in range(attempts):
+        retry_after = None
         try:
-            payload = json.dumps({"chat_id": chat_id, "text": text}).encode("utf-8")
-            req = urllib.request.Request(
+            resp = _TG_SESSION.post(
                 url,
                 data=payload,
-                headers={"Content-Type": "application/json"},
-                method="POST",
+                headers=_JSON_HEADERS,
+                timeout=(TG_HTTP_CONNECT_TIMEOUT, TG_HTTP_READ_TIMEOUT),
             )
-            with urllib.request.urlopen(req, timeout=TG_HTTP_READ_TIMEOUT) as resp:
-                _ = resp.read()
-            return True
-        except Exception as exc:
+        except requests.RequestException as exc:
             last_exc = exc
-            time.sleep(TG_HTTP_RETRY_SLEEP)
+        else:
+            if resp.status_code < 400:
+                return True
+            last_exc = requests.HTTPError(f"telegram http {resp.status_code}", response=resp)
+            if resp.status_code < 500 and resp.status_code not in (408, 429):
+                break
+            retry_after = _tg_retry_after(resp)
+        if attempt + 1 < attempts:
+            _tg_backoff_sleep(attempt, retry_after)
     if last_exc:
-        logging.warning("tg notify failed chat_id=%s err=%s", chat_id, str(last_exc)[:200])
+        logging.warning("tg notify failed chat_id=%s err=%s", chat_id, _Trunc(_tg_redact(last_exc)))
     return False
 
 
-def _tg_send_message_with_keyboard(chat_id: int, text: str, reply_markup: dict) -> bool:
-    if not TELEGRAM_BOT_TOKEN:
-        return False
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    last_exc: Exception | None = None
-    for _ in range(max(1, TG_HTTP_RETRIES)):
+# Outbound messages: (chat_id, text, reply_markup). Drained by _tg_outbox_loop off the queue path.
+_TG_OUTBOX: queue.Queue = queue.Queue()
+_TG_OUTBOX_LOCK = threading.Lock()
+_TG_OUTBOX_THREAD: threading.Thread | None = None
+_TG_MESSAGE_MAX_CHARS = 4096
+
+
+def _tg_outbox_flush(batch: list[tuple[int, str, dict | None]]) -> None:
+    # Coalesce consecutive plain texts per chat; keyboard messages go out as-is, in order.
+    pending: dict[int, list[str]] = {}
+
+    def _flush_chat(cid: int) -> None:
+        parts = pending.pop(cid, None)
+        if parts:
+            _tg_send_now(cid, "\n\n".join(parts))
+
+    for chat_id, text, reply_markup in batch:
+        if reply_markup is not None:
+            _flush_chat(chat_id)
+            _tg_send_now(chat_id, text, reply_markup)
+            continue
+        parts = pending.setdefault(chat_id, [])
+        if parts and sum(len(p) + 2 for p in parts) + len(text) > _TG_MESSAGE_MAX_CHARS:
+            _flush_chat(chat_id)
+            parts = pending.setdefault(chat_id, [])
+        parts.append(text)
+    for cid in list(pending):
+        _flush_chat(cid)
+
+
+def _tg_outbox_loop() -> None:
+    while True:
+        batch = [_TG_OUTBOX.get()]
+        deadline = time.monotonic() + TG_OUTBOX_FLUSH_SEC
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_TG_OUTBOX.get(timeout=remaining))
+            except queue.Empty:
+                break
         try:
-            payload = json.dumps(
-                {"chat_id": chat_id, "text": text, "reply_markup": reply_markup}
-            ).encode("utf-8")
-            req = urllib.request.Request(
-                url,
-                data=payload,
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            with urllib.request.urlopen(req, timeout=TG_HTTP_READ_TIMEOUT) as resp:
-                _ = resp.read()
-            return True
+            _tg_outbox_flush(batch)
         except Exception as exc:
-            last_exc = exc
-            time.sleep(TG_HTTP_RETRY_SLEEP)
-    if last_exc:
-        logging.warning("tg notify failed chat_id=%s err=%s", chat_id, str(last_exc)[:200])
-    return False
+            logging.warning("tg outbox flush failed err=%s", _Trunc(exc))
+        finally:
+            for _ in batch:
+                _TG_OUTBOX.task_done()
+
+
+def _tg_outbox_drain(timeout: float) -> bool:
+    # Shutdown: the outbox thread is a daemon, so wait (bounded) until it has flushed everything
+    # queued so far. Returns False if messages were still pending when the timeout ran out.
+    deadline = time.monotonic() + timeout
+    with _TG_OUTBOX.all_tasks_done:
+        while _TG_OUTBOX.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.warning("tg outbox drain timed out pending=%s", _TG_OUTBOX.unfinished_tasks)
+                return False
+            _TG_OUTBOX.all_tasks_done.wait(remaining)
+    return True
+
+
+def _tg_enqueue(chat_id: int, text: str, reply_markup: dict | None) -> bool:
+    global _TG_OUTBOX_THREAD
+    if not TELEGRAM_BOT_TOKEN:
+        return False
+    if TG_OUTBOX_FLUSH_SEC <= 0:
+        return _tg_send_now(chat_id, text, reply_markup)
+    with _TG_OUTBOX_LOCK:
+        if _TG_OUTBOX_THREAD is None or not _TG_OUTBOX_THREAD.is_alive():
+            _TG_OUTBOX_THREAD = threading.Thread(target=_tg_outbox_loop, name="tg-outbox", daemon=True)
+            _TG_OUTBOX_THREAD.start()
+    _TG_OUTBOX.put((chat_id, text, reply_markup))
+    return True
+
+
+# With the outbox enabled (TG_OUTBOX_FLUSH_SEC > 0) True means "accepted for delivery": the message
+# is queued and sent by the outbox thread, whose failures are only logged. With
+# TG_OUTBOX_FLUSH_SEC=0 the send is inline and True means Telegram accepted it.
+def _tg_send_message(chat_id: int, text: str) -> bool:
+    return _tg_enqueue(chat_id, text, None)
+
+
+def _tg_send_message_with_keyboard(chat_id: int, text: str, reply_markup: dict) -> bool:
+    return _tg_enqueue(chat_id, text, reply_markup)
 
 
 _TG_RESULT_SUCCESS = 1
 _TG_RESULT_ERROR = 2
 _TG_RESULT_DEAD = 4
 _TG_RESULT_CREATED = 8
-_CAL_NOT_CONFIGURED_REASON: str | None = None
 
 
 def _tg_mark_result_sent(item_id: int, flag: int) -> bool:
     try:
-        with _get_conn() as conn:
+        with _write_conn() as conn:
             cur = conn.execute(
                 """
                 UPDATE items
@@ -951,7 +1427,6 @@ def _tg_mark_result_sent(item_id: int, flag: int) -> bool:
                 """,
                 (int(flag), int(item_id), int(flag)),
             )
-            conn.commit()
         return cur.rowcount == 1
     except Exception:
         return False
@@ -961,11 +1436,12 @@ def _tg_mark_created_sent(item_id: int) -> bool:
     return _tg_mark_result_sent(item_id, _TG_RESULT_CREATED)
 
 def _tg_notify_created(item_id: int) -> None:
+    item_id = int(item_id)
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             row = conn.execute(
                 "SELECT tg_chat_id, title, type, status, tg_result_sent FROM items WHERE id = ?",
-                (int(item_id),),
+                (item_id,),
             ).fetchone()
         row = as_dict(row)
         chat_id = int(row.get("tg_chat_id") or 0)
@@ -974,7 +1450,7 @@ def _tg_notify_created(item_id: int) -> None:
         flags = int(row.get("tg_result_sent") or 0)
         if flags & _TG_RESULT_CREATED:
             return
-        if not _tg_mark_created_sent(int(item_id)):
+        if not _tg_mark_created_sent(item_id):
             return
         item_type = str(row.get("type") or "task")
         status = str(row.get("status") or "inbox")
@@ -984,7 +1460,7 @@ def _tg_notify_created(item_id: int) -> None:
         else:
             _tg_send_message(chat_id, f"Создано: #{item_id} ({status}).")
     except Exception as exc:
-        logging.warning("tg notify created failed item_id=%s err=%s", item_id, str(exc)[:200])
+        logging.warning("tg notify created failed item_id=%s err=%s", item_id, _Trunc(exc))
 
 
 def _tg_notify_calendar_error(item_id: int) -> None:
@@ -1011,7 +1487,7 @@ def _format_start_at_local(start_at: str | None) -> str | None:
         dt = datetime.fromisoformat(s_norm)
     except Exception:
         return None
-    tz = _local_tz()
+    tz = _LOCAL_TZ
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc).astimezone(tz)
     else:
@@ -1037,11 +1513,21 @@ def _format_start_at_local(start_at: str | None) -> str | None:
         return None
 
 
+def _parse_title(title: str) -> tuple[datetime | None, bool]:
+    """(start, time_ambiguous) for an item title; ambiguity is judged on the title as written."""
+    dt = _extract_datetime(title)
+    if dt is None:
+        return None, False
+    tm = _parse_time_full(title)
+    return dt, tm is not None and tm[2]
+
+
 def _compute_item_fields_from_text(text: str) -> tuple[str, str, str | None, str | None, datetime | None, bool]:
     dt = _extract_datetime(text)
     item_type = "meeting" if (dt is not None or MEETING_HINT_RE.search(text or "")) else "task"
-    time_ambiguous = _is_time_ambiguous(text or "")
-    has_time = _parse_time_ru(text or "") is not None
+    tm = _parse_time_full(text or "")
+    time_ambiguous = tm is not None and tm[2]
+    has_time = tm is not None
     status = "active" if (dt and has_time and not time_ambiguous) else "inbox"
     start_at = dt.isoformat() if dt else None
     end_at = (dt + timedelta(minutes=MEETING_DEFAULT_MINUTES)).isoformat() if dt else None
@@ -1049,33 +1535,31 @@ def _compute_item_fields_from_text(text: str) -> tuple[str, str, str | None, str
 
 
 def _tg_notify_calendar_success(item_id: int) -> None:
+    item_id = int(item_id)
     try:
-        _tg_notify_created(int(item_id))
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             row = conn.execute(
                 "SELECT tg_chat_id, title, start_at, tg_result_sent, type, status FROM items WHERE id = ?",
-                (int(item_id),),
+                (item_id,),
             ).fetchone()
         row = as_dict(row)
         chat_id = int(row.get("tg_chat_id") or 0)
         if not chat_id:
             return
         flags = int(row.get("tg_result_sent") or 0)
-        created_sent = bool(flags & _TG_RESULT_CREATED)
-        success_sent = bool(flags & _TG_RESULT_SUCCESS)
-        dead_sent = bool(flags & _TG_RESULT_DEAD)
-        logging.info(
-            "tg notify order item_id=%s created=%s success=%s dead=%s",
-            item_id,
-            created_sent,
-            success_sent,
-            dead_sent,
-        )
-        if not created_sent:
-            _tg_notify_created(int(item_id))
-        if success_sent:
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info(
+                "tg notify order item_id=%s created=%s success=%s dead=%s",
+                item_id,
+                bool(flags & _TG_RESULT_CREATED),
+                bool(flags & _TG_RESULT_SUCCESS),
+                bool(flags & _TG_RESULT_DEAD),
+            )
+        if not flags & _TG_RESULT_CREATED:
+            _tg_notify_created(item_id)
+        if flags & _TG_RESULT_SUCCESS:
             return
-        if not _tg_mark_result_sent(int(item_id), _TG_RESULT_SUCCESS):
+        if not _tg_mark_result_sent(item_id, _TG_RESULT_SUCCESS):
             return
         title = (row.get("title") or "").strip() or "без названия"
         start_at = str(row.get("start_at") or "")
@@ -1084,37 +1568,35 @@ def _tg_notify_calendar_success(item_id: int) -> None:
         logging.info("tg_notify success item_id=%s", item_id)
         _tg_send_message(chat_id, text)
     except Exception as exc:
-        logging.warning("tg notify success failed item_id=%s err=%s", item_id, str(exc)[:200])
+        logging.warning("tg notify success failed item_id=%s err=%s", item_id, _Trunc(exc))
 
 
 def _tg_notify_calendar_dead(item_id: int) -> None:
+    item_id = int(item_id)
     try:
-        _tg_notify_created(int(item_id))
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             row = conn.execute(
                 "SELECT tg_chat_id, tg_result_sent, type, status FROM items WHERE id = ?",
-                (int(item_id),),
+                (item_id,),
             ).fetchone()
         row = as_dict(row)
         chat_id = int(row.get("tg_chat_id") or 0)
         if not chat_id:
             return
         flags = int(row.get("tg_result_sent") or 0)
-        created_sent = bool(flags & _TG_RESULT_CREATED)
-        success_sent = bool(flags & _TG_RESULT_SUCCESS)
-        dead_sent = bool(flags & _TG_RESULT_DEAD)
-        logging.info(
-            "tg notify order item_id=%s created=%s success=%s dead=%s",
-            item_id,
-            created_sent,
-            success_sent,
-            dead_sent,
-        )
-        if not created_sent:
-            _tg_notify_created(int(item_id))
-        if dead_sent:
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info(
+                "tg notify order item_id=%s created=%s success=%s dead=%s",
+                item_id,
+                bool(flags & _TG_RESULT_CREATED),
+                bool(flags & _TG_RESULT_SUCCESS),
+                bool(flags & _TG_RESULT_DEAD),
+            )
+        if not flags & _TG_RESULT_CREATED:
+            _tg_notify_created(item_id)
+        if flags & _TG_RESULT_DEAD:
             return
-        if not _tg_mark_result_sent(int(item_id), _TG_RESULT_DEAD):
+        if not _tg_mark_result_sent(item_id, _TG_RESULT_DEAD):
             return
         logging.info("tg_notify dead item_id=%s", item_id)
         _tg_send_message(
@@ -1122,98 +1604,117 @@ def _tg_notify_calendar_dead(item_id: int) -> None:
             "⚠️ Не удалось добавить в календарь. Задача сохранена, верну в Inbox. [CAL-DEAD]",
         )
     except Exception as exc:
-        logging.warning("tg notify dead failed item_id=%s err=%s", item_id, str(exc)[:200])
+        logging.warning("tg notify dead failed item_id=%s err=%s", item_id, _Trunc(exc))
 
 
 def _asr_transcribe(audio: bytes) -> str:
     files = {"file": ("voice.ogg", audio, "audio/ogg")}
-    resp = requests.post(f"{ASR_SERVICE_URL}/transcribe", files=files, timeout=(3, ASR_HTTP_READ_TIMEOUT))
+    resp = _LOCAL_SESSION.post(f"{ASR_SERVICE_URL}/transcribe", files=files, timeout=(3, ASR_HTTP_READ_TIMEOUT))
     resp.raise_for_status()
-    data = resp.json()
+    data = _json_loads(resp.content)
     return (data.get("text") or "").strip()
 
 def _api_schedule_item(item_id: int, when: datetime, duration: int) -> dict:
     url = f"{ORGANIZER_API_URL}/items/{item_id}/schedule"
-    resp = requests.post(
+    resp = _LOCAL_SESSION.post(
         url,
-        json={"when": when.isoformat(), "duration_min": int(duration)},
+        data=_json_dumps_bytes({"when": when.isoformat(), "duration_min": int(duration)}),
+        headers=_JSON_HEADERS,
         timeout=(3, TG_HTTP_READ_TIMEOUT),
     )
     resp.raise_for_status()
-    data = resp.json()
+    data = _json_loads(resp.content)
     return data if isinstance(data, dict) else {}
 
-def _load_clarify_state() -> dict:
-    if not os.path.exists(CLARIFY_STATE_PATH):
-        return {}
-    try:
-        with open(CLARIFY_STATE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+_CLARIFY_LOCK = threading.RLock()
 
 
-def _save_clarify_state(state: dict) -> None:
-    tmp_path = f"{CLARIFY_STATE_PATH}.tmp"
-    os.makedirs(os.path.dirname(CLARIFY_STATE_PATH), exist_ok=True)
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False)
-    os.replace(tmp_path, CLARIFY_STATE_PATH)
+def _clarify_pack(item: dict) -> bytes | str:
+    # clarify_queue.item_json holds MessagePack bytes when msgpack is installed, JSON text otherwise.
+    if _msgpack is not None:
+        return _msgpack.packb(item, use_bin_type=True)
+    return _json_dumps_bytes(item).decode("utf-8")
 
 
-def _prune_clarify_state(state: dict, now_ts: float) -> None:
-    for cid, st in list(state.items()):
-        q = (st or {}).get("queue") or []
-        if not isinstance(q, list):
-            state.pop(cid, None)
-            continue
-        new_q = [it for it in q if (it or {}).get("expires_at", 0) > now_ts]
-        if new_q:
-            st["queue"] = new_q
-            state[cid] = st
-        else:
-            state.pop(cid, None)
+def _clarify_unpack(raw: bytes | str) -> dict:
+    if isinstance(raw, bytes):
+        if _msgpack is None:
+            raise RuntimeError("clarify_queue row is MessagePack but msgpack is not installed")
+        return _msgpack.unpackb(raw, raw=False)
+    return _json_loads(raw)
+
+
+def _prune_clarify_state(conn: sqlite3.Connection, now_ts: float) -> None:
+    conn.execute("DELETE FROM clarify_queue WHERE expires_at <= ?", (now_ts,))
+
+
+def _clarify_same_item(a: dict, b: dict) -> bool:
+    # Same clarification regardless of when it was (re)enqueued.
+    return {k: v for k, v in (a or {}).items() if k != "expires_at"} == {
+        k: v for k, v in (b or {}).items() if k != "expires_at"
+    }
 
 
 def _enqueue_clarify(chat_id: int, item: dict) -> int:
-    state = _load_clarify_state()
-    _prune_clarify_state(state, time.time())
-    st = state.get(str(chat_id)) or {"queue": []}
-    q = st.get("queue") or []
-    q.append(item)
-    st["queue"] = q
-    state[str(chat_id)] = st
-    _save_clarify_state(state)
-    return len(q)
+    now_ts = time.time()
+    with _CLARIFY_LOCK, _write_conn() as conn:
+        _prune_clarify_state(conn, now_ts)
+        tail = conn.execute(
+            "SELECT item_json FROM clarify_queue WHERE chat_id=? ORDER BY id DESC LIMIT 1",
+            (int(chat_id),),
+        ).fetchone()
+        if tail is None or not _clarify_same_item(_clarify_unpack(tail["item_json"]), item):
+            conn.execute(
+                "INSERT INTO clarify_queue (chat_id, expires_at, item_json) VALUES (?, ?, ?)",
+                (int(chat_id), float(item.get("expires_at") or 0), _clarify_pack(item)),
+            )
+        # A retried queue item that is already waiting for this clarification adds nothing.
+        row = conn.execute("SELECT COUNT(*) FROM clarify_queue WHERE chat_id=?", (int(chat_id),)).fetchone()
+        return int(row[0])
 
 
 def _get_pending_clarify(chat_id: int) -> dict | None:
-    state = _load_clarify_state()
-    _prune_clarify_state(state, time.time())
-    st = state.get(str(chat_id)) or {}
-    q = st.get("queue") or []
-    return q[0] if q else None
+    with _read_conn() as conn:
+        row = conn.execute(
+            "SELECT item_json FROM clarify_queue WHERE chat_id=? AND expires_at > ? ORDER BY id LIMIT 1",
+            (int(chat_id), time.time()),
+        ).fetchone()
+    return _clarify_unpack(row["item_json"]) if row else None
 
 
 def _clear_pending_clarify(chat_id: int) -> None:
-    state = _load_clarify_state()
-    st = state.get(str(chat_id)) or {}
-    q = st.get("queue") or []
-    if q:
-        q.pop(0)
-    if q:
-        st["queue"] = q
-        state[str(chat_id)] = st
-    else:
-        state.pop(str(chat_id), None)
-    _save_clarify_state(state)
+    with _CLARIFY_LOCK, _write_conn() as conn:
+        conn.execute(
+            """
+            DELETE FROM clarify_queue
+            WHERE id = (
+                SELECT id FROM clarify_queue WHERE chat_id=? AND expires_at > ? ORDER BY id LIMIT 1
+            )
+            """,
+            (int(chat_id), time.time()),
+        )
+
+
+_CANCEL_RE = re.compile(r"\b(отмена|не надо|отменить)\b")
+_DATE_TOKEN_RE = re.compile(r"(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?")
+# Explicit reference to an existing item: "#21", "номер 21", "для 21", "встреча #21".
+# Every _ITEM_REF_RE match contains one of these; a plain substring scan rejects most texts cheaply.
+_SCHEDULE_KEYWORDS = ("#", "номер", "для")
+_ITEM_REF_RE = re.compile(r"(#\s*\d{1,6}\b|\bномер\s+\d{1,6}\b|\bдля\s+\d{1,6}\b|\bвстреча\s+#\s*\d{1,6}\b)")
+# "#21", "для #21", "встреча #21" or, without '#', "для 21" / "номер 21" — then optional date and time.
+_SCHEDULE_RE = re.compile(
+    r"(?:(?:\bдля\b\s+|\bномер\b\s+|\bвстреча\b\s+)?#\s*|\bдля\b\s+|\bномер\b\s+)(?P<id>\d{1,6})\b"
+    r"(?:\s+(?P<date>(?:сегодня|завтра|послезавтра|\d{1,2}\.\d{1,2}(?:\.\d{2,4})?))\b)?"
+    r"(?:\s+в\b)?\s+(?P<time>\d{1,2}(?::\d{2}|\.\d{2}|\s+\d{2})?)\b"
+)
+_FIRST_REF_HASH_RE = re.compile(r"#\s*(\d{1,6})\b")
+_FIRST_REF_WORD_RE = re.compile(r"\b(?:номер|для)\s+(\d{1,6})\b")
 
 
 def _try_apply_clarification(pending: dict, text: str) -> bool:
     t = text.lower()
 
-    if re.search(r"\b(отмена|не надо|отменить)\b", t):
+    if _CANCEL_RE.search(t):
         return False
 
     if pending.get("mode") == "no_time":
@@ -1229,7 +1730,7 @@ def _try_apply_clarification(pending: dict, text: str) -> bool:
         return False
 
     d = date.fromisoformat(pending["date"])
-    when = datetime(d.year, d.month, d.day, hh, mm, tzinfo=_local_tz())
+    when = datetime(d.year, d.month, d.day, hh, mm, tzinfo=_LOCAL_TZ)
     _api_schedule_item(pending["item_id"], when, pending["duration"])
     return True
 
@@ -1237,21 +1738,25 @@ def _try_apply_clarification(pending: dict, text: str) -> bool:
 def _parse_date_token(token: str, now_local: datetime) -> date | None:
     if not token:
         return None
-    t = token.lower()
+    return _parse_date_token_for_day(token.lower(), now_local.date())
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date_token_for_day(t: str, today: date) -> date | None:
     if t == "сегодня":
-        return now_local.date()
+        return today
     if t == "завтра":
-        return now_local.date() + timedelta(days=1)
+        return today + timedelta(days=1)
     if t == "послезавтра":
-        return now_local.date() + timedelta(days=2)
-    m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?", t)
+        return today + timedelta(days=2)
+    m = _DATE_TOKEN_RE.fullmatch(t)
     if not m:
         return None
     d = int(m.group(1))
     mo = int(m.group(2))
     if mo < 1 or mo > 12:
         return None
-    y = int(m.group(3)) if m.group(3) else now_local.year
+    y = int(m.group(3)) if m.group(3) else today.year
     if y < 100:
         y += 2000
     d = _clamp_day(y, mo, d)
@@ -1260,7 +1765,7 @@ def _parse_date_token(token: str, now_local: datetime) -> date | None:
 
 def _get_item_start_date(item_id: int) -> date | None:
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             row = conn.execute("SELECT start_at FROM items WHERE id=?", (int(item_id),)).fetchone()
         if not row:
             return None
@@ -1268,10 +1773,9 @@ def _get_item_start_date(item_id: int) -> date | None:
         start_at = row.get("start_at")
         if not start_at:
             return None
-        dt = datetime.fromisoformat(start_at)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=_local_tz())
-        return dt.date()
+        # Only the stored calendar date is needed; its offset never moves it.
+        m = _ISO_DATE_RE.match(start_at)
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else None
     except Exception:
         return None
 
@@ -1283,25 +1787,14 @@ def _try_parse_schedule_command(text: str) -> tuple[int, datetime, int] | None:
     # Scheduling existing item requires explicit item reference:
     #   "#21 16:00" | "номер 21 в 16" | "для 21 завтра 9:30" | "встреча #21 в 16"
     # This avoids false positives like "встреча завтра в 8" where "8" is time, not item id.
-    if not re.search(r"(#\s*\d{1,6}\b|\bномер\s+\d{1,6}\b|\bдля\s+\d{1,6}\b|\bвстреча\s+#\s*\d{1,6}\b)", t):
+    if not any(k in t for k in _SCHEDULE_KEYWORDS):
+        return None
+    if not _ITEM_REF_RE.search(t):
         return None
 
-    m = re.search(
-        r"(?:\bдля\b\s+|\bномер\b\s+|\bвстреча\b\s+)?#\s*(?P<id>\d{1,6})\b"
-        r"(?:\s+(?P<date>(?:сегодня|завтра|послезавтра|\d{1,2}\.\d{1,2}(?:\.\d{2,4})?))\b)?"
-        r"(?:\s+в\b)?\s+(?P<time>\d{1,2}(?::\d{2}|\.\d{2}|\s+\d{2})?)\b",
-        t,
-    )
+    m = _SCHEDULE_RE.search(t)
     if not m:
-        # Also allow "номер 21 16:00" and "для 21 16:00" without '#'
-        m = re.search(
-            r"(?:\bдля\b\s+|\bномер\b\s+)(?P<id>\d{1,6})\b"
-            r"(?:\s+(?P<date>(?:сегодня|завтра|послезавтра|\d{1,2}\.\d{1,2}(?:\.\d{2,4})?))\b)?"
-            r"(?:\s+в\b)?\s+(?P<time>\d{1,2}(?::\d{2}|\.\d{2}|\s+\d{2})?)\b",
-            t,
-        )
-        if not m:
-            return None
+        return None
     item_id = int(m.group("id"))
     time_tok = m.group("time")
     if not time_tok:
@@ -1313,7 +1806,7 @@ def _try_parse_schedule_command(text: str) -> tuple[int, datetime, int] | None:
     if hh < 0 or hh > 23 or mm < 0 or mm > 59:
         return None
 
-    tz = _local_tz()
+    tz = _LOCAL_TZ
     now_local = datetime.now(tz)
     date_tok = m.group("date")
     if date_tok:
@@ -1333,15 +1826,17 @@ def _looks_like_schedule_intent(text: str) -> bool:
     t = text.lower()
     # IMPORTANT: do NOT treat generic meeting phrases as reschedule-intent.
     # Only explicit existing-item references are reschedule-intent.
-    return re.search(r"(#\s*\d{1,6}\b|\bномер\s+\d{1,6}\b|\bдля\s+\d{1,6}\b|\bвстреча\s+#\s*\d{1,6}\b)", t) is not None
+    if not any(k in t for k in _SCHEDULE_KEYWORDS):
+        return False
+    return _ITEM_REF_RE.search(t) is not None
 
 
 def _extract_first_item_ref(text: str) -> int | None:
     t = (text or "").lower()
-    m = re.search(r"#\s*(\d{1,6})\b", t)
+    m = _FIRST_REF_HASH_RE.search(t)
     if m:
         return int(m.group(1))
-    m = re.search(r"\b(?:номер|для)\s+(\d{1,6})\b", t)
+    m = _FIRST_REF_WORD_RE.search(t)
     if m:
         return int(m.group(1))
     return None
@@ -1358,12 +1853,13 @@ def _insert_item_from_text(
     tg_voice_unique_id: str | None = None,
     tg_voice_duration: int | None = None,
     asr_text: str | None = None,
-) -> tuple[int, str, str]:
+) -> dict:
+    """Insert an item parsed from text and return the stored row for calendar sync/replies."""
     item_type, status, start_at, end_at, _, _ = _compute_item_fields_from_text(text)
 
     created_at = datetime.now(timezone.utc).isoformat()
     ingested_at = ingested_at or created_at
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         cur = conn.execute(
             """
             INSERT INTO items (
@@ -1375,6 +1871,7 @@ def _insert_item_from_text(
                 created_at, ingested_at
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, ?, ?)
+            RETURNING id, title, type, status, start_at, end_at, calendar_event_id, parent_id, parent_id_int
             """,
             (
                 item_type,
@@ -1394,13 +1891,11 @@ def _insert_item_from_text(
                 ingested_at,
             ),
         )
-        conn.commit()
-        last_id = cur.lastrowid
-        if last_id is None:
-            raise RuntimeError("insert failed: no rowid")
-        item_id = int(last_id)
-        _tg_notify_created(item_id)
-        return item_id, item_type, status
+        row_item = as_dict(cur.fetchone())
+    if not row_item:
+        raise RuntimeError("insert failed: no rowid")
+    _tg_notify_created(int(row_item["id"]))
+    return row_item
 
 
 def _insert_voice_placeholder(
@@ -1415,7 +1910,7 @@ def _insert_voice_placeholder(
 ) -> int:
     created_at = datetime.now(timezone.utc).isoformat()
     ingested_at = ingested_at or created_at
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         cur = conn.execute(
             """
             INSERT INTO items (
@@ -1444,13 +1939,12 @@ def _insert_voice_placeholder(
                 ingested_at,
             ),
         )
-        conn.commit()
         last_id = cur.lastrowid
-        if last_id is None:
-            raise RuntimeError("insert failed: no rowid")
-        item_id = int(last_id)
-        _tg_notify_created(item_id)
-        return item_id
+    if last_id is None:
+        raise RuntimeError("insert failed: no rowid")
+    item_id = int(last_id)
+    _tg_notify_created(item_id)
+    return item_id
 
 
 def _update_item_from_asr(
@@ -1460,9 +1954,9 @@ def _update_item_from_asr(
     status: str,
     start_at: str | None,
     end_at: str | None,
-) -> None:
-    with _get_conn() as conn:
-        conn.execute(
+) -> dict:
+    with _write_conn() as conn:
+        cur = conn.execute(
             """
             UPDATE items
             SET title = ?,
@@ -1473,6 +1967,7 @@ def _update_item_from_asr(
                 asr_text = ?,
                 updated_at = ?
             WHERE id = ?
+            RETURNING id, title, type, status, start_at, end_at, calendar_event_id, parent_id, parent_id_int
             """,
             (
                 text.strip(),
@@ -1485,7 +1980,8 @@ def _update_item_from_asr(
                 int(item_id),
             ),
         )
-        conn.commit()
+        row_item = as_dict(cur.fetchone())
+    return row_item
 
 
 def _ensure_voice_meta(
@@ -1496,7 +1992,7 @@ def _ensure_voice_meta(
     tg_voice_unique_id: str | None,
     tg_voice_duration: int | None,
 ) -> None:
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         conn.execute(
             """
             UPDATE items
@@ -1518,11 +2014,10 @@ def _ensure_voice_meta(
                 int(item_id),
             ),
         )
-        conn.commit()
 
 
 def _mark_item_failed_asr_dedup(item_id: int) -> None:
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         conn.execute(
             """
             UPDATE items
@@ -1536,7 +2031,6 @@ def _mark_item_failed_asr_dedup(item_id: int) -> None:
             """,
             (datetime.now(timezone.utc).isoformat(), int(item_id)),
         )
-        conn.commit()
 
 
 def _log_voice_meta(
@@ -2369,7 +2863,7 @@ def cmd_snooze_nudge(user_id: str, nudge_key: str, days: int) -> dict:
 
 class _CommandHandler(BaseHTTPRequestHandler):
     def _send_json(self, status: int, payload: dict) -> None:
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        data = _json_dumps_bytes(payload)
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(data)))
@@ -2382,7 +2876,7 @@ class _CommandHandler(BaseHTTPRequestHandler):
         except ValueError:
             length = 0
         raw = self.rfile.read(length) if length > 0 else b"{}"
-        data = json.loads(raw.decode("utf-8"))
+        data = _json_loads(raw)
         if not isinstance(data, dict):
             raise ValueError("invalid json body")
         return data
@@ -2879,6 +3373,70 @@ def create_subtask(
         )
         conn.commit()
         return _require_lastrowid(cur)
+
+
+def _send_no_time_clarify(chat_id: int, item_id: int) -> None:
+    """Queue a 'no time' clarification; the keyboard is shown only for the head of the chat's queue."""
+    callback = f"clarify:{chat_id}:{item_id}:1970-01-01:0:0:{MEETING_DEFAULT_MINUTES}:cancel"
+    item = {
+        "chat_id": chat_id,
+        "item_id": item_id,
+        "date": "1970-01-01",
+        "hh": 0,
+        "mm": 0,
+        "duration": int(MEETING_DEFAULT_MINUTES),
+        "expires_at": time.time() + CLARIFY_TTL_SEC,
+        "mode": "no_time",
+    }
+    if _enqueue_clarify(chat_id, item) != 1:
+        return
+    reply_markup = {
+        "inline_keyboard": [
+            [
+                {"text": "Оставить без времени", "callback_data": callback},
+                {"text": "Отменить", "callback_data": callback},
+            ]
+        ]
+    }
+    _tg_send_message_with_keyboard(
+        chat_id,
+        f"Уточни время для встречи #{item_id}. Скажи: \"/set #{item_id} в 9\" или \"#{item_id} 16:00\".",
+        reply_markup,
+    )
+
+
+def _send_ambiguous_clarify(chat_id: int, item_id: int, dt: datetime, hh: int, mm: int) -> None:
+    """Queue an утро/вечер clarification; the keyboard is shown only for the head of the chat's queue."""
+    day = dt.date().isoformat()
+    item = {
+        "chat_id": chat_id,
+        "item_id": item_id,
+        "date": day,
+        "hh": hh,
+        "mm": mm,
+        "duration": int(MEETING_DEFAULT_MINUTES),
+        "expires_at": time.time() + CLARIFY_TTL_SEC,
+        "mode": "ambiguous",
+    }
+    if _enqueue_clarify(chat_id, item) != 1:
+        return
+    prefix = f"clarify:{chat_id}:{item_id}:{day}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}"
+    reply_markup = {
+        "inline_keyboard": [
+            [
+                {"text": "Утро", "callback_data": f"{prefix}:am"},
+                {"text": "Вечер", "callback_data": f"{prefix}:pm"},
+                {"text": "Отменить", "callback_data": f"{prefix}:cancel"},
+            ]
+        ]
+    }
+    _tg_send_message_with_keyboard(
+        chat_id,
+        f"Уточни время для встречи #{item_id}: утро или вечер?",
+        reply_markup,
+    )
+
+
 def _process_queue_item(row: dict) -> None:
     row = as_dict(row)
     queue_id = row["id"]
@@ -2886,7 +3444,7 @@ def _process_queue_item(row: dict) -> None:
     message_id = row.get("tg_message_id")
     attempts = int(row.get("attempts") or 0)
     try:
-        payload = json.loads(row.get("payload_json") or "{}")
+        payload = _json_loads(row.get("payload_json") or "{}")
         kind = row.get("kind")
         if kind in ("text", "clarify_reply"):
             text = (payload.get("text") or "").strip()
@@ -2902,7 +3460,7 @@ def _process_queue_item(row: dict) -> None:
                     if chat_id:
                         _tg_send_message(chat_id, "Ок, время встречи обновил.")
                     return
-                if re.search(r"\b(отмена|не надо|отменить)\b", text.lower()):
+                if _CANCEL_RE.search(text.lower()):
                     _clear_pending_clarify(chat_id)
                     _queue_mark(queue_id, "DONE", None)
                     if chat_id:
@@ -2913,22 +3471,18 @@ def _process_queue_item(row: dict) -> None:
                     _tg_send_message(chat_id, "Есть ожидающее уточнение. Ответь: утро/вечер или /set #ID 16:00.")
                 return
             ingested_at = row.get("ingested_at") or row.get("created_at")
-            item_id, item_type, item_status = _insert_item_from_text(
+            row_item = _insert_item_from_text(
                 text,
                 "telegram",
                 ingested_at,
-                int(chat_id) if chat_id else None,
+                chat_id or None,
                 int(message_id) if message_id is not None else None,
                 _to_int_or_none(row.get("tg_update_id")),
             )
+            item_id = int(row_item["id"])
+            item_type = row_item.get("type")
             logging.info("tg meta kind=%s item_id=%s tg_chat_id=%s", kind, item_id, chat_id)
             try:
-                with _get_conn() as conn:
-                    row_item = conn.execute(
-                        "SELECT id, title, type, start_at, end_at, calendar_event_id, parent_id, parent_id_int FROM items WHERE id=?",
-                        (item_id,),
-                    ).fetchone()
-                row_item = as_dict(row_item)
                 if (
                     row_item
                     and row_item.get("type") == "meeting"
@@ -2938,97 +3492,18 @@ def _process_queue_item(row: dict) -> None:
                     _sync_calendar_for_item(row_item)
             except Exception as exc:
                 rid = row_item.get("id") if row_item else None
-                logging.warning("calendar sync failed item_id=%s err=%s", rid, str(exc)[:200])
+                logging.warning("calendar sync failed item_id=%s err=%s", rid, _Trunc(exc))
             _queue_mark(queue_id, "DONE", None)
             logging.info("queue done id=%s kind=text attempts=%s", queue_id, attempts)
-            _tg_notify_created(int(item_id))
-            if item_type == "meeting" and row_item:
-                _sync_calendar_for_item(row_item)
+            _tg_notify_created(item_id)
             if chat_id and item_type == "meeting" and dt is None:
                 logging.info("clarify needed item_id=%s dt=%s ambiguous=%s", item_id, dt, time_ambiguous)
-                item = {
-                    "chat_id": chat_id,
-                    "item_id": int(item_id),
-                    "date": "1970-01-01",
-                    "hh": 0,
-                    "mm": 0,
-                    "duration": int(MEETING_DEFAULT_MINUTES),
-                    "expires_at": time.time() + CLARIFY_TTL_SEC,
-                    "mode": "no_time",
-                }
-                qlen = _enqueue_clarify(chat_id, item)
-                if qlen == 1:
-                    reply_markup = {
-                        "inline_keyboard": [
-                            [
-                                {
-                                    "text": "Оставить без времени",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:1970-01-01:0:0:{MEETING_DEFAULT_MINUTES}:cancel"
-                                    ),
-                                },
-                                {
-                                    "text": "Отменить",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:1970-01-01:0:0:{MEETING_DEFAULT_MINUTES}:cancel"
-                                    ),
-                                },
-                            ]
-                        ]
-                    }
-                    _tg_send_message_with_keyboard(
-                        chat_id,
-                        f"Уточни время для встречи #{item_id}. Скажи: \"/set #{item_id} в 9\" или \"#{item_id} 16:00\".",
-                        reply_markup,
-                    )
+                _send_no_time_clarify(chat_id, item_id)
             elif chat_id and item_type == "meeting" and time_ambiguous and dt is not None:
                 logging.info("clarify needed item_id=%s dt=%s ambiguous=%s", item_id, dt, time_ambiguous)
                 tm = _parse_time_ru(text)
-                hh, mm = tm if tm else (dt.hour if dt else 0, dt.minute if dt else 0)
-                item = {
-                    "chat_id": chat_id,
-                    "item_id": int(item_id),
-                    "date": dt.date().isoformat() if dt else "1970-01-01",
-                    "hh": int(hh),
-                    "mm": int(mm),
-                    "duration": int(MEETING_DEFAULT_MINUTES),
-                    "expires_at": time.time() + CLARIFY_TTL_SEC,
-                    "mode": "ambiguous",
-                }
-                qlen = _enqueue_clarify(chat_id, item)
-                if qlen == 1:
-                    reply_markup = {
-                        "inline_keyboard": [
-                            [
-                                {
-                                    "text": "Утро",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:am"
-                                    ),
-                                },
-                                {
-                                    "text": "Вечер",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:pm"
-                                    ),
-                                },
-                                {
-                                    "text": "Отменить",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:cancel"
-                                    ),
-                                },
-                            ]
-                        ]
-                    }
-                    _tg_send_message_with_keyboard(
-                        chat_id,
-                        f"Уточни время для встречи #{item_id}: утро или вечер?",
-                        reply_markup,
-                    )
+                hh, mm = tm if tm else (dt.hour, dt.minute)
+                _send_ambiguous_clarify(chat_id, item_id, dt, hh, mm)
             return
         if kind != "voice":
             # Unknown kinds are no-op but still complete to avoid queue clogging
@@ -3048,7 +3523,7 @@ def _process_queue_item(row: dict) -> None:
         existing_item_id: int | None = None
         existing_asr_text: str | None = None
         if voice_unique_id:
-            with _get_conn() as conn:
+            with _read_conn() as conn:
                 r = conn.execute(
                     """
                     SELECT id, asr_text
@@ -3063,7 +3538,7 @@ def _process_queue_item(row: dict) -> None:
             existing_item_id = _to_int_or_none(r.get("id"))
             existing_asr_text = (r.get("asr_text") or None) if r else None
         elif tg_update_id is not None and tg_message_id is not None:
-            with _get_conn() as conn:
+            with _read_conn() as conn:
                 r = conn.execute(
                     """
                     SELECT id, asr_text
@@ -3101,7 +3576,7 @@ def _process_queue_item(row: dict) -> None:
             item_id = _insert_voice_placeholder(
                 "telegram",
                 ingested_at,
-                int(chat_id) if chat_id else None,
+                chat_id or None,
                 int(tg_message_id) if tg_message_id is not None else None,
                 int(tg_update_id) if tg_update_id is not None else None,
                 str(file_id) if file_id else None,
@@ -3119,7 +3594,7 @@ def _process_queue_item(row: dict) -> None:
             )
 
         if voice_unique_id:
-            with _get_conn() as conn:
+            with _read_conn() as conn:
                 r_other = conn.execute(
                     """
                     SELECT id, asr_text
@@ -3130,7 +3605,7 @@ def _process_queue_item(row: dict) -> None:
                     ORDER BY id DESC
                     LIMIT 1
                     """,
-                    (str(voice_unique_id), int(item_id)),
+                    (str(voice_unique_id), item_id),
                 ).fetchone()
             if r_other:
                 _log_voice_meta(
@@ -3142,7 +3617,7 @@ def _process_queue_item(row: dict) -> None:
                     int(voice_duration) if voice_duration is not None else None,
                     int(queue_id) if queue_id is not None else None,
                 )
-                _mark_item_failed_asr_dedup(int(item_id))
+                _mark_item_failed_asr_dedup(item_id)
                 _queue_mark(queue_id, "DONE", None)
                 if chat_id:
                     _tg_send_message(
@@ -3165,7 +3640,7 @@ def _process_queue_item(row: dict) -> None:
                 _queue_mark(queue_id, "DONE", None)
                 _tg_send_message(chat_id, "Ок, время встречи обновил.")
                 return
-            if re.search(r"\b(отмена|не надо|отменить)\b", text.lower()):
+            if _CANCEL_RE.search(text.lower()):
                 _clear_pending_clarify(chat_id)
                 _queue_mark(queue_id, "DONE", None)
                 _tg_send_message(chat_id, "Хорошо, отменил уточнение.")
@@ -3200,7 +3675,7 @@ def _process_queue_item(row: dict) -> None:
                 _tg_send_message(chat_id, "Есть ожидающее уточнение. Ответь: утро/вечер или /set #ID 16:00.")
             return
         if _looks_like_schedule_intent(text):
-            logging.info("schedule intent but parse failed: %r", text[:200])
+            logging.info("schedule intent but parse failed: %r", _Trunc(text))
             _queue_mark(queue_id, "DONE", None)
             if chat_id:
                 ref_id = _extract_first_item_ref(text)
@@ -3216,8 +3691,8 @@ def _process_queue_item(row: dict) -> None:
                 )
             return
         item_type, item_status, start_at, end_at, dt, time_ambiguous = _compute_item_fields_from_text(text)
-        logging.info("asr text=%r dt=%r", text[:200], dt)
-        _update_item_from_asr(int(item_id), text, item_type, item_status, start_at, end_at)
+        logging.info("asr text=%r dt=%r", _Trunc(text), dt)
+        row_item = _update_item_from_asr(item_id, text, item_type, item_status, start_at, end_at)
         _log_voice_meta(
             "voice_asr",
             item_id,
@@ -3229,12 +3704,6 @@ def _process_queue_item(row: dict) -> None:
         )
         logging.info("tg meta kind=%s item_id=%s tg_chat_id=%s", kind, item_id, chat_id)
         try:
-            with _get_conn() as conn:
-                row_item = conn.execute(
-                    "SELECT id, title, type, start_at, end_at, calendar_event_id, parent_id, parent_id_int FROM items WHERE id=?",
-                    (item_id,),
-                ).fetchone()
-            row_item = as_dict(row_item)
             if (
                 row_item
                 and row_item.get("type") == "meeting"
@@ -3244,21 +3713,13 @@ def _process_queue_item(row: dict) -> None:
                 _sync_calendar_for_item(row_item)
         except Exception as exc:
             rid = row_item.get("id") if row_item else None
-            logging.warning("calendar sync failed item_id=%s err=%s", rid, str(exc)[:200])
+            logging.warning("calendar sync failed item_id=%s err=%s", rid, _Trunc(exc))
         _queue_mark(queue_id, "DONE", None)
         logging.info("queue done id=%s kind=voice attempts=%s", queue_id, attempts)
         if chat_id:
-            # NOTE: report actual status/type to user
-            # We read it back quickly to avoid mismatch
-            try:
-                with _get_conn() as conn:
-                    r = conn.execute("select type,status,start_at from items where id=?", (item_id,)).fetchone()
-                r = as_dict(r)
-                st = str(r.get("status") or "inbox")
-                sa = r.get("start_at")
-            except Exception:
-                st, sa = "inbox", None
-            _tg_notify_created(int(item_id))
+            # NOTE: report actual start_at to user, as stored by _update_item_from_asr
+            sa = row_item.get("start_at")
+            _tg_notify_created(item_id)
             if item_type == "meeting" and dt is None:
                 reply_markup = {
                     "inline_keyboard": [
@@ -3287,54 +3748,11 @@ def _process_queue_item(row: dict) -> None:
             elif item_type == "meeting" and time_ambiguous and dt is not None:
                 logging.info("clarify needed item_id=%s dt=%s ambiguous=%s", item_id, dt, time_ambiguous)
                 tm = _parse_time_ru(text)
-                hh, mm = tm if tm else (dt.hour if dt else 0, dt.minute if dt else 0)
-                item = {
-                    "chat_id": chat_id,
-                    "item_id": int(item_id),
-                    "date": dt.date().isoformat() if dt else "1970-01-01",
-                    "hh": int(hh),
-                    "mm": int(mm),
-                    "duration": int(MEETING_DEFAULT_MINUTES),
-                    "expires_at": time.time() + CLARIFY_TTL_SEC,
-                    "mode": "ambiguous",
-                }
-                qlen = _enqueue_clarify(chat_id, item)
-                if qlen == 1:
-                    reply_markup = {
-                        "inline_keyboard": [
-                            [
-                                {
-                                    "text": "Утро",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:am"
-                                    ),
-                                },
-                                {
-                                    "text": "Вечер",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:pm"
-                                    ),
-                                },
-                                {
-                                    "text": "Отменить",
-                                    "callback_data": (
-                                        f"clarify:{chat_id}:{item_id}:"
-                                        f"{dt.date().isoformat()}:{hh}:{mm}:{MEETING_DEFAULT_MINUTES}:cancel"
-                                    ),
-                                },
-                            ]
-                        ]
-                    }
-                    _tg_send_message_with_keyboard(
-                        chat_id,
-                        f"Уточни время для встречи #{item_id}: утро или вечер?",
-                        reply_markup,
-                    )
+                hh, mm = tm if tm else (dt.hour, dt.minute)
+                _send_ambiguous_clarify(chat_id, item_id, dt, hh, mm)
             else:
                 if item_type != "meeting":
-                    _tg_notify_created(int(item_id))
+                    _tg_notify_created(item_id)
                     if sa:
                         _tg_send_message(chat_id, f"Время: {sa}")
                     else:
@@ -3384,25 +3802,150 @@ P3_CALENDAR_CREATE = "P3_CALENDAR_CREATE"
 P3_CALENDAR_UPDATE = "P3_CALENDAR_UPDATE"
 P4_CALENDAR_CANCEL = "P4_CALENDAR_CANCEL"
 
+# Calendar bookkeeping statements, kept as constants so the shared writer connection
+# (_write_conn) prepares each text once and reuses it from its statement cache.
+_SQL_CAL_NOT_CONFIGURED = """
+    UPDATE items
+    SET last_error = ?,
+        calendar_event_id = NULL,
+        updated_at = ?
+    WHERE id = ?
+"""
+_SQL_CAL_MARK_FAILED = """
+    UPDATE items
+    SET attempts = ?,
+        last_error = ?,
+        calendar_event_id = 'FAILED',
+        updated_at = ?
+    WHERE id = ?
+"""
+_SQL_CAL_SYNC_ERROR = """
+    UPDATE items
+    SET attempts = ?,
+        last_error = ?,
+        calendar_event_id = ?,
+        updated_at = ?
+    WHERE id = ?
+"""
+_SQL_CAL_SYNC_SUCCESS = """
+    UPDATE items
+    SET calendar_event_id = ?1,
+        last_error = NULL,
+        updated_at = ?2,
+        calendar_ok_at = COALESCE(calendar_ok_at, ?2)
+    WHERE id = ?3
+      AND (calendar_event_id IS NULL OR calendar_event_id = 'PENDING')
+"""
+_SQL_CAL_RESERVE = """
+    UPDATE items
+    SET status = 'active',
+        start_at = ?,
+        end_at = ?,
+        calendar_event_id = 'PENDING'
+    WHERE id = ?
+      AND status = 'inbox'
+      AND (start_at IS NULL OR start_at = '')
+      AND (calendar_event_id IS NULL OR calendar_event_id = '')
+    RETURNING calendar_event_id
+"""
+# Titles without a usable datetime; later sweeps skip them until the title changes.
+_SQL_DT_PROBE_MARK = "UPDATE items SET dt_probe_title = title WHERE id = ?"
+_SQL_CAL_PENDING_ERROR = """
+    UPDATE items
+    SET attempts = attempts + 1,
+        last_error = ?,
+        calendar_event_id = 'PENDING',
+        updated_at = ?
+    WHERE id = ?
+"""
+_SQL_CAL_PENDING_SUCCESS = """
+    UPDATE items
+    SET calendar_event_id = ?1,
+        last_error = NULL,
+        updated_at = ?2,
+        calendar_ok_at = COALESCE(calendar_ok_at, ?2)
+    WHERE id = ?3 AND calendar_event_id = 'PENDING'
+"""
+# Claims one retry sweep in a single statement. Subtasks are never synced on their own.
+# {only_due} narrows the sweep to ids whose retry backoff has elapsed.
+_SQL_CAL_RETRY_CLAIM = """
+    UPDATE items
+    SET attempts = attempts + 1,
+        updated_at = ?,
+        last_error = NULL
+    WHERE id IN (
+        SELECT id
+        FROM items
+        WHERE calendar_event_id = 'PENDING'
+          AND attempts < ?
+          AND status = 'active'
+          AND start_at IS NOT NULL AND start_at != ''
+          AND end_at IS NOT NULL AND end_at != ''
+          AND (source IS NULL OR source != 'canceled')
+          AND parent_id_int IS NULL
+          AND (parent_id IS NULL OR parent_id = '')
+          {only_due}
+        ORDER BY id ASC
+        LIMIT ?
+    )
+    RETURNING id, title, start_at, end_at, attempts
+"""
+_SQL_CAL_RETRY_ERROR = """
+    UPDATE items
+    SET last_error = ?,
+        updated_at = ?,
+        calendar_event_id = CASE WHEN attempts >= ? THEN 'FAILED' ELSE calendar_event_id END
+    WHERE id = ? AND calendar_event_id = 'PENDING'
+    RETURNING calendar_event_id, attempts
+"""
+
+# Built calendar service per thread: googleapiclient/httplib2 objects are not thread-safe and
+# queue items are processed on a pool. Credentials are parsed once and shared.
+_CAL_SERVICE_LOCAL = threading.local()
+_CAL_CREDS: Any = None
+_CAL_CREDS_LOCK = threading.Lock()
+# Bundled calendar/v3 discovery document, read once per process ("" when unavailable).
+_CAL_DISCOVERY_DOC: str | None = None
+# (not-configured reason or None, time.monotonic() of the probe that found it).
+_CAL_CONFIG_STATE: tuple[str | None, float] = (None, 0.0)
+
+
 def _get_calendar_service():
-    global _CAL_NOT_CONFIGURED_REASON
-    _CAL_NOT_CONFIGURED_REASON = None
+    # The not-configured verdict of this call is stored next to the thread's service, so the
+    # caller reads back its own value via _calendar_not_configured_reason(), not another thread's.
+    global _CAL_CONFIG_STATE
+    service = getattr(_CAL_SERVICE_LOCAL, "service", None)
+    if service is None:
+        reason, checked_at = _CAL_CONFIG_STATE
+        if reason is None or time.monotonic() - checked_at >= CALENDAR_CONFIG_RECHECK_SEC:
+            service, reason = _build_calendar_service()
+            _CAL_CONFIG_STATE = (reason, time.monotonic())
+    else:
+        reason = None
+    _CAL_SERVICE_LOCAL.reason = reason
+    return service
+
+
+def _calendar_not_configured_reason() -> str | None:
+    # Reason from this thread's last _get_calendar_service() call; None when the service was there.
+    return getattr(_CAL_SERVICE_LOCAL, "reason", None)
+
+
+def _build_calendar_service() -> tuple[Any, str | None]:
+    # Returns (service, None), or (None, not-configured reason).
+    global _CAL_CREDS
     if not GOOGLE_SERVICE_ACCOUNT_FILE:
         logging.warning("calendar_not_configured: missing_file")
-        _CAL_NOT_CONFIGURED_REASON = "missing_file"
-        return None
+        return None, "missing_file"
     if os.path.isdir(GOOGLE_SERVICE_ACCOUNT_FILE):
         logging.warning("calendar_not_configured: file_is_directory")
-        _CAL_NOT_CONFIGURED_REASON = "file_is_directory"
-        return None
+        return None, "file_is_directory"
     if not os.path.exists(GOOGLE_SERVICE_ACCOUNT_FILE):
         logging.warning("calendar_not_configured: missing_file")
-        _CAL_NOT_CONFIGURED_REASON = "missing_file"
-        return None
+        return None, "missing_file"
     if not GOOGLE_CALENDAR_ID:
         logging.warning("calendar_not_configured: missing_calendar_id")
-        _CAL_NOT_CONFIGURED_REASON = "missing_calendar_id"
-        return None
+        return None, "missing_calendar_id"
     try:
         creds_mod = importlib.import_module("google.oauth2.service_account")
         discovery_mod = importlib.import_module("googleapiclient.discovery")
@@ -3410,18 +3953,27 @@ def _get_calendar_service():
         build = getattr(discovery_mod, "build", None)
         if Credentials is None or build is None:
             logging.warning("google api libs not available; skipping")
-            _CAL_NOT_CONFIGURED_REASON = "missing_libs"
-            return None
+            return None, "missing_libs"
     except Exception as exc:
-        logging.warning("google api libs not available; skipping (%s)", str(exc)[:200])
-        _CAL_NOT_CONFIGURED_REASON = "missing_libs"
-        return None
-
-    creds = Credentials.from_service_account_file(
-        GOOGLE_SERVICE_ACCOUNT_FILE,
-        scopes=["https://www.googleapis.com/auth/calendar"],
-    )
-    service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+        logging.warning("google api libs not available; skipping (%s)", _Trunc(exc))
+        return None, "missing_libs"
+
+    with _CAL_CREDS_LOCK:
+        if _CAL_CREDS is None:
+            _CAL_CREDS = Credentials.from_service_account_file(
+                GOOGLE_SERVICE_ACCOUNT_FILE,
+                scopes=["https://www.googleapis.com/auth/calendar"],
+            )
+        creds = _CAL_CREDS
+    http = _calendar_authorized_http(creds)
+    auth = {"http": http} if http is not None else {"credentials": creds}
+    doc = _calendar_discovery_doc()
+    build_from_document = getattr(discovery_mod, "build_from_document", None)
+    if doc and build_from_document is not None:
+        service = build_from_document(doc, **auth)
+    else:
+        service = build("calendar", "v3", cache_discovery=False, **auth)
+    _CAL_SERVICE_LOCAL.service = service
     if CALENDAR_DEBUG:
         try:
             data = service.calendarList().list().execute()
@@ -3432,25 +3984,101 @@ def _get_calendar_service():
                     cal.get("summary"),
                 )
         except Exception as exc:
-            logging.warning("calendar_list failed err=%s", str(exc)[:200])
-    return service
+            logging.warning("calendar_list failed err=%s", _Trunc(exc))
+    return service, None
+
+
+def _calendar_discovery_doc() -> str | None:
+    # build() re-reads the static discovery JSON for every thread's service; keep the text once.
+    global _CAL_DISCOVERY_DOC
+    with _CAL_CREDS_LOCK:
+        if _CAL_DISCOVERY_DOC is None:
+            try:
+                cache_mod = importlib.import_module("googleapiclient.discovery_cache")
+                _CAL_DISCOVERY_DOC = cache_mod.get_static_doc("calendar", "v3") or ""
+            except (ImportError, AttributeError):
+                _CAL_DISCOVERY_DOC = ""
+        return _CAL_DISCOVERY_DOC or None
 
 
-def _create_event(title: str, start: datetime, end: datetime) -> str | None:
+def _calendar_authorized_http(creds: Any) -> Any:
+    # One keep-alive httplib2.Http per thread's service with an explicit timeout; None when
+    # google-auth-httplib2 is missing and build() has to wrap the credentials itself.
+    try:
+        httplib2 = importlib.import_module("httplib2")
+        auth_httplib2 = importlib.import_module("google_auth_httplib2")
+    except ImportError:
+        return None
+    return auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=CALENDAR_HTTP_TIMEOUT_SEC))
+
+
+def _event_body(title: str, start: datetime | str, end: datetime | str) -> dict:
+    # Stored start_at/end_at are already isoformat() strings and go to the API as-is.
+    return {
+        "summary": title,
+        "start": {"dateTime": start if isinstance(start, str) else start.isoformat(), "timeZone": TIMEZONE_NAME},
+        "end": {"dateTime": end if isinstance(end, str) else end.isoformat(), "timeZone": TIMEZONE_NAME},
+    }
+
+
+def _create_event(title: str, start: datetime | str, end: datetime | str) -> str | None:
     service = _get_calendar_service()
     if service is None:
         logging.warning("calendar service not configured; skipping")
         return None
 
-    event = {
-        "summary": title,
-        "start": {"dateTime": start.isoformat(), "timeZone": TIMEZONE_NAME},
-        "end": {"dateTime": end.isoformat(), "timeZone": TIMEZONE_NAME},
-    }
-    created = service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event).execute()
+    request = service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=_event_body(title, start, end))
+    for attempt in range(CALENDAR_RETRIES + 1):
+        try:
+            created = request.execute()
+            break
+        except Exception as exc:
+            _, transient = _calendar_error_info(exc)
+            if not transient or attempt >= CALENDAR_RETRIES:
+                raise
+            _calendar_backoff_sleep(attempt, _calendar_retry_after(exc))
     return created.get("id")
 
 
+def _create_events_batch(
+    entries: list[tuple[int, str, datetime | str, datetime | str]],
+) -> dict[int, tuple[str | None, Exception | None]]:
+    # One multipart request for all (item_id, title, start, end) entries.
+    # Returns {item_id: (event_id, exc)}; empty when the calendar is not configured.
+    service = _get_calendar_service()
+    if service is None:
+        logging.warning("calendar service not configured; skipping")
+        return {}
+    results: dict[int, tuple[str | None, Exception | None]] = {}
+
+    def _cb(request_id: str, response: dict | None, exception: Exception | None) -> None:
+        event_id = (response or {}).get("id") if exception is None else None
+        results[int(request_id)] = (event_id, exception)
+
+    pending = entries
+    for attempt in range(CALENDAR_RETRIES + 1):
+        batch = service.new_batch_http_request(callback=_cb)
+        for item_id, title, start, end in pending:
+            batch.add(
+                service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=_event_body(title, start, end)),
+                request_id=str(item_id),
+            )
+        try:
+            batch.execute()
+        except Exception as exc:
+            for item_id, _, _, _ in pending:
+                results[item_id] = (None, exc)
+        # Re-send only the entries that failed transiently, after a jittered backoff.
+        errors = [results.get(e[0], (None, None))[1] for e in pending]
+        retry = [e for e, err in zip(pending, errors) if err is not None and _calendar_error_info(err)[1]]
+        if not retry or attempt >= CALENDAR_RETRIES:
+            break
+        retry_after = max((_calendar_retry_after(results[e[0]][1]) or 0.0) for e in retry)
+        _calendar_backoff_sleep(attempt, retry_after or None)
+        pending = retry
+    return results
+
+
 def _calendar_error_info(exc: Exception) -> tuple[str, bool]:
     status = None
     resp = getattr(exc, "resp", None)
@@ -3466,36 +4094,39 @@ def _calendar_error_info(exc: Exception) -> tuple[str, bool]:
     return f"calendar_error_{type(exc).__name__}", True
 
 
+def _calendar_retry_after(exc: Exception) -> float | None:
+    # HttpError.resp is an httplib2.Response: a dict of lower-cased headers.
+    resp = getattr(exc, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _calendar_backoff_sleep(attempt: int, retry_after: float | None = None) -> None:
+    # Full exponential step with +-50% jitter, capped; a server Retry-After wins when larger.
+    delay = min(CALENDAR_RETRY_MAX_SEC, CALENDAR_RETRY_BASE_SEC * (2**attempt)) * random.uniform(0.5, 1.5)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, CALENDAR_RETRY_MAX_SEC))
+    time.sleep(delay)
+
+
 def _handle_calendar_not_configured(item_id: int) -> None:
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         conn.execute(
-            """
-            UPDATE items
-            SET last_error = ?,
-                calendar_event_id = NULL,
-                updated_at = ?
-            WHERE id = ?
-            """,
+            _SQL_CAL_NOT_CONFIGURED,
             ("calendar_not_configured", datetime.now(timezone.utc).isoformat(), item_id),
         )
-        conn.commit()
     logging.info("[%s] calendar_state after=NOT_CONFIGURED", item_id)
 
 
 def _mark_calendar_failed(item_id: int, err_code: str) -> None:
-    with _get_conn() as conn:
+    with _write_conn() as conn:
         conn.execute(
-            """
-            UPDATE items
-            SET attempts = ?,
-                last_error = ?,
-                calendar_event_id = 'FAILED',
-                updated_at = ?
-            WHERE id = ?
-            """,
+            _SQL_CAL_MARK_FAILED,
             (CALENDAR_MAX_ATTEMPTS, err_code[:200], datetime.now(timezone.utc).isoformat(), item_id),
         )
-        conn.commit()
     logging.info("[%s] calendar_state after=FAILED", item_id)
     _tg_notify_calendar_dead(item_id)
 
@@ -3509,7 +4140,7 @@ def _calendar_smoke_test() -> None:
     if not CALENDAR_SMOKE_TEST:
         return
     try:
-        start = datetime.now(_local_tz()) + timedelta(minutes=5)
+        start = datetime.now(_LOCAL_TZ) + timedelta(minutes=5)
         end = start + timedelta(minutes=15)
         event = {
             "summary": "MyTGTodoist smoke test",
@@ -3519,7 +4150,7 @@ def _calendar_smoke_test() -> None:
         created = service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event).execute()
         logging.info("calendar_smoke created id=%s", created.get("id"))
     except Exception as exc:
-        logging.warning("calendar_smoke failed err=%s", str(exc)[:200])
+        logging.warning("calendar_smoke failed err=%s", _Trunc(exc))
 
 
 def _patch_event(event_id: str, start: datetime, end: datetime) -> str:
@@ -3648,7 +4279,7 @@ def _calendar_get_event(event_id: str) -> dict:
 def _p3_calendar_create_tick(limit: int = 10) -> None:
     # P3: for current logic (create_tick).
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT id, title, planned_at
@@ -3662,7 +4293,7 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                 (int(limit),),
             ).fetchall()
     except Exception as exc:
-        logging.warning("%s err=%s", P3_CALENDAR_CREATE, str(exc)[:200])
+        logging.warning("%s err=%s", P3_CALENDAR_CREATE, _Trunc(exc))
         return
 
     for row in rows:
@@ -3688,7 +4319,7 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                 dt = dt.replace(tzinfo=timezone.utc)
 
             claim_id = f"PENDING:{datetime.now(timezone.utc).isoformat()}:{os.getpid()}"
-            with _get_conn() as conn:
+            with _tx() as conn:
                 cur = conn.execute(
                     """
                     UPDATE tasks
@@ -3698,7 +4329,6 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                     """,
                     (claim_id, task_id),
                 )
-                conn.commit()
             if cur.rowcount != 1:
                 continue
 
@@ -3730,7 +4360,7 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                         res.get("err"),
                     )
                     continue
-                with _get_conn() as conn:
+                with _tx() as conn:
                     conn.execute(
                         """
                         UPDATE tasks
@@ -3741,7 +4371,6 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                         """,
                         (datetime.now(timezone.utc).isoformat(), task_id, claim_id),
                     )
-                    conn.commit()
                 logging.warning(
                     "%s action=create_attempt task_id=%s planned_at=%s calendar_event_id=%s "
                     "reason=service_unavailable ok=%s http_status=%s err=%s",
@@ -3756,7 +4385,7 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                 break
 
             event_id = res.get("event_id")
-            with _get_conn() as conn:
+            with _tx() as conn:
                 conn.execute(
                     """
                     UPDATE tasks
@@ -3768,7 +4397,6 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                     """,
                     (event_id, datetime.now(timezone.utc).isoformat(), task_id, claim_id),
                 )
-                conn.commit()
             logging.info(
                 "%s transition=PLANNED->SCHEDULED reason=create_success task_id=%s planned_at=%s "
                 "calendar_event_id=%s ok=%s http_status=%s err=%s",
@@ -3787,7 +4415,7 @@ def _p3_calendar_create_tick(limit: int = 10) -> None:
                 task_id,
                 planned_at,
                 "",
-                str(exc)[:200],
+                _Trunc(exc),
             )
             continue
 
@@ -3796,7 +4424,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
     # P3: for current logic (update_tick).
     cutoff = (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT id, title, planned_at, calendar_event_id, state, updated_at
@@ -3811,7 +4439,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                 (cutoff, int(limit)),
             ).fetchall()
     except Exception as exc:
-        logging.warning("%s err=%s", P3_CALENDAR_UPDATE, str(exc)[:200])
+        logging.warning("%s err=%s", P3_CALENDAR_UPDATE, _Trunc(exc))
         return
 
     for row in rows:
@@ -3854,7 +4482,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                 res.get("err"),
             )
             if res.get("err") == "not_found":
-                with _get_conn() as conn:
+                with _tx() as conn:
                     conn.execute(
                         """
                         UPDATE tasks
@@ -3865,7 +4493,6 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                         """,
                         (datetime.now(timezone.utc).isoformat(), task_id),
                     )
-                    conn.commit()
                 logging.warning(
                     "%s action=patch_attempt task_id=%s planned_at=%s calendar_event_id=%s "
                     "reason=patch_404_reset ok=%s http_status=%s err=%s",
@@ -3891,7 +4518,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                     res.get("err"),
                 )
                 continue
-            with _get_conn() as conn:
+            with _tx() as conn:
                 conn.execute(
                     """
                     UPDATE tasks
@@ -3901,7 +4528,6 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                     """,
                     (datetime.now(timezone.utc).isoformat(), task_id),
                 )
-                conn.commit()
             logging.info(
                 "%s transition=PLANNED->SCHEDULED reason=patch_success task_id=%s planned_at=%s "
                 "calendar_event_id=%s ok=%s http_status=%s err=%s",
@@ -3920,7 +4546,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
                 row["id"],
                 "",
                 "",
-                str(exc)[:200],
+                _Trunc(exc),
             )
             continue
 
@@ -3928,7 +4554,7 @@ def _p3_calendar_update_tick(limit: int = 3) -> None:
 def _p4_calendar_cancel_tick(limit: int = 3) -> None:
     # P4: for future scaffold (cancel_tick). Do not call yet.
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT id, title, planned_at, calendar_event_id, state, updated_at
@@ -3942,7 +4568,7 @@ def _p4_calendar_cancel_tick(limit: int = 3) -> None:
                 (int(limit),),
             ).fetchall()
     except Exception as exc:
-        logging.warning("%s err=%s", P4_CALENDAR_CANCEL, str(exc)[:200])
+        logging.warning("%s err=%s", P4_CALENDAR_CANCEL, _Trunc(exc))
         return
     for row in rows:
         try:
@@ -3962,7 +4588,7 @@ def _p4_calendar_cancel_tick(limit: int = 3) -> None:
             )
             if res.get("ok"):
                 reason = "already_missing" if res.get("http_status") == 404 else "delete_success"
-                with _get_conn() as conn:
+                with _tx() as conn:
                     conn.execute(
                         """
                         UPDATE tasks
@@ -3972,7 +4598,6 @@ def _p4_calendar_cancel_tick(limit: int = 3) -> None:
                         """,
                         (datetime.now(timezone.utc).isoformat(), task_id),
                     )
-                    conn.commit()
                 logging.info(
                     "%s action=cancel_applied task_id=%s cleared_calendar_event_id=1 reason=%s",
                     P4_CALENDAR_CANCEL,
@@ -3995,7 +4620,7 @@ def _p4_calendar_cancel_tick(limit: int = 3) -> None:
                 P4_CALENDAR_CANCEL,
                 row["id"],
                 row.get("calendar_event_id"),
-                str(exc)[:200],
+                _Trunc(exc),
             )
             continue
 
@@ -4014,11 +4639,11 @@ def _p4_reg_nudge_tick(limit: int = 50) -> None:
     mode = REG_NUDGES_MODE
     if mode not in {"daily", "due_day"}:
         return
-    now_local = datetime.now(_local_tz())
+    now_local = datetime.now(_LOCAL_TZ)
     today = now_local.date()
     period_key = f"{today.year:04d}-{today.month:02d}"
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT rr.id, rr.regulation_id, rr.period_key, rr.status, rr.due_date, r.title
@@ -4033,7 +4658,7 @@ def _p4_reg_nudge_tick(limit: int = 50) -> None:
                 (period_key, int(limit)),
             ).fetchall()
     except Exception as exc:
-        logging.warning("P4_REG_NUDGE action=fetch_error err=%s", str(exc)[:200])
+        logging.warning("P4_REG_NUDGE action=fetch_error err=%s", _Trunc(exc))
         return
     for row in rows:
         try:
@@ -4091,7 +4716,7 @@ def _p5_drift_tick(limit: int = 50) -> int:
         return 0
     drift_count = 0
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT id, state, planned_at, calendar_event_id
@@ -4103,7 +4728,7 @@ def _p5_drift_tick(limit: int = 50) -> int:
                 (int(limit),),
             ).fetchall()
     except Exception as exc:
-        logging.warning("P5_DRIFT action=fetch_error err=%s", str(exc)[:200])
+        logging.warning("P5_DRIFT action=fetch_error err=%s", _Trunc(exc))
         return 0
     for row in rows:
         event_id = str(row["calendar_event_id"] or "").strip()
@@ -4131,10 +4756,10 @@ def _p5_drift_tick(limit: int = 50) -> int:
             )
             drift_count += 1
     # Regulations drift: missing run for current month
-    today = datetime.now(_local_tz()).date()
+    today = datetime.now(_LOCAL_TZ).date()
     period_key = f"{today.year:04d}-{today.month:02d}"
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             regs = conn.execute(
                 """
                 SELECT id FROM regulations WHERE status = 'ACTIVE' ORDER BY id ASC
@@ -4159,7 +4784,7 @@ def _p5_drift_tick(limit: int = 50) -> int:
                     )
                     drift_count += 1
     except Exception as exc:
-        logging.warning("P5_DRIFT action=reg_fetch_error err=%s", str(exc)[:200])
+        logging.warning("P5_DRIFT action=reg_fetch_error err=%s", _Trunc(exc))
     return drift_count
 
 
@@ -4239,11 +4864,11 @@ def _p5_nudge_emit_if_needed(day_str: str, mode: str | None = None) -> bool:
 def _p5_overload_tick() -> int:
     if not _p5_should_run(OVERLOAD_MODE):
         return 0
-    tz = _local_tz()
+    tz = _LOCAL_TZ
     now_local = datetime.now(tz)
     day_str = now_local.date().isoformat()
     try:
-        with _get_conn() as conn:
+        with _read_conn() as conn:
             rows = conn.execute(
                 """
                 SELECT planned_at
@@ -4285,7 +4910,7 @@ def _p5_overload_tick() -> int:
                 """
             ).fetchone()["cnt"]
     except Exception as exc:
-        logging.warning("P5_OVERLOAD action=fetch_error err=%s", str(exc)[:200])
+        logging.warning("P5_OVERLOAD action=fetch_error err=%s", _Trunc(exc))
         return 0
     for status, count in reg_status_counts.items():
         logging.info(
@@ -4333,18 +4958,15 @@ def _sync_calendar_for_item(item: dict) -> None:
         logging.info("[%s] calendar_state after=%s (skip)", item_id, cal_id or "NULL")
         return
 
-    start = datetime.fromisoformat(item["start_at"])
-    end = datetime.fromisoformat(item["end_at"])
-
     try:
-        event_id = _create_event(title, start, end)  # must return str|None
+        event_id = _create_event(title, item["start_at"], item["end_at"])  # must return str|None
     except Exception as e:
         event_id = None
         err_text, err_transient = _calendar_error_info(e)
     else:
         err_text, err_transient = "", True
 
-    if event_id is None and _CAL_NOT_CONFIGURED_REASON is not None:
+    if event_id is None and _calendar_not_configured_reason() is not None:
         _handle_calendar_not_configured(item_id)
         return
 
@@ -4355,18 +4977,11 @@ def _sync_calendar_for_item(item: dict) -> None:
         new_attempts = attempts + 1
         new_state = "FAILED" if new_attempts >= CALENDAR_MAX_ATTEMPTS else "PENDING"
         err_text = err_text or "calendar create failed"
-        logging.warning("calendar error item_id=%s err=%s", item_id, err_text[:200])
+        logging.warning("calendar error item_id=%s err=%s", item_id, _Trunc(err_text))
 
-        with _get_conn() as conn:
+        with _write_conn() as conn:
             conn.execute(
-                """
-                UPDATE items
-                SET attempts = ?,
-                    last_error = ?,
-                    calendar_event_id = ?,
-                    updated_at = ?
-                WHERE id = ?
-                """,
+                _SQL_CAL_SYNC_ERROR,
                 (
                     new_attempts,
                     err_text[:200],
@@ -4375,41 +4990,52 @@ def _sync_calendar_for_item(item: dict) -> None:
                     item_id,
                 ),
             )
-            conn.commit()
 
         logging.info("[%s] calendar_state after=%s", item_id, new_state)
         if new_state == "FAILED":
             _tg_notify_calendar_dead(item_id)
+        else:
+            _calendar_retry_later(item_id, new_attempts)
         return
 
     # success: store event_id for NULL or PENDING
-    with _get_conn() as conn:
-        conn.execute(
-            """
-            UPDATE items
-            SET calendar_event_id = ?,
-                last_error = NULL,
-                updated_at = ?,
-                calendar_ok_at = COALESCE(calendar_ok_at, ?)
-            WHERE id = ?
-              AND (calendar_event_id IS NULL OR calendar_event_id = 'PENDING')
-            """,
-            (
-                event_id,
-                datetime.now(timezone.utc).isoformat(),
-                datetime.now(timezone.utc).isoformat(),
-                item_id,
-            ),
-        )
-        conn.commit()
+    with _write_conn() as conn:
+        conn.execute(_SQL_CAL_SYNC_SUCCESS, (event_id, datetime.now(timezone.utc).isoformat(), item_id))
 
     logging.info("[%s] calendar_state after=%s", item_id, event_id)
     _tg_notify_calendar_success(item_id)
 
 
-def _process_items() -> None:
+_CAL_RETRY_LOCK = threading.Lock()
+# (time.monotonic() when due, item_id); stale entries are harmless, the sweep SELECT re-checks state.
+_CAL_RETRY_HEAP: list[tuple[float, int]] = []
+# time.monotonic() of the next full PENDING scan; 0 makes the first sweep after start a full scan.
+_CAL_RETRY_SCAN_AT = 0.0
+
+
+def _calendar_retry_later(item_id: int, attempts: int) -> None:
+    delay = min(CALENDAR_RETRY_DELAY_MAX_SEC, CALENDAR_RETRY_DELAY_SEC * (2 ** max(0, attempts - 1)))
+    with _CAL_RETRY_LOCK:
+        heapq.heappush(_CAL_RETRY_HEAP, (time.monotonic() + delay, int(item_id)))
+
+
+def _calendar_retry_due(limit: int) -> list[int] | None:
+    # None means "scan all PENDING items"; otherwise up to `limit` ids whose retry time has come.
+    global _CAL_RETRY_SCAN_AT
+    now = time.monotonic()
+    with _CAL_RETRY_LOCK:
+        if now >= _CAL_RETRY_SCAN_AT:
+            _CAL_RETRY_SCAN_AT = now + CALENDAR_RETRY_RESCAN_SEC
+            return None
+        due: list[int] = []
+        while _CAL_RETRY_HEAP and _CAL_RETRY_HEAP[0][0] <= now and len(due) < limit:
+            due.append(heapq.heappop(_CAL_RETRY_HEAP)[1])
+        return due
+
+
+def _process_items() -> int:
     _retry_pending_events()
-    with _get_conn() as conn:
+    with _read_conn() as conn:
         rows = conn.execute(
             """
             SELECT id, title, type, status, parent_id, parent_id_int
@@ -4417,243 +5043,180 @@ def _process_items() -> None:
             WHERE status = 'inbox'
               AND (start_at IS NULL OR start_at = '')
               AND (calendar_event_id IS NULL OR calendar_event_id = '')
+              AND (dt_probe_title IS NULL OR dt_probe_title != title)
             ORDER BY id ASC
             LIMIT 20
             """
         ).fetchall()
 
-    for row in rows:
-        row = as_dict(row)
-        item_id = row.get("id")
-        if item_id is None:
-            continue
-        if _get_parent_id_from_row(row) is not None:
-            continue
-        title = row.get("title") or ""
-        start = _extract_datetime(title)
-        if not start or _is_time_ambiguous(title):
-            continue
-        end = start + timedelta(minutes=MEETING_DEFAULT_MINUTES)
-        reserved = False
-        with _get_conn() as conn:
-            conn.execute("BEGIN IMMEDIATE")
+    batch: list[tuple[int, str, str, str]] = []
+    no_datetime: list[tuple[int]] = []
+    # One write transaction reserves the whole sweep.
+    with _write_conn() as conn:
+        for item_id, title, item_type, status, parent_id, parent_id_int in rows:
+            if item_id is None:
+                continue
+            if _to_int_or_none(parent_id_int) is not None or _to_int_or_none(parent_id) is not None:
+                continue
+            title = title or ""
+            start, time_ambiguous = _parse_title(title)
+            if not start or time_ambiguous:
+                no_datetime.append((item_id,))
+                continue
+            # Formatted once: the same strings are stored and sent to Calendar as-is.
+            start_iso = start.isoformat()
+            end_iso = (start + timedelta(minutes=MEETING_DEFAULT_MINUTES)).isoformat()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             if P2_ENFORCE_STATUS:
-                validate_task_status(row, "active", 0)
-            cur = conn.execute(
-                """
-                UPDATE items
-                SET status = 'active',
-                    start_at = ?,
-                    end_at = ?,
-                    calendar_event_id = 'PENDING'
-                WHERE id = ?
-                  AND status = 'inbox'
-                  AND (start_at IS NULL OR start_at = '')
-                  AND (calendar_event_id IS NULL OR calendar_event_id = '')
-                """,
-                (start.isoformat(), end.isoformat(), item_id),
-            )
-            reserved = cur.rowcount == 1
-            conn.commit()
-        if not reserved:
-            continue
-        with _get_conn() as conn:
-            row_state = conn.execute(
-                "SELECT calendar_event_id FROM items WHERE id = ?",
-                (item_id,),
-            ).fetchone()
-        row_state = as_dict(row_state) if row_state else None
-        cal_before = row_state.get("calendar_event_id") if row_state else None
-        logging.info("[%s] calendar_state before=%s", item_id, cal_before)
-        if cal_before and cal_before != "PENDING":
-            logging.info("[%s] calendar_state after=%s", item_id, cal_before)
-            continue
-        try:
-            event_id = _create_event(title, start, end)
-        except Exception as exc:
-            event_id = None
-            err_text, err_transient = _calendar_error_info(exc)
-        else:
-            err_text, err_transient = "", True
-        if event_id is None and _CAL_NOT_CONFIGURED_REASON is not None:
-            _handle_calendar_not_configured(int(item_id))
-            continue
-        if not event_id:
-            if err_text and not err_transient:
-                _mark_calendar_failed(int(item_id), err_text)
+                validate_task_status({"type": item_type, "status": status}, "active", 0)
+            reserved = conn.execute(_SQL_CAL_RESERVE, (start_iso, end_iso, item_id)).fetchone()
+            if reserved is None:
+                continue
+            logging.info("[%s] calendar_state before=%s", item_id, reserved["calendar_event_id"])
+            batch.append((int(item_id), title, start_iso, end_iso))
+        # Remember titles without a usable datetime so later sweeps skip them until the title changes.
+        conn.executemany(_SQL_DT_PROBE_MARK, no_datetime)
+
+    if not batch:
+        return 0
+    results = _create_events_batch(batch)
+    not_configured: list[int] = []
+    failed: list[tuple[int, str]] = []
+    succeeded: list[int] = []
+    now_iso = datetime.now(timezone.utc).isoformat()
+    with _write_conn() as conn:
+        for item_id, title, start, end in batch:
+            event_id, exc = results.get(item_id, (None, None))
+            if exc is not None:
+                err_text, err_transient = _calendar_error_info(exc)
+            else:
+                err_text, err_transient = "", True
+            if event_id is None and _calendar_not_configured_reason() is not None:
+                not_configured.append(item_id)
                 continue
-            err_text = err_text or "calendar create failed"
-            logging.warning("event create failed for item %s err=%s", item_id, err_text[:200])
-            logging.warning("event create failed for item %s", item_id)
-            with _get_conn() as conn:
+            if not event_id:
+                if err_text and not err_transient:
+                    failed.append((item_id, err_text))
+                    continue
+                err_text = err_text or "calendar create failed"
+                logging.warning("event create failed for item %s err=%s", item_id, _Trunc(err_text))
+                logging.warning("event create failed for item %s", item_id)
                 conn.execute(
-                    """
-                    UPDATE items
-                    SET attempts = attempts + 1,
-                        last_error = ?,
-                        calendar_event_id = 'PENDING',
-                        updated_at = ?
-                    WHERE id = ?
-                    """,
-                    (err_text[:200], datetime.now(timezone.utc).isoformat(), item_id),
+                    _SQL_CAL_PENDING_ERROR,
+                    (err_text[:200], now_iso, item_id),
                 )
-                conn.commit()
-            logging.info("[%s] calendar_state after=%s", item_id, "PENDING")
-            continue
-        with _get_conn() as conn:
-            conn.execute(
-                """
-                UPDATE items
-                SET calendar_event_id = ?,
-                    calendar_ok_at = COALESCE(calendar_ok_at, ?),
-                    updated_at = ?
-                WHERE id = ? AND calendar_event_id = 'PENDING'
-                """,
-                (
-                    event_id,
-                    datetime.now(timezone.utc).isoformat(),
-                    datetime.now(timezone.utc).isoformat(),
-                    item_id,
-                ),
-            )
-            conn.commit()
-        logging.info("[%s] calendar_state after=%s", item_id, event_id)
-        _tg_notify_calendar_success(int(item_id))
+                logging.info("[%s] calendar_state after=%s", item_id, "PENDING")
+                _calendar_retry_later(item_id, 1)
+                continue
+            conn.execute(_SQL_CAL_PENDING_SUCCESS, (event_id, now_iso, item_id))
+            logging.info("[%s] calendar_state after=%s", item_id, event_id)
+            succeeded.append(item_id)
+        _record_calendar_sweep_failures(conn, not_configured, failed, now_iso)
+    _finish_calendar_sweep(not_configured, failed, succeeded)
+    return len(batch)
+
+
+def _record_calendar_sweep_failures(
+    conn: sqlite3.Connection,
+    not_configured: list[int],
+    failed: list[tuple[int, str]],
+    now_iso: str,
+) -> None:
+    # Same updates as _handle_calendar_not_configured/_mark_calendar_failed, but inside the
+    # sweep's result transaction instead of one commit per item.
+    conn.executemany(
+        _SQL_CAL_NOT_CONFIGURED,
+        [("calendar_not_configured", now_iso, item_id) for item_id in not_configured],
+    )
+    conn.executemany(
+        _SQL_CAL_MARK_FAILED,
+        [(CALENDAR_MAX_ATTEMPTS, err_text[:200], now_iso, item_id) for item_id, err_text in failed],
+    )
+
+
+def _finish_calendar_sweep(
+    not_configured: list[int],
+    failed: list[tuple[int, str]],
+    succeeded: list[int],
+) -> None:
+    # Runs after the sweep's result transaction is committed: notifications open their
+    # own connections.
+    for item_id in not_configured:
+        logging.info("[%s] calendar_state after=NOT_CONFIGURED", item_id)
+    for item_id, _err_text in failed:
+        logging.info("[%s] calendar_state after=FAILED", item_id)
+        _tg_notify_calendar_dead(item_id)
+    for item_id in succeeded:
+        _tg_notify_calendar_success(item_id)
 
 
 def _retry_pending_events() -> None:
-    with _get_conn() as conn:
+    due = _calendar_retry_due(20)
+    if due == []:
+        return
+    only_due = "" if due is None else f"AND id IN ({','.join('?' * len(due))})"
+    now_iso = datetime.now(timezone.utc).isoformat()
+    # One UPDATE ... RETURNING claims the whole sweep.
+    with _tx() as conn:
         rows = conn.execute(
-            """
-            SELECT id, title, start_at, end_at, attempts, parent_id, parent_id_int
-            FROM items
-            WHERE calendar_event_id = 'PENDING'
-              AND attempts < ?
-              AND status = 'active'
-              AND start_at IS NOT NULL
-              AND end_at IS NOT NULL
-              AND (source IS NULL OR source != 'canceled')
-            ORDER BY id ASC
-            LIMIT 20
-            """,
-            (MAX_ATTEMPTS,),
+            _SQL_CAL_RETRY_CLAIM.format(only_due=only_due),
+            (now_iso, MAX_ATTEMPTS, *(due or ()), 20),
         ).fetchall()
 
-    for row in rows:
-        row = as_dict(row)
-        item_id = row.get("id")
-        if item_id is None:
-            continue
-        if _get_parent_id_from_row(row) is not None:
-            continue
-        title = row.get("title") or ""
-        start_at = row.get("start_at")
-        end_at = row.get("end_at")
-        attempts = int(row.get("attempts") or 0)
-        logging.info("retry start item_id=%s attempts=%s", item_id, attempts)
+    batch: list[tuple[int, str, str, str]] = []
+    for item_id, title, start_at, end_at, attempts in sorted(rows, key=lambda r: r["id"]):
+        logging.info("retry start item_id=%s attempts=%s", item_id, int(attempts or 0) - 1)
         logging.info("[%s] calendar_state before=%s", item_id, "PENDING")
+        batch.append((int(item_id), title or "", str(start_at), str(end_at)))
 
-        try:
-            if not start_at or not end_at:
-                continue
-            start = datetime.fromisoformat(str(start_at))
-            end = datetime.fromisoformat(str(end_at))
-        except ValueError:
-            continue
-
-        claimed = False
-        with _get_conn() as conn:
-            conn.execute("BEGIN IMMEDIATE")
-            cur = conn.execute(
-                """
-                UPDATE items
-                SET attempts = attempts + 1,
-                    updated_at = ?,
-                    last_error = NULL
-                WHERE id = ?
-                  AND calendar_event_id = 'PENDING'
-                  AND attempts < ?
-                """,
-                (datetime.now(timezone.utc).isoformat(), item_id, MAX_ATTEMPTS),
-            )
-            claimed = cur.rowcount == 1
-            conn.commit()
-        if not claimed:
-            continue
-
-        try:
-            event_id = _create_event(title, start, end)
-        except Exception as exc:
-            event_id = None
-            err_text, err_transient = _calendar_error_info(exc)
-        else:
-            err_text, err_transient = "", True
-
-        if event_id is None and _CAL_NOT_CONFIGURED_REASON is not None:
-            _handle_calendar_not_configured(int(item_id))
-            continue
+    if not batch:
+        return
+    results = _create_events_batch(batch)
+    not_configured: list[int] = []
+    failed: list[tuple[int, str]] = []
+    succeeded: list[int] = []
+    success_updates: list[tuple[str, str, int]] = []
+    now_iso = datetime.now(timezone.utc).isoformat()
+    # One write transaction records the whole sweep's results.
+    with _write_conn() as conn:
+        for item_id, title, start, end in batch:
+            event_id, exc = results.get(item_id, (None, None))
+            if exc is not None:
+                err_text, err_transient = _calendar_error_info(exc)
+            else:
+                err_text, err_transient = "", True
 
-        if event_id:
-            with _get_conn() as conn:
-                conn.execute(
-                    """
-                    UPDATE items
-                    SET calendar_event_id = ?,
-                        last_error = NULL,
-                        updated_at = ?,
-                        calendar_ok_at = COALESCE(calendar_ok_at, ?)
-                    WHERE id = ? AND calendar_event_id = 'PENDING'
-                    """,
-                    (
-                        event_id,
-                        datetime.now(timezone.utc).isoformat(),
-                        datetime.now(timezone.utc).isoformat(),
-                        item_id,
-                    ),
-                )
-                conn.commit()
-            logging.info("retry success item_id=%s event_id=%s", item_id, event_id)
-            logging.info("[%s] calendar_state after=%s", item_id, event_id)
-            _tg_notify_calendar_success(int(item_id))
-            continue
+            if event_id is None and _calendar_not_configured_reason() is not None:
+                not_configured.append(item_id)
+                continue
 
-        if err_text and not err_transient:
-            _mark_calendar_failed(int(item_id), err_text)
-            continue
+            if event_id:
+                success_updates.append((event_id, now_iso, item_id))
+                logging.info("retry success item_id=%s event_id=%s", item_id, event_id)
+                logging.info("[%s] calendar_state after=%s", item_id, event_id)
+                succeeded.append(item_id)
+                continue
 
-        logging.warning("retry failed item_id=%s err=%s", item_id, (err_text or "calendar create failed")[:200])
-        with _get_conn() as conn:
-            conn.execute(
-                """
-                UPDATE items
-                SET last_error = ?,
-                    updated_at = ?
-                WHERE id = ? AND calendar_event_id = 'PENDING'
-                """,
-                ((err_text or "calendar create failed")[:200], datetime.now(timezone.utc).isoformat(), item_id),
-            )
-            conn.commit()
-        logging.info("[%s] calendar_state after=%s", item_id, "PENDING")
+            if err_text and not err_transient:
+                failed.append((item_id, err_text))
+                continue
 
-        with _get_conn() as conn:
+            logging.warning("retry failed item_id=%s err=%s", item_id, _Trunc(err_text or "calendar create failed"))
             row2 = conn.execute(
-                "SELECT attempts FROM items WHERE id = ?", (item_id,)
+                _SQL_CAL_RETRY_ERROR,
+                ((err_text or "calendar create failed")[:200], now_iso, MAX_ATTEMPTS, item_id),
             ).fetchone()
-            row2 = as_dict(row2) if row2 else None
-            if not row2:
+            if row2 is None:
                 continue
-            if int(row2.get("attempts") or 0) >= MAX_ATTEMPTS:
-                conn.execute(
-                    """
-                    UPDATE items
-                    SET calendar_event_id = 'FAILED',
-                        updated_at = ?
-                    WHERE id = ? AND calendar_event_id = 'PENDING'
-                    """,
-                    (datetime.now(timezone.utc).isoformat(), item_id),
-                )
-                conn.commit()
+            logging.info("[%s] calendar_state after=%s", item_id, row2["calendar_event_id"])
+            if row2["calendar_event_id"] == "FAILED":
                 logging.info("marked FAILED item_id=%s", item_id)
+            else:
+                _calendar_retry_later(item_id, int(row2["attempts"] or 0))
+        conn.executemany(_SQL_CAL_PENDING_SUCCESS, success_updates)
+        _record_calendar_sweep_failures(conn, not_configured, failed, now_iso)
+    _finish_calendar_sweep(not_configured, failed, succeeded)
 
 
 def main() -> None:
@@ -4673,11 +5236,26 @@ def main() -> None:
     if ASR_DT_SELF_CHECK:
         _selfcheck_asr_datetime()
 
+    # docker stop sends SIGTERM; turn it into SystemExit so the finally below closes the db.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        _main_loop()
+    finally:
+        # Let pool threads finish their claimed rows before the outbox and the db go away.
+        if _QUEUE_POOL is not None:
+            _QUEUE_POOL.shutdown(wait=True)
+        _tg_outbox_drain(TG_OUTBOX_DRAIN_SEC)
+        _close_db_conns()
+
+
+def _main_loop() -> None:
     last_heartbeat = 0.0
     last_requeue = 0.0
     last_reg_nudge = 0.0
     last_p5_tick = 0.0
+    idle_streak = 0
     while True:
+        busy = False
         try:
             _queue_reaper()
             now = time.time()
@@ -4690,7 +5268,7 @@ def main() -> None:
                 _p4_reg_nudge_tick()
                 last_reg_nudge = now
             if P5_TICK_INTERVAL_SEC > 0 and (now - last_p5_tick) >= P5_TICK_INTERVAL_SEC:
-                day_str = datetime.now(_local_tz()).date().isoformat()
+                day_str = datetime.now(_LOCAL_TZ).date().isoformat()
                 _p5_nudge_reset_if_new_day(day_str)
                 drift_count = _p5_drift_tick()
                 overload_count = _p5_overload_tick()
@@ -4700,12 +5278,17 @@ def main() -> None:
                     _P5_OVERLOAD_COUNT_TODAY += int(overload_count)
                 _p5_nudge_emit_if_needed(day_str)
                 last_p5_tick = now
-            row = _queue_claim()
-            if row:
-                _process_queue_item(row)
+            if WORKER_CONCURRENCY > 1:
+                busy = _queue_dispatch() > 0
             else:
-                time.sleep(B2_IDLE_SLEEP_SEC)
-            _process_items()
+                rows = _queue_claim_batch(B2_CLAIM_BATCH)
+                busy = bool(rows)
+                for row in rows:
+                    try:
+                        _process_queue_item(row)
+                    except Exception as exc:
+                        logging.exception("queue item error id=%s: %s", row.get("id"), exc)
+            busy = _process_items() > 0 or busy
             if CALENDAR_SYNC_MODE != "off":
                 _p3_calendar_create_tick()
                 if CALENDAR_SYNC_MODE == "full":
@@ -4716,12 +5299,20 @@ def main() -> None:
         now = time.time()
         if now - last_heartbeat >= WORKER_HEARTBEAT_SEC:
             try:
-                with open("/tmp/worker.ok", "w", encoding="utf-8") as marker:
-                    marker.write("ok\n")
+                try:
+                    os.utime("/tmp/worker.ok", None)
+                except FileNotFoundError:
+                    with open("/tmp/worker.ok", "w", encoding="utf-8") as marker:
+                        marker.write("ok\n")
             except Exception:
                 pass
             last_heartbeat = now
-        time.sleep(WORKER_INTERVAL_SEC)
+        idle_streak = 0 if busy else min(idle_streak + 1, 32)
+        delay = _worker_poll_delay(idle_streak)
+        try:
+            _worker_wait(delay)
+        except sqlite3.Error:
+            time.sleep(delay)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,14 @@
 import asyncio
+import contextlib
 
 from fastapi import FastAPI
+from loguru import logger
 
 from src.api.routes_google_oauth import router as google_oauth_router
 from src.api.routes_health import router as health_router
 from src.api.routes_asr import router as asr_router
 from src.config import settings
+from src.core.asr_client import aclose_client as close_asr_client
 from src.db.seed import seed_projects
 from src.db.session import get_session
 from src.google.scheduler import run_calendar_scheduler
@@ -19,27 +22,48 @@ app.include_router(google_oauth_router)
 app.include_router(asr_router)
 app.include_router(telegram_router)
 
-_scheduler_task: asyncio.Task | None = None
-_sync_task: asyncio.Task | None = None
+_BG_RESTART_DELAY_SEC = 30
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
+def _seed() -> None:
     with get_session() as session:
         seed_projects(session)
-    if settings.sync_in_enabled or settings.sync_out_enabled:
-        global _scheduler_task
-        if _scheduler_task is None or _scheduler_task.done():
-            _scheduler_task = asyncio.create_task(run_calendar_scheduler())
-    if not settings.dev_polling:
-        global _sync_task
-        if _sync_task is None or _sync_task.done():
-            _sync_task = asyncio.create_task(run_sync_loop())
+
+
+async def _supervised(name: str, loop_factory) -> None:
+    # A crash in one loop must neither cancel its TaskGroup siblings nor stop silently:
+    # log it and start the loop again after a pause.
+    while True:
+        try:
+            await loop_factory()
+            return
+        except Exception:
+            logger.exception("{} crashed; restarting in {}s", name, _BG_RESTART_DELAY_SEC)
+        await asyncio.sleep(_BG_RESTART_DELAY_SEC)
+
+
+async def _run_background() -> None:
+    # One supervised group: cancelling it on shutdown cancels and awaits every loop.
+    async with asyncio.TaskGroup() as tg:
+        if settings.sync_in_enabled or settings.sync_out_enabled:
+            tg.create_task(_supervised("calendar scheduler", run_calendar_scheduler))
+        if not settings.dev_polling:
+            tg.create_task(_supervised("sync loop", run_sync_loop))
+
+
+@app.on_event("startup")
+async def on_startup() -> None:
+    await asyncio.to_thread(_seed)
+    bg_tasks = getattr(app.state, "bg_tasks", None)
+    if bg_tasks is None or bg_tasks.done():
+        app.state.bg_tasks = asyncio.create_task(_run_background())
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
-    if _scheduler_task and not _scheduler_task.done():
-        _scheduler_task.cancel()
-    if _sync_task and not _sync_task.done():
-        _sync_task.cancel()
+    bg_tasks = getattr(app.state, "bg_tasks", None)
+    if bg_tasks and not bg_tasks.done():
+        bg_tasks.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await bg_tasks
+    await close_asr_client()
@@ -1,43 +1,63 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
 from uuid import uuid4
 
-from fastapi import APIRouter, UploadFile
+from fastapi import APIRouter, BackgroundTasks, UploadFile
 from loguru import logger
 
-from src.core.asr import convert_to_wav16k_mono, transcribe_wav
+from src.core.asr import convert_to_wav16k_mono_bytes, transcribe_wav_bytes
 
 router = APIRouter()
 
+_UPLOAD_CHUNK_SIZE = 1 << 16
+
+# Each decode runs ffmpeg and a CPU-bound whisper process; cap how many run at once and split
+# the cores between them so concurrent requests do not oversubscribe the CPU.
+_ASR_MAX_CONCURRENCY = max(1, int(os.getenv("ASR_MAX_CONCURRENCY", "2")))
+_ASR_SEM = asyncio.Semaphore(_ASR_MAX_CONCURRENCY)
+_WHISPER_THREADS = max(1, (os.cpu_count() or 1) // _ASR_MAX_CONCURRENCY)
+
+
+def _transcribe_file(path: str, out_base: str) -> str:
+    # ffmpeg's WAV goes straight into whisper's stdin; no intermediate .wav file.
+    return transcribe_wav_bytes(convert_to_wav16k_mono_bytes(path), out_base, _WHISPER_THREADS)
 
-@router.post("/asr/telegram")
-async def asr_telegram(file: UploadFile) -> dict:
-    data = await file.read()
-    size = len(data)
-    logger.info("ASR file_bytes={}", size)
 
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+@router.post("/asr/telegram")
+async def asr_telegram(file: UploadFile, background_tasks: BackgroundTasks) -> dict:
     ext = Path(file.filename or "").suffix or ".ogg"
     tmp_dir = Path("data/cache/voice/tmp")
     tmp_dir.mkdir(parents=True, exist_ok=True)
     uid = uuid4().hex
     ogg_path = tmp_dir / f"{uid}{ext}"
-    wav_path = tmp_dir / f"{uid}.wav"
 
     try:
-        ogg_path.write_bytes(data)
-        convert_to_wav16k_mono(str(ogg_path), str(wav_path))
-        text = transcribe_wav(str(wav_path))
+        # Copy the upload to disk in chunks instead of holding the whole voice in memory.
+        size = 0
+        with ogg_path.open("wb") as dst:
+            while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                dst.write(chunk)
+                size += len(chunk)
+        logger.info("ASR file_bytes={}", size)
+        # ffmpeg and whisper block for the whole decode; run them off the event loop.
+        async with _ASR_SEM:
+            text = await asyncio.to_thread(_transcribe_file, str(ogg_path), str(tmp_dir / uid))
         logger.info("ASR text_head={}", text[:50])
     except Exception as exc:
         logger.error("ASR failed: {}", exc)
         text = ""
     finally:
-        for path in (ogg_path, wav_path):
-            try:
-                path.unlink(missing_ok=True)
-            except OSError:
-                pass
+        # Removed after the response is sent.
+        background_tasks.add_task(_unlink_quietly, ogg_path)
 
     return {"text": text, "lang": "ru"}
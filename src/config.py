@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +8,7 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         extra="ignore",
+        frozen=True,
     )
 
     dev_polling: bool = True
@@ -37,4 +40,10 @@ class Settings(BaseSettings):
     backend_url: str = "http://127.0.0.1:8000"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # Read once per process; the model is frozen so callers can keep values in locals.
+    return Settings()
+
+
+settings = get_settings()
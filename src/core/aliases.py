@@ -3,13 +3,21 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Mapping
+from functools import cache
+from types import MappingProxyType
 from typing import Final
 
 
+def _reversed(mapping: Mapping[str, str]) -> Mapping[str, str]:
+    # Обратные маппинги (русский -> алиас) строятся лениво, при первом обращении.
+    return MappingProxyType({v: k for k, v in mapping.items()})
+
+
 # =========================
 # Статусы задач
 # =========================
-TASK_STATUS_LABELS: Final[dict[str, str]] = {
+TASK_STATUS_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     "inbox": "Неразобранная",
     "planned": "Запланирована",
     "in_progress": "В работе",
@@ -19,16 +27,19 @@ TASK_STATUS_LABELS: Final[dict[str, str]] = {
     "done": "Завершена",
     "canceled": "Отменена",
     "cancelled": "Отменена",
-}
+})
+
 
 # (опционально) обратное преобразование: русский -> алиас
-TASK_STATUS_ALIASES: Final[dict[str, str]] = {v: k for k, v in TASK_STATUS_LABELS.items()}
+@cache
+def task_status_aliases() -> Mapping[str, str]:
+    return _reversed(TASK_STATUS_LABELS)
 
 
 # =========================
 # Типы действий (PendingAction / domain actions)
 # =========================
-ACTION_LABELS: Final[dict[str, str]] = {
+ACTION_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     "CREATE_TASK": "Создание задачи",
     "PROCESS_TASK": "Разбор задачи",
     "UPDATE_TASK": "Изменение задачи",
@@ -39,15 +50,18 @@ ACTION_LABELS: Final[dict[str, str]] = {
     "SHOW_INBOX_TASKS": "Показать неразобранные задачи",
     "SHOW_TODAY": "Показать на сегодня",
     "SHOW_WEEK": "Показать на неделю",
-}
+})
+
 
-ACTION_ALIASES: Final[dict[str, str]] = {v: k for k, v in ACTION_LABELS.items()}
+@cache
+def action_aliases() -> Mapping[str, str]:
+    return _reversed(ACTION_LABELS)
 
 
 # =========================
 # Стадии диалога (PendingAction.stage)
 # =========================
-STAGE_LABELS: Final[dict[str, str]] = {
+STAGE_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     "menu": "Что сделать дальше",
     "awaiting_date": "Ожидаю дату",
     "awaiting_time": "Ожидаю время",
@@ -55,15 +69,18 @@ STAGE_LABELS: Final[dict[str, str]] = {
     "awaiting_title": "Изменение названия",
     "preview": "Предпросмотр изменений",
     "confirm": "Подтверждение",
-}
+})
 
-STAGE_ALIASES: Final[dict[str, str]] = {v: k for k, v in STAGE_LABELS.items()}
+
+@cache
+def stage_aliases() -> Mapping[str, str]:
+    return _reversed(STAGE_LABELS)
 
 
 # =========================
 # Интенты NLU (если нужно выводить пользователю)
 # =========================
-INTENT_LABELS: Final[dict[str, str]] = {
+INTENT_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     "CREATE_MEETING": "Создать встречу",
     "MOVE_MEETING": "Перенести встречу",
     "CREATE_TASK": "Создать задачу",
@@ -72,15 +89,18 @@ INTENT_LABELS: Final[dict[str, str]] = {
     "STOP_WORK": "Остановить работу",
     "EXPORT": "Экспорт",
     "NONE": "Не распознано",
-}
+})
+
 
-INTENT_ALIASES: Final[dict[str, str]] = {v: k for k, v in INTENT_LABELS.items()}
+@cache
+def intent_aliases() -> Mapping[str, str]:
+    return _reversed(INTENT_LABELS)
 
 
 # =========================
 # Тексты кнопок (Inline/Reply)
 # =========================
-BUTTON_LABELS: Final[dict[str, str]] = {
+BUTTON_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     "BTN_CONFIRM": "✅ Верно",
     "BTN_CHANGE": "✏️ Изменить",
     "BTN_CANCEL": "❌ Отменить",
@@ -98,16 +118,19 @@ BUTTON_LABELS: Final[dict[str, str]] = {
     "BTN_RESCHEDULE": "Перепланировать",
     "BTN_SHOW_MORE": "Показать ещё",
     "BTN_BACK": "⬅️ Назад",
-}
+})
+
 
 # Важно: тексты кнопок уникальны -> можно сделать обратный маппинг при необходимости
-BUTTON_ALIASES: Final[dict[str, str]] = {v: k for k, v in BUTTON_LABELS.items()}
+@cache
+def button_aliases() -> Mapping[str, str]:
+    return _reversed(BUTTON_LABELS)
 
 
 # =========================
 # Подписи полей (для preview/форм/таблиц)
 # =========================
-FIELD_LABELS: Final[dict[str, str]] = {
+FIELD_LABELS: Final[Mapping[str, str]] = MappingProxyType({
     # общие
     "title": "Название",
     "status": "Статус",
@@ -137,67 +160,71 @@ FIELD_LABELS: Final[dict[str, str]] = {
     "duration": "Длительность",
     "calendar": "Календарь",
     "location": "Место",
-}
+})
 
-FIELD_ALIASES: Final[dict[str, str]] = {v: k for k, v in FIELD_LABELS.items()}
+
+@cache
+def field_aliases() -> Mapping[str, str]:
+    return _reversed(FIELD_LABELS)
 
 
 # =========================
 # Колонки таблиц Google Sheets / Excel (отображаемые названия)
 # =========================
-SHEET_COLUMNS_TASKS: Final[list[str]] = [
-    "ID задачи",
-    "Название",
-    "Статус",
-    "Дата",
-    "Время",
-    "Проект",
-    "Источник",
-    "Создана",
-    "Обновлена",
-]
-
-SHEET_COLUMNS_MEETINGS: Final[list[str]] = [
-    "ID встречи",
-    "Название",
-    "Дата",
-    "Начало",
-    "Окончание",
-    "Длительность",
-    "Статус",
-    "Календарь",
-]
+# Собираются из FIELD_LABELS один раз при импорте, чтобы заголовки не расходились с подписями полей.
+SHEET_COLUMNS_TASKS: Final[tuple[str, ...]] = tuple(
+    FIELD_LABELS[key]
+    for key in (
+        "task_id",
+        "title",
+        "status",
+        "due_date",
+        "due_time",
+        "project",
+        "source",
+        "created_at",
+        "updated_at",
+    )
+)
+
+SHEET_COLUMNS_MEETINGS: Final[tuple[str, ...]] = tuple(
+    FIELD_LABELS[key]
+    for key in (
+        "event_id",
+        "title",
+        "date",
+        "start_time",
+        "end_time",
+        "duration",
+        "status",
+        "calendar",
+    )
+)
 
 
 # =========================
 # Утилиты безопасного получения русских лейблов
 # =========================
-def label(mapping: dict[str, str], key: str, default: str | None = None) -> str:
+def label(mapping: Mapping[str, str], key: str, default: str | None = None) -> str:
     """Безопасно получить русский лейбл по алиасу."""
     if not key:
         return default or ""
     return mapping.get(key, default or key)
 
 
-def task_status_ru(status_alias: str) -> str:
-    return label(TASK_STATUS_LABELS, status_alias)
-
-
-def action_ru(action_alias: str) -> str:
-    return label(ACTION_LABELS, action_alias)
-
-
-def intent_ru(intent_alias: str) -> str:
-    return label(INTENT_LABELS, intent_alias)
-
-
-def stage_ru(stage_alias: str) -> str:
-    return label(STAGE_LABELS, stage_alias)
+def _labeller(mapping: Mapping[str, str]) -> Callable[[str], str]:
+    """То же, что label(mapping, alias), но без лишнего вызова на каждую строку таблицы/списка."""
+    get = mapping.get
 
+    def ru(alias: str) -> str:
+        return get(alias, alias) if alias else ""
 
-def button_ru(btn_alias: str) -> str:
-    return label(BUTTON_LABELS, btn_alias)
+    return ru
 
 
-def field_ru(field_alias: str) -> str:
-    return label(FIELD_LABELS, field_alias)
+task_status_ru = _labeller(TASK_STATUS_LABELS)
+action_ru = _labeller(ACTION_LABELS)
+intent_ru = _labeller(INTENT_LABELS)
+stage_ru = _labeller(STAGE_LABELS)
+button_ru = _labeller(BUTTON_LABELS)
+field_ru = _labeller(FIELD_LABELS)
@@ -5,9 +5,9 @@ import subprocess
 from pathlib import Path
 
 
-def convert_to_wav16k_mono(input_path: str, wav_path: str) -> None:
+def _ffmpeg_command(input_path: str, output: str) -> list[str]:
     ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
-    command = [
+    return [
         ffmpeg_bin,
         "-y",
         "-i",
@@ -18,33 +18,42 @@ def convert_to_wav16k_mono(input_path: str, wav_path: str) -> None:
         "16000",
         "-c:a",
         "pcm_s16le",
-        wav_path,
+        "-f",
+        "wav",
+        output,
     ]
-    subprocess.run(command, check=True, capture_output=True)
 
 
-def transcribe_wav(wav_path: str) -> str:
+def convert_to_wav16k_mono(input_path: str, wav_path: str) -> None:
+    subprocess.run(_ffmpeg_command(input_path, wav_path), check=True, capture_output=True)
+
+
+def convert_to_wav16k_mono_bytes(input_path: str) -> bytes:
+    return subprocess.run(_ffmpeg_command(input_path, "pipe:1"), check=True, capture_output=True).stdout
+
+
+def _run_whisper(audio_arg: str, out_base: Path, audio: bytes | None = None, threads: int | None = None) -> str:
     whisper_bin = os.getenv("ASR_WHISPER_BIN")
     model_path = os.getenv("ASR_MODEL_PATH")
     if not whisper_bin or not model_path:
         return ""
 
-    wav = Path(wav_path)
-    out_base = wav.with_suffix("")
     command = [
         whisper_bin,
         "-m",
         model_path,
         "-f",
-        str(wav),
+        audio_arg,
         "-l",
         "ru",
         "-otxt",
         "-of",
         str(out_base),
     ]
+    if threads:
+        command += ["-t", str(threads)]
     try:
-        subprocess.run(command, check=True, capture_output=True)
+        subprocess.run(command, input=audio, check=True, capture_output=True)
     except subprocess.SubprocessError:
         return ""
 
@@ -60,3 +69,13 @@ def transcribe_wav(wav_path: str) -> str:
             pass
 
     return text
+
+
+def transcribe_wav(wav_path: str) -> str:
+    wav = Path(wav_path)
+    return _run_whisper(str(wav), wav.with_suffix(""))
+
+
+def transcribe_wav_bytes(wav: bytes, out_base: str, threads: int | None = None) -> str:
+    # whisper.cpp reads the audio from stdin with "-f -"; only the .txt result touches disk.
+    return _run_whisper("-", Path(out_base), wav, threads)
@@ -6,6 +6,27 @@ from loguru import logger
 from src.core.asr_config import load_asr_config
 
 
+_CLIENT: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # One keep-alive pool for every ASR call; the timeout is set per request.
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            trust_env=False,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        )
+    return _CLIENT
+
+
+async def aclose_client() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
 async def asr_transcribe(
     ogg_bytes: bytes,
     filename: str = "voice.ogg",
@@ -34,12 +55,12 @@ async def asr_transcribe(
         len(asr_api_key),
     )
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(timeout), trust_env=False) as client:
-            response = await client.post(
-                request_url,
-                headers={"X-API-KEY": asr_api_key},
-                files={"file": (filename, ogg_bytes, "audio/ogg")},
-            )
+        response = await _get_client().post(
+            request_url,
+            headers={"X-API-KEY": asr_api_key},
+            files={"file": (filename, ogg_bytes, "audio/ogg")},
+            timeout=httpx.Timeout(timeout),
+        )
     except httpx.RequestError as exc:
         logger.warning("ASR request failed: {}", exc)
         return ""
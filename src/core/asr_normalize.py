@@ -3,23 +3,23 @@ from __future__ import annotations
 import re
 
 
-_AFTER_TOMORROW_RE = re.compile(r"\bпосле\s+завтра\b", flags=re.IGNORECASE)
-_TIME_HOURS_MIN_RE = re.compile(
-    r"\bв\s+(\d{1,2})\s*час(?:а|ов)?\s+(\d{1,2})\s*мин(?:ут|)\b",
+# Все замены — одна альтернатива за один проход; в каждой позиции побеждает первая подошедшая
+# ветка, в том же порядке, в каком раньше шли отдельные re.sub.
+_NORMALIZE_RE = re.compile(
+    r"(?P<aft>\bпосле\s+завтра\b)"
+    r"|(?P<hm>\bв\s+(?P<hm_h>\d{1,2})\s*час(?:а|ов)?\s+(?P<hm_m>\d{1,2})\s*мин(?:ут|)\b)"
+    r"|(?P<h>\bв\s+(?P<h_h>\d{1,2})\s*час(?:а|ов)?\b)"
+    r"|(?P<col>\bв\s+(?P<col_h>\d{1,2})\s*[:.]\s*(?P<col_m>\d{2})\b)"
+    r"|(?P<sp>\bв\s+(?P<sp_h>\d{1,2})\s+(?P<sp_m>\d{2})\b)"
+    r"|(?P<bsep>\b(?P<bsep_h>[01]?\d|2[0-3])\s*(?P<bsep_sep>[.\-])\s*(?P<bsep_m>[0-5]\d)\b)"
+    r"|(?P<bsp>\b(?P<bsp_h>[01]?\d|2[0-3])\s+(?P<bsp_m>[0-5]\d)\b)",
     flags=re.IGNORECASE,
 )
-_TIME_HOURS_RE = re.compile(
-    r"\bв\s+(\d{1,2})\s*час(?:а|ов)?\b",
-    flags=re.IGNORECASE,
-)
-_TIME_COLON_RE = re.compile(r"\bв\s+(\d{1,2})\s*[:.]\s*(\d{2})\b", flags=re.IGNORECASE)
-_TIME_SPACE_RE = re.compile(r"\bв\s+(\d{1,2})\s+(\d{2})\b", flags=re.IGNORECASE)
-_TIME_BARE_SEP_RE = re.compile(r"\b([01]?\d|2[0-3])\s*([.\-])\s*([0-5]\d)\b")
-_TIME_BARE_SPACE_RE = re.compile(r"\b([01]?\d|2[0-3])\s+([0-5]\d)\b")
 _TIME_CONTEXT_RE = re.compile(
     r"\b(встреча|митинг|созвон|созвониться|совещание|перенеси|сдвинь|создай|запланируй)\b",
     flags=re.IGNORECASE,
 )
+_WS_RE = re.compile(r"\s+")
 
 
 def _format_time(hour: str, minute: str) -> str | None:
@@ -46,57 +46,23 @@ def normalize_asr_text(text: str) -> str:
     if not text:
         return ""
 
-    normalized = _AFTER_TOMORROW_RE.sub("послезавтра", text)
-
-    def _replace_hours_min(match: re.Match[str]) -> str:
-        formatted = _format_time(match.group(1), match.group(2))
-        if not formatted:
-            return match.group(0)
-        return formatted
-
-    normalized = _TIME_HOURS_MIN_RE.sub(_replace_hours_min, normalized)
-
-    def _replace_hours(match: re.Match[str]) -> str:
-        formatted = _format_time(match.group(1), "00")
-        if not formatted:
-            return match.group(0)
-        return formatted
-
-    normalized = _TIME_HOURS_RE.sub(_replace_hours, normalized)
-
-    def _replace_colon(match: re.Match[str]) -> str:
-        formatted = _format_time(match.group(1), match.group(2))
-        if not formatted:
-            return match.group(0)
-        return formatted
-
-    normalized = _TIME_COLON_RE.sub(_replace_colon, normalized)
-    normalized = _TIME_SPACE_RE.sub(_replace_colon, normalized)
-
-    def _replace_bare_sep(match: re.Match[str]) -> str:
-        hour = match.group(1)
-        sep = match.group(2)
-        minute = match.group(3)
-        formatted = _format_time(hour, minute)
-        if not formatted:
-            return match.group(0)
-        if sep == ".":
-            try:
-                minute_value = int(minute)
-            except ValueError:
-                minute_value = 99
-            if minute_value <= 12 and not _TIME_CONTEXT_RE.search(normalized):
+    # Контекстные слова замены не трогают, поэтому достаточно одной проверки на весь текст.
+    has_context = _TIME_CONTEXT_RE.search(text) is not None
+
+    def _replace(match: re.Match[str]) -> str:
+        kind = match.lastgroup
+        if kind == "aft":
+            return "послезавтра"
+        if kind == "h":
+            formatted = _format_time(match.group("h_h"), "00")
+        elif kind == "bsep":
+            minute = match.group("bsep_m")
+            # '3.05' без слова-контекста скорее дата, чем время.
+            if match.group("bsep_sep") == "." and int(minute) <= 12 and not has_context:
                 return match.group(0)
-        return formatted
-
-    def _replace_bare_space(match: re.Match[str]) -> str:
-        formatted = _format_time(match.group(1), match.group(2))
-        if not formatted:
-            return match.group(0)
-        return formatted
-
-    normalized = _TIME_BARE_SEP_RE.sub(_replace_bare_sep, normalized)
-    normalized = _TIME_BARE_SPACE_RE.sub(_replace_bare_space, normalized)
+            formatted = _format_time(match.group("bsep_h"), minute)
+        else:
+            formatted = _format_time(match.group(f"{kind}_h"), match.group(f"{kind}_m"))
+        return formatted or match.group(0)
 
-    normalized = " ".join(normalized.split())
-    return normalized
+    return _WS_RE.sub(" ", _NORMALIZE_RE.sub(_replace, text)).strip()
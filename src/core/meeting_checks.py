@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from datetime import date as date_type
 from datetime import datetime, time, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 from sqlalchemy import select
@@ -69,19 +71,12 @@ def has_time_conflict(
     return bool(conflicts), conflicts
 
 
-def _tokenize(text: str) -> set[str]:
-    parts = []
-    current = []
-    for ch in text.lower():
-        if ch.isalnum():
-            current.append(ch)
-        else:
-            if current:
-                parts.append("".join(current))
-                current = []
-    if current:
-        parts.append("".join(current))
-    return {p for p in parts if len(p) >= 3}
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=4096)
+def _tokenize(text: str) -> frozenset[str]:
+    return frozenset(p for p in _TOKEN_RE.findall(text.lower()) if len(p) >= 3)
 
 
 def find_similar_title(candidate_title: str, events: list[Event]) -> tuple[Event | None, float]:
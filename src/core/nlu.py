@@ -53,6 +53,43 @@ MEETING_WORDS = [
     "совещание",
 ]
 
+# Ключевые слова интентов в порядке приоритета диспетчеризации.
+_INTENT_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("meeting", (*MEETING_WORDS, "создай встречу", "запланируй встречу")),
+    ("move", ("перенеси", "сдвинь")),
+    (
+        "inbox",
+        (
+            "покажи неразобранные",
+            "покажи входящие",
+            "inbox",
+            "задачи без даты",
+            "входящие задачи",
+            "неразобранные задачи",
+        ),
+    ),
+    ("task", ("добавь задачу", "задача")),
+    ("plan", ("план",)),
+    ("start", ("начал", "старт")),
+    ("stop", ("закончил", "стоп")),
+    ("export", ("экспорт", "таблица", "excel")),
+)
+# Один проход по тексту: lookahead нулевой ширины проверяет каждую позицию,
+# lastgroup даёт id сработавшего интента (как multi-pattern сканер).
+_INTENT_SCAN_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{name}>{'|'.join(re.escape(k) for k in sorted(words, key=len, reverse=True))})"
+        for name, words in _INTENT_KEYWORDS
+    )
+    + "))"
+)
+_PLAN_MINUTES_RE = re.compile(r"\bплан(?:\s+на)?\s+(\d{1,4})\b")
+
+
+def _scan_intents(lowered: str) -> set[str]:
+    return {m.lastgroup for m in _INTENT_SCAN_RE.finditer(lowered) if m.lastgroup}
+
 
 def _strip_keywords(text: str, keywords: list[str]) -> str:
     lowered = text.lower()
@@ -153,10 +190,11 @@ def parse_intent(text: str) -> ParsedIntent:
         return ParsedIntent(Intent.NONE, 0.0, {}, raw)
 
     lowered = stripped.lower()
+    hits = _scan_intents(lowered)
+    if not hits:
+        return ParsedIntent(Intent.NONE, 0.0, {}, raw)
 
-    if any(w in lowered for w in MEETING_WORDS) or any(
-        k in lowered for k in ["создай встречу", "запланируй встречу"]
-    ):
+    if "meeting" in hits:
         date, time = _extract_date_time(stripped)
         duration = _extract_duration_minutes(stripped)
         title = _strip_meeting_title(
@@ -177,7 +215,7 @@ def parse_intent(text: str) -> ParsedIntent:
             raw,
         )
 
-    if any(k in lowered for k in ["перенеси", "сдвинь"]):
+    if "move" in hits:
         date, time = _extract_date_time(stripped)
         target = _extract_move_target(stripped)
         if date and time and target:
@@ -194,27 +232,17 @@ def parse_intent(text: str) -> ParsedIntent:
             raw,
         )
 
-    if any(
-        k in lowered
-        for k in [
-            "покажи неразобранные",
-            "покажи входящие",
-            "inbox",
-            "задачи без даты",
-            "входящие задачи",
-            "неразобранные задачи",
-        ]
-    ):
+    if "inbox" in hits:
         return ParsedIntent(Intent.SHOW_INBOX_TASKS, 0.9, {}, raw)
 
-    if any(k in lowered for k in ["добавь задачу", "задача"]):
+    if "task" in hits:
         title = _strip_keywords(stripped, ["добавь задачу", "задача"]).strip()
         if title:
             return ParsedIntent(Intent.CREATE_TASK, 0.9, {"title": title}, raw)
         return ParsedIntent(Intent.CREATE_TASK, 0.6, {"title": title}, raw)
 
-    if "план" in lowered:
-        minutes_match = re.search(r"\bплан(?:\s+на)?\s+(\d{1,4})\b", lowered)
+    if "plan" in hits:
+        minutes_match = _PLAN_MINUTES_RE.search(lowered)
         minutes = int(minutes_match.group(1)) if minutes_match else None
         target = _strip_keywords(stripped, ["план", "на"]).strip()
         if minutes is not None:
@@ -223,17 +251,17 @@ def parse_intent(text: str) -> ParsedIntent:
             return ParsedIntent(Intent.PLAN_TASK, 0.9, {"minutes": minutes, "target": target}, raw)
         return ParsedIntent(Intent.PLAN_TASK, 0.6, {"minutes": minutes, "target": target}, raw)
 
-    if any(k in lowered for k in ["начал", "старт"]):
+    if "start" in hits:
         target = _strip_keywords(stripped, ["начал", "старт"]).strip()
         confidence = 0.9 if target else 0.6
         return ParsedIntent(Intent.START_WORK, confidence, {"target": target}, raw)
 
-    if any(k in lowered for k in ["закончил", "стоп"]):
+    if "stop" in hits:
         target = _strip_keywords(stripped, ["закончил", "стоп"]).strip()
         confidence = 0.9 if target else 0.6
         return ParsedIntent(Intent.STOP_WORK, confidence, {"target": target}, raw)
 
-    if any(k in lowered for k in ["экспорт", "таблица", "excel"]):
+    if "export" in hits:
         return ParsedIntent(Intent.EXPORT, 0.9, {}, raw)
 
     return ParsedIntent(Intent.NONE, 0.0, {}, raw)
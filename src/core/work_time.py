@@ -6,7 +6,7 @@ from datetime import date, datetime, time, timedelta, timezone
 from typing import Iterable
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
 
 from src.config import settings
@@ -29,29 +29,36 @@ def _last_event(session: Session, item_id: str, event_type: str) -> ItemEvent |
         select(ItemEvent)
         .where(ItemEvent.item_id == item_id, ItemEvent.event_type == event_type)
         .order_by(ItemEvent.ts.desc())
+        .limit(1)
     )
 
 
-def get_active_work(session: Session) -> tuple[Item, datetime] | None:
-    events = session.scalars(
-        select(ItemEvent)
-        .where(ItemEvent.event_type.in_(("work_start", "work_stop")))
-        .order_by(ItemEvent.ts)
-    ).all()
+_WORK_EVENT_TYPES = ("work_start", "work_stop")
 
-    last_state: dict[str, tuple[str, datetime]] = {}
-    for event in events:
-        last_state[event.item_id] = (event.event_type, event.ts)
-
-    active = [(item_id, ts) for item_id, (etype, ts) in last_state.items() if etype == "work_start"]
-    if not active:
-        return None
 
-    item_id, start_ts = sorted(active, key=lambda v: v[1], reverse=True)[0]
-    item = session.get(Item, item_id)
-    if item is None:
+def get_active_work(session: Session) -> tuple[Item, datetime] | None:
+    latest = (
+        select(
+            ItemEvent.item_id,
+            ItemEvent.event_type,
+            ItemEvent.ts,
+            func.row_number()
+            .over(partition_by=ItemEvent.item_id, order_by=ItemEvent.ts.desc())
+            .label("rn"),
+        )
+        .where(ItemEvent.event_type.in_(_WORK_EVENT_TYPES))
+        .subquery()
+    )
+    row = session.execute(
+        select(Item, latest.c.ts)
+        .join(latest, latest.c.item_id == Item.id)
+        .where(latest.c.rn == 1, latest.c.event_type == "work_start")
+        .order_by(latest.c.ts.desc())
+        .limit(1)
+    ).first()
+    if row is None:
         return None
-    return item, start_ts
+    return row[0], row[1]
 
 
 def is_item_active(session: Session, item_id: str) -> tuple[bool, datetime | None]:
@@ -67,6 +74,7 @@ def is_item_active(session: Session, item_id: str) -> tuple[bool, datetime | Non
             ItemEvent.ts > start.ts,
         )
         .order_by(ItemEvent.ts.desc())
+        .limit(1)
     )
     if stop:
         return False, None
@@ -103,63 +111,68 @@ def calc_fact_for_day(session: Session, day: date, tz: ZoneInfo) -> dict:
     now = _as_aware_local(datetime.now(timezone.utc))
     now = now.astimezone(tz)
 
-    events = session.scalars(
-        select(ItemEvent)
-        .where(ItemEvent.event_type.in_(("work_start", "work_stop")))
-        .order_by(ItemEvent.ts)
+    # Границы окна для фильтра в SQL: ts хранится без смещения, поэтому берём
+    # запас в сутки, а точное пересечение считаем ниже в Python.
+    window_lo = start_day.replace(tzinfo=None) - timedelta(days=1)
+    window_hi = end_day.replace(tzinfo=None) + timedelta(days=1)
+    sessions = _work_sessions()
+    rows = session.execute(
+        select(
+            sessions.c.item_id,
+            sessions.c.start_ts,
+            sessions.c.stop_ts,
+            Item.title,
+            Project.name,
+        )
+        .join(Item, Item.id == sessions.c.item_id)
+        .outerjoin(Project, Project.id == Item.project_id)
+        .where(
+            or_(
+                sessions.c.stop_ts.is_(None),
+                and_(sessions.c.start_ts < window_hi, sessions.c.stop_ts > window_lo),
+            )
+        )
     ).all()
 
     seconds_by_item: dict[str, int] = {}
-    active_start: dict[str, datetime] = {}
-
-    for event in events:
-        ts = _as_aware_local(event.ts).astimezone(tz)
-        if event.event_type == "work_start":
-            if event.item_id not in active_start:
-                active_start[event.item_id] = ts
-        elif event.event_type == "work_stop":
-            start_ts = active_start.pop(event.item_id, None)
-            if start_ts:
-                seconds_by_item[event.item_id] = seconds_by_item.get(event.item_id, 0) + _overlap_seconds(
-                    start_ts, ts, start_day, end_day
-                )
-
-    active_info = None
-    for item_id, start_ts in active_start.items():
+    meta_by_item: dict[str, tuple[str, str]] = {}
+    active_row: tuple[str, str, datetime] | None = None
+    for item_id, start_raw, stop_raw, title, project_name in rows:
+        start_ts = _as_aware_local(start_raw).astimezone(tz)
+        if stop_raw is None:
+            stop_ts = now
+            if active_row is None or start_ts > active_row[2]:
+                active_row = (item_id, title, start_ts)
+        else:
+            stop_ts = _as_aware_local(stop_raw).astimezone(tz)
         seconds_by_item[item_id] = seconds_by_item.get(item_id, 0) + _overlap_seconds(
-            start_ts, now, start_day, end_day
+            start_ts, stop_ts, start_day, end_day
         )
+        meta_by_item[item_id] = (title, project_name or "")
 
-    if active_start:
-        item_id, start_ts = sorted(active_start.items(), key=lambda it: it[1], reverse=True)[0]
-        item = session.get(Item, item_id)
-        if item:
-            active_info = {
-                "id_short": item.id[:8],
-                "title": item.title,
-                "started_at": start_ts,
-                "elapsed_min": max(1, math.ceil((now - start_ts).total_seconds() / 60)),
-            }
-
-    items = session.scalars(select(Item).where(Item.id.in_(seconds_by_item.keys()))).all()
-    project_map = {
-        project.id: project.name for project in session.scalars(select(Project)).all()
-    }
+    active_info = None
+    if active_row is not None:
+        item_id, title, start_ts = active_row
+        active_info = {
+            "id_short": item_id[:8],
+            "title": title,
+            "started_at": start_ts,
+            "elapsed_min": max(1, math.ceil((now - start_ts).total_seconds() / 60)),
+        }
 
     by_project_sec: dict[str, int] = {}
     by_item = []
     total_sec = 0
-    for item in items:
-        sec = seconds_by_item.get(item.id, 0)
+    for item_id, sec in seconds_by_item.items():
         if sec <= 0:
             continue
+        title, project_name = meta_by_item[item_id]
         total_sec += sec
-        project_name = project_map.get(item.project_id or "", "")
         by_project_sec[project_name] = by_project_sec.get(project_name, 0) + sec
         by_item.append(
             {
-                "id_short": item.id[:8],
-                "title": item.title,
+                "id_short": item_id[:8],
+                "title": title,
                 "project": project_name,
                 "min": math.ceil(sec / 60),
             }
@@ -182,6 +195,42 @@ def calc_fact_for_day(session: Session, day: date, tz: ZoneInfo) -> dict:
     }
 
 
+def _work_sessions():
+    """Пары (start_ts, stop_ts) по задачам; stop_ts IS NULL — работа ещё идёт.
+
+    Повторный work_start при открытой сессии и work_stop без открытой
+    сессии не меняют состояние, поэтому такие события отбрасываются до
+    спаривания, а оставшиеся строго чередуются start/stop.
+    """
+    ordered = (
+        select(
+            ItemEvent.item_id,
+            ItemEvent.event_type,
+            ItemEvent.ts,
+            func.lag(ItemEvent.event_type)
+            .over(partition_by=ItemEvent.item_id, order_by=ItemEvent.ts)
+            .label("prev_type"),
+        )
+        .where(ItemEvent.event_type.in_(_WORK_EVENT_TYPES))
+        .subquery()
+    )
+    paired = (
+        select(
+            ordered.c.item_id,
+            ordered.c.event_type,
+            ordered.c.ts.label("start_ts"),
+            func.lead(ordered.c.ts, type_=ItemEvent.ts.type)
+            .over(partition_by=ordered.c.item_id, order_by=ordered.c.ts)
+            .label("stop_ts"),
+        )
+        .where(func.coalesce(ordered.c.prev_type, "work_stop") != ordered.c.event_type)
+        .subquery()
+    )
+    return select(paired.c.item_id, paired.c.start_ts, paired.c.stop_ts).where(
+        paired.c.event_type == "work_start"
+    ).subquery()
+
+
 def _overlap_seconds(start: datetime, stop: datetime, window_start: datetime, window_end: datetime) -> int:
     if stop < start:
         return 0
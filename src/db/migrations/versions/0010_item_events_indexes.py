@@ -0,0 +1,25 @@
+"""item_events work lookup indexes
+
+Revision ID: 0010_item_events_indexes
+Revises: 0009_items_tasks_subtasks
+Create Date: 2026-02-08 12:00:00.000000
+"""
+
+from alembic import op
+
+revision = "0010_item_events_indexes"
+down_revision = "0009_items_tasks_subtasks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_item_events_type_ts ON item_events(event_type, ts)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_item_events_item_type_ts ON item_events(item_id, event_type, ts)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_item_events_item_type_ts")
+    op.execute("DROP INDEX IF EXISTS ix_item_events_type_ts")
@@ -79,6 +79,10 @@ class Item(Base):
 
 class ItemEvent(Base):
     __tablename__ = "item_events"
+    __table_args__ = (
+        Index("ix_item_events_type_ts", "event_type", "ts"),
+        Index("ix_item_events_item_type_ts", "item_id", "event_type", "ts"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     item_id: Mapped[str] = mapped_column(ForeignKey("items.id"), nullable=False, index=True)
@@ -28,14 +28,16 @@ async def run_calendar_scheduler() -> None:
     next_in = 0.0
     next_out = 0.0
     loop = asyncio.get_running_loop()
+    in_enabled = settings.sync_in_enabled
+    out_enabled = settings.sync_out_enabled
 
     while True:
         now = loop.time()
-        if settings.sync_in_enabled and now >= next_in:
+        if in_enabled and now >= next_in:
             next_in = now + in_interval
             await _run_pull()
 
-        if settings.sync_out_enabled and now >= next_out:
+        if out_enabled and now >= next_out:
             next_out = now + out_interval
             await _run_push()
 
@@ -73,32 +75,38 @@ async def _run_pull() -> None:
         logger.error("auto pull error: {}", exc)
 
 
-async def _run_push() -> None:
+def _push_dirty_meetings() -> dict[str, int]:
     stats = {"processed": 0, "created": 0, "updated": 0, "cancelled": 0, "errors": 0}
+    with get_session() as session:
+        items = list(
+            session.scalars(
+                select(Item)
+                .where(Item.type == "meeting", Item.sync_state == "dirty")
+            ).all()
+        )
+        for item in items:
+            stats["processed"] += 1
+            try:
+                before_event = item.event_id
+                before_status = item.status
+                sync_out_meeting(session, item.id)
+                if before_status == "canceled":
+                    stats["cancelled"] += 1
+                elif before_event:
+                    stats["updated"] += 1
+                else:
+                    stats["created"] += 1
+            except Exception:
+                stats["errors"] += 1
+    return stats
+
+
+async def _run_push() -> None:
     try:
         async with _lock:
             logger.info("auto push start")
-            with get_session() as session:
-                items = list(
-                    session.scalars(
-                        select(Item)
-                        .where(Item.type == "meeting", Item.sync_state == "dirty")
-                    ).all()
-                )
-                for item in items:
-                    stats["processed"] += 1
-                    try:
-                        before_event = item.event_id
-                        before_status = item.status
-                        sync_out_meeting(session, item.id)
-                        if before_status == "canceled":
-                            stats["cancelled"] += 1
-                        elif before_event:
-                            stats["updated"] += 1
-                        else:
-                            stats["created"] += 1
-                    except Exception:
-                        stats["errors"] += 1
+            # SQLite queries and Calendar API calls are blocking; keep them off the event loop.
+            stats = await asyncio.to_thread(_push_dirty_meetings)
             logger.info("auto push done stats={}", stats)
     except Exception as exc:
         logger.error("auto push error: {}", exc)
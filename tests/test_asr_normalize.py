@@ -0,0 +1,18 @@
+from src.core.asr_normalize import normalize_asr_text
+
+
+def test_normalize_asr_text_canonical_forms() -> None:
+    assert normalize_asr_text("встреча в 16 часов") == "встреча 16:00"
+    assert normalize_asr_text("в 16 час") == "16:00"
+    assert normalize_asr_text("в 16 часов 10 минут") == "16:10"
+    assert normalize_asr_text("в 9 30 созвон") == "9:30 созвон"
+    for text in ("18.30", "18 30", "18-30"):
+        assert normalize_asr_text(text) == "18:30"
+    assert normalize_asr_text("После  завтра\n") == "послезавтра"
+    assert normalize_asr_text("") == ""
+
+
+def test_normalize_asr_text_dotted_small_minutes_need_context() -> None:
+    assert normalize_asr_text("купить 3.05") == "купить 3.05"
+    assert normalize_asr_text("созвон 3.05") == "созвон 3:05"
+    assert normalize_asr_text("в 25 часов") == "в 25 часов"
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from src.core.meeting_checks import Event, _tokenize, find_similar_title
+
+
+def test_tokenize_splits_on_non_alnum_and_underscore() -> None:
+    assert _tokenize("Созвон с Петей_2 по API, ok") == frozenset({"созвон", "петей", "api"})
+    assert _tokenize("Созвон с Петей_2 по API, ok") is _tokenize("Созвон с Петей_2 по API, ok")
+
+
+def test_find_similar_title_scores_token_overlap() -> None:
+    start = datetime(2026, 2, 7, 10, 0)
+    events = [
+        Event("1", "обзор бюджета отдела", start, start + timedelta(hours=1)),
+        Event("2", "созвон с командой продаж", start, start + timedelta(hours=1)),
+    ]
+    event, score = find_similar_title("созвон команды продаж", events)
+    assert event is events[1]
+    assert score == 0.5
+    assert find_similar_title("созвон с командой", events) == (events[1], 1.0)
+    assert find_similar_title("", events) == (None, 0.0)
@@ -0,0 +1,15 @@
+from src.core.nlu import Intent, _scan_intents, parse_intent
+
+
+def test_scan_intents_reports_every_matching_keyword_group() -> None:
+    assert _scan_intents("встреча и задача, потом стоп") == {"meeting", "task", "stop"}
+    assert _scan_intents("купить молоко") == set()
+
+
+def test_parse_intent_keeps_dispatch_priority() -> None:
+    assert parse_intent("задача созвон завтра 10:00").intent is Intent.CREATE_MEETING
+    assert parse_intent("задачи без даты").intent is Intent.SHOW_INBOX_TASKS
+    assert parse_intent("запланируй встречу завтра в 10:00").intent is Intent.CREATE_MEETING
+    plan = parse_intent("план на 30 отчёт")
+    assert (plan.intent, plan.args) == (Intent.PLAN_TASK, {"minutes": 30, "target": "отчёт"})
+    assert parse_intent("купить молоко").intent is Intent.NONE
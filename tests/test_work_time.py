@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.db.models import Base, Item, ItemEvent, Project
+from src.core.work_time import calc_fact_for_day, get_active_work
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+
+def _event(item: Item, event_type: str, ts: datetime) -> ItemEvent:
+    return ItemEvent(item_id=item.id, event_type=event_type, ts=ts)
+
+
+def test_calc_fact_for_day_pairs_sessions_in_sql() -> None:
+    tz = ZoneInfo("Europe/Moscow")
+    day = datetime.now(tz).date() - timedelta(days=1)
+    noon = datetime(day.year, day.month, day.day, 12, 0)
+    with _session() as session:
+        project = Project(name="Работа")
+        session.add(project)
+        session.flush()
+        report = Item(title="отчёт", type="task", status="inbox", depth=0, project_id=project.id)
+        call = Item(title="звонок", type="task", status="inbox", depth=0)
+        session.add_all([report, call])
+        session.flush()
+        session.add_all(
+            [
+                _event(report, "work_stop", noon - timedelta(hours=3)),
+                _event(report, "work_start", noon),
+                _event(report, "work_start", noon + timedelta(minutes=10)),
+                _event(report, "work_stop", noon + timedelta(minutes=30)),
+                _event(call, "work_start", noon + timedelta(hours=1)),
+            ]
+        )
+        session.commit()
+
+        data = calc_fact_for_day(session, day, tz)
+        active = get_active_work(session)
+
+    assert {row["title"]: row["min"] for row in data["by_item"]} == {"отчёт": 30, "звонок": 660}
+    assert {row["project"]: row["min"] for row in data["by_project"]} == {"Работа": 30, "": 660}
+    assert data["active"]["title"] == "звонок"
+    assert active is not None and active[0].title == "звонок"
+
+
+def test_work_event_lookups_use_composite_indexes() -> None:
+    with _session() as session:
+        conn = session.connection().connection.driver_connection
+
+        def _plan(sql: str) -> str:
+            return " ".join(str(r[3]) for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+        assert "ix_item_events_item_type_ts" in _plan(
+            "SELECT ts FROM item_events WHERE item_id = 'a' AND event_type = 'work_start' ORDER BY ts DESC LIMIT 1"
+        )
+        assert "ix_item_events_type_ts" in _plan(
+            "SELECT item_id FROM item_events WHERE event_type IN ('work_start', 'work_stop') ORDER BY ts"
+        )
@@ -0,0 +1,497 @@
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKER_ROOT = ROOT / "organizer-worker"
+sys.path.append(str(WORKER_ROOT))
+
+import worker  # noqa: E402
+
+
+def _fake_google(monkeypatch, tmp_path) -> dict[str, int]:
+    calls = {"creds": 0, "build": 0}
+    sa_file = tmp_path / "sa.json"
+    sa_file.write_text("{}", encoding="utf-8")
+
+    def _from_file(path, scopes):
+        calls["creds"] += 1
+        return object()
+
+    def _build(name, version, cache_discovery, credentials=None, http=None):
+        calls["build"] += 1
+        calls["http"] = http
+        return object()
+
+    fakes = {
+        "google.oauth2.service_account": SimpleNamespace(
+            Credentials=SimpleNamespace(from_service_account_file=_from_file)
+        ),
+        "googleapiclient.discovery": SimpleNamespace(build=_build),
+    }
+    real_import = worker.importlib.import_module
+    monkeypatch.setattr(worker.importlib, "import_module", lambda name: fakes.get(name) or real_import(name))
+    monkeypatch.setattr(worker, "GOOGLE_SERVICE_ACCOUNT_FILE", str(sa_file))
+    monkeypatch.setattr(worker, "GOOGLE_CALENDAR_ID", "cal@example.com")
+    monkeypatch.setattr(worker, "CALENDAR_DEBUG", False)
+    monkeypatch.setattr(worker, "_CAL_SERVICE_LOCAL", threading.local())
+    monkeypatch.setattr(worker, "_CAL_CREDS", None)
+    monkeypatch.setattr(worker, "_CAL_DISCOVERY_DOC", None)
+    monkeypatch.setattr(worker, "_CAL_CONFIG_STATE", (None, 0.0))
+    return calls
+
+
+def test_calendar_service_is_built_once_per_thread(monkeypatch, tmp_path) -> None:
+    calls = _fake_google(monkeypatch, tmp_path)
+
+    first = worker._get_calendar_service()
+    assert worker._get_calendar_service() is first
+
+    other: list = []
+    t = threading.Thread(target=lambda: other.append(worker._get_calendar_service()))
+    t.start()
+    t.join()
+
+    assert other[0] is not first
+    assert (calls["creds"], calls["build"]) == (1, 2)
+    assert worker._calendar_not_configured_reason() is None
+
+
+def test_calendar_service_reuses_static_discovery_doc(monkeypatch, tmp_path) -> None:
+    calls = _fake_google(monkeypatch, tmp_path)
+    docs: list[str] = []
+    discovery = worker.importlib.import_module("googleapiclient.discovery")
+    discovery.build_from_document = lambda doc, credentials=None, http=None: docs.append(doc) or object()
+    cache_reads = {"n": 0}
+
+    def _static_doc(name, version):
+        cache_reads["n"] += 1
+        return '{"name": "calendar"}'
+
+    fake_import = worker.importlib.import_module
+    cache_mod = SimpleNamespace(get_static_doc=_static_doc)
+    monkeypatch.setattr(
+        worker.importlib,
+        "import_module",
+        lambda name: cache_mod if name == "googleapiclient.discovery_cache" else fake_import(name),
+    )
+
+    worker._get_calendar_service()
+    t = threading.Thread(target=worker._get_calendar_service)
+    t.start()
+    t.join()
+
+    assert docs == ['{"name": "calendar"}'] * 2
+    assert cache_reads["n"] == 1
+    assert calls["build"] == 0
+
+
+def test_calendar_service_uses_keepalive_http_with_timeout(monkeypatch, tmp_path) -> None:
+    calls = _fake_google(monkeypatch, tmp_path)
+    monkeypatch.setattr(worker, "CALENDAR_HTTP_TIMEOUT_SEC", 12.0)
+    fakes = {
+        "httplib2": SimpleNamespace(Http=lambda timeout: SimpleNamespace(timeout=timeout)),
+        "google_auth_httplib2": SimpleNamespace(
+            AuthorizedHttp=lambda creds, http: SimpleNamespace(credentials=creds, http=http)
+        ),
+    }
+    fake_import = worker.importlib.import_module
+    monkeypatch.setattr(worker.importlib, "import_module", lambda name: fakes.get(name) or fake_import(name))
+
+    worker._get_calendar_service()
+
+    assert calls["http"].http.timeout == 12.0
+    assert calls["http"].credentials is worker._CAL_CREDS
+
+
+def test_calendar_not_configured_verdict_is_reused(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(worker, "GOOGLE_SERVICE_ACCOUNT_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(worker, "_CAL_SERVICE_LOCAL", threading.local())
+    monkeypatch.setattr(worker, "_CAL_CONFIG_STATE", (None, 0.0))
+    probes: list[str] = []
+    real_exists = worker.os.path.exists
+    monkeypatch.setattr(worker.os.path, "exists", lambda path: probes.append(path) or real_exists(path))
+
+    assert worker._get_calendar_service() is None
+    assert worker._get_calendar_service() is None
+    assert worker._calendar_not_configured_reason() == "missing_file"
+    assert len(probes) == 1
+
+    monkeypatch.setattr(worker, "CALENDAR_CONFIG_RECHECK_SEC", 0.0)
+    assert worker._get_calendar_service() is None
+    assert len(probes) == 2
+
+
+def test_calendar_not_configured_reason_is_per_thread(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(worker, "GOOGLE_SERVICE_ACCOUNT_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(worker, "_CAL_SERVICE_LOCAL", threading.local())
+    monkeypatch.setattr(worker, "_CAL_CONFIG_STATE", (None, 0.0))
+    service = object()
+    worker._CAL_SERVICE_LOCAL.service = service
+
+    assert worker._get_calendar_service() is service
+    seen: list = []
+    t = threading.Thread(
+        target=lambda: seen.append((worker._get_calendar_service(), worker._calendar_not_configured_reason()))
+    )
+    t.start()
+    t.join()
+
+    assert seen == [(None, "missing_file")]
+    assert worker._calendar_not_configured_reason() is None
+
+
+class _FakeBatch:
+    def __init__(self, callback, fail_ids: dict[str, int]) -> None:
+        self.callback = callback
+        self.fail_ids = fail_ids
+        self.requests: list[tuple[str, dict]] = []
+        self.executed = 0
+
+    def add(self, request: dict, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self.executed += 1
+        for request_id, _ in self.requests:
+            if self.fail_ids.get(request_id, 0) > 0:
+                self.fail_ids[request_id] -= 1
+                self.callback(request_id, None, TimeoutError("slow"))
+            else:
+                self.callback(request_id, {"id": f"ev{request_id}"}, None)
+
+
+class _FakeCalendar:
+    def __init__(self, fail_ids: set[str] = frozenset(), times: int = 1000) -> None:
+        self.fail_ids = {i: times for i in fail_ids}
+        self.batches: list[_FakeBatch] = []
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId: str, body: dict) -> dict:
+        return body
+
+    def new_batch_http_request(self, callback) -> _FakeBatch:
+        self.batches.append(_FakeBatch(callback, self.fail_ids))
+        return self.batches[-1]
+
+
+def _use_calendar(monkeypatch, service: _FakeCalendar) -> None:
+    monkeypatch.setattr(worker, "_get_calendar_service", lambda: service)
+    monkeypatch.setattr(worker, "_CAL_SERVICE_LOCAL", threading.local())
+    monkeypatch.setattr(worker, "_CAL_RETRY_HEAP", [])
+    monkeypatch.setattr(worker, "_CAL_RETRY_SCAN_AT", 0.0)
+
+
+def test_create_events_batch_reports_each_item(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "CALENDAR_RETRIES", 0)
+    service = _FakeCalendar(fail_ids={"2"})
+    _use_calendar(monkeypatch, service)
+    start = worker.datetime(2026, 2, 8, 10, 0, tzinfo=worker._local_tz())
+    end = start + worker.timedelta(minutes=30)
+
+    results = worker._create_events_batch([(1, "a", start, end), (2, "b", start, end)])
+
+    assert len(service.batches) == 1 and service.batches[0].executed == 1
+    assert results[1] == ("ev1", None)
+    assert results[2][0] is None and isinstance(results[2][1], TimeoutError)
+    assert service.batches[0].requests[0][1]["summary"] == "a"
+
+
+def test_create_events_batch_retries_transient_errors_with_backoff(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "CALENDAR_RETRIES", 2)
+    sleeps: list[tuple[int, float | None]] = []
+    monkeypatch.setattr(worker, "_calendar_backoff_sleep", lambda attempt, retry_after=None: sleeps.append((attempt, retry_after)))
+    service = _FakeCalendar(fail_ids={"2"}, times=1)
+    _use_calendar(monkeypatch, service)
+    start = worker.datetime(2026, 2, 8, 10, 0, tzinfo=worker._local_tz())
+    end = start + worker.timedelta(minutes=30)
+
+    results = worker._create_events_batch([(1, "a", start, end), (2, "b", start, end)])
+
+    assert results == {1: ("ev1", None), 2: ("ev2", None)}
+    assert [len(b.requests) for b in service.batches] == [2, 1]
+    assert sleeps == [(0, None)]
+
+
+def test_calendar_backoff_respects_retry_after(monkeypatch) -> None:
+    slept: list[float] = []
+    monkeypatch.setattr(worker.time, "sleep", slept.append)
+    monkeypatch.setattr(worker, "CALENDAR_RETRY_BASE_SEC", 0.5)
+    monkeypatch.setattr(worker, "CALENDAR_RETRY_MAX_SEC", 8.0)
+    exc = Exception("quota")
+    exc.resp = {"status": "429", "retry-after": "3"}
+
+    assert worker._calendar_retry_after(exc) == 3.0
+    worker._calendar_backoff_sleep(1, 3.0)
+    worker._calendar_backoff_sleep(10)
+
+    assert slept[0] == 3.0
+    assert 4.0 <= slept[1] <= 12.0
+
+
+def test_process_items_creates_events_in_one_batch(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    service = _FakeCalendar()
+    _use_calendar(monkeypatch, service)
+    monkeypatch.setattr(worker, "_tg_notify_calendar_success", lambda item_id: None)
+    with worker._get_conn() as conn:
+        ids = [
+            conn.execute("INSERT INTO items (title, status) VALUES (?, 'inbox')", (title,)).lastrowid
+            for title in ("встреча завтра в 10:00", "созвон завтра в 11:00")
+        ]
+        conn.commit()
+
+    worker._process_items()
+
+    assert len(service.batches) == 1
+    with worker._get_conn() as conn:
+        rows = conn.execute("SELECT id, calendar_event_id FROM items ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [(i, f"ev{i}") for i in ids]
+
+
+def test_retry_pending_events_claims_and_records_in_one_sweep(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    monkeypatch.setattr(worker, "CALENDAR_RETRIES", 0)
+    service = _FakeCalendar(fail_ids={"2"})
+    _use_calendar(monkeypatch, service)
+    notified: list[int] = []
+    monkeypatch.setattr(worker, "_tg_notify_calendar_success", notified.append)
+    with worker._get_conn() as conn:
+        for item_id in (1, 2, 3):
+            conn.execute(
+                """
+                INSERT INTO items (id, title, status, start_at, end_at, calendar_event_id, attempts)
+                VALUES (?, 't', 'active', '2026-02-08T10:00:00+03:00', '2026-02-08T10:30:00+03:00', 'PENDING', ?)
+                """,
+                (item_id, worker.MAX_ATTEMPTS if item_id == 3 else 0),
+            )
+        conn.commit()
+
+    worker._retry_pending_events()
+
+    assert len(service.batches) == 1 and len(service.batches[0].requests) == 2
+    assert service.batches[0].requests[0][1]["start"]["dateTime"] == "2026-02-08T10:00:00+03:00"
+    assert notified == [1]
+    with worker._get_conn() as conn:
+        rows = conn.execute("SELECT id, calendar_event_id, attempts FROM items ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [
+        (1, "ev1", 1),
+        (2, "FAILED" if worker.MAX_ATTEMPTS <= 1 else "PENDING", 1),
+        (3, "PENDING", worker.MAX_ATTEMPTS),
+    ]
+
+
+def test_retry_pending_events_fails_spent_items_in_one_update(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    monkeypatch.setattr(worker, "CALENDAR_RETRIES", 0)
+    monkeypatch.setattr(worker, "MAX_ATTEMPTS", 2)
+    _use_calendar(monkeypatch, _FakeCalendar(fail_ids={"1", "2"}))
+    with worker._get_conn() as conn:
+        for item_id, attempts in ((1, 0), (2, 1)):
+            conn.execute(
+                """
+                INSERT INTO items (id, title, status, start_at, end_at, calendar_event_id, attempts)
+                VALUES (?, 't', 'active', '2026-02-08T10:00:00+03:00', '2026-02-08T10:30:00+03:00', 'PENDING', ?)
+                """,
+                (item_id, attempts),
+            )
+        conn.commit()
+
+    worker._retry_pending_events()
+
+    with worker._get_conn() as conn:
+        rows = conn.execute("SELECT id, calendar_event_id, attempts, last_error FROM items ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [
+        (1, "PENDING", 1, "calendar_timeout"),
+        (2, "FAILED", 2, "calendar_timeout"),
+    ]
+
+
+def test_retry_pending_events_records_permanent_failures_with_the_sweep(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    forbidden = Exception("forbidden")
+    forbidden.resp = SimpleNamespace(status=403)
+    monkeypatch.setattr(
+        worker,
+        "_create_events_batch",
+        lambda batch: {1: ("ev1", None), 2: (None, forbidden), 3: (None, forbidden)},
+    )
+    monkeypatch.setattr(worker, "_calendar_retry_due", lambda limit: None)
+    monkeypatch.setattr(worker, "_CAL_SERVICE_LOCAL", threading.local())
+    monkeypatch.setattr(worker, "_mark_calendar_failed", lambda *a: (_ for _ in ()).throw(AssertionError))
+    dead: list[int] = []
+    monkeypatch.setattr(worker, "_tg_notify_calendar_dead", dead.append)
+    monkeypatch.setattr(worker, "_tg_notify_calendar_success", lambda item_id: None)
+    with worker._get_conn() as conn:
+        for item_id in (1, 2, 3):
+            conn.execute(
+                """
+                INSERT INTO items (id, title, status, start_at, end_at, calendar_event_id, attempts)
+                VALUES (?, 't', 'active', '2026-02-08T10:00:00+03:00', '2026-02-08T10:30:00+03:00', 'PENDING', 0)
+                """,
+                (item_id,),
+            )
+        conn.commit()
+
+    worker._retry_pending_events()
+
+    assert dead == [2, 3]
+    with worker._get_conn() as conn:
+        rows = conn.execute("SELECT id, calendar_event_id, last_error FROM items ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [
+        (1, "ev1", None),
+        (2, "FAILED", "calendar_http_403"),
+        (3, "FAILED", "calendar_http_403"),
+    ]
+
+
+def test_retry_pending_events_claim_skips_subtasks(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    monkeypatch.setattr(worker, "_calendar_retry_due", lambda limit: None)
+    batches: list[list] = []
+    monkeypatch.setattr(worker, "_create_events_batch", lambda batch: batches.append(batch) or {})
+    with worker._get_conn() as conn:
+        for item_id, parent in ((1, None), (2, 1)):
+            conn.execute(
+                """
+                INSERT INTO items (id, title, status, start_at, end_at, calendar_event_id, attempts, parent_id_int)
+                VALUES (?, 't', 'active', '2026-02-08T10:00:00+03:00', '2026-02-08T10:30:00+03:00', 'PENDING', 0, ?)
+                """,
+                (item_id, parent),
+            )
+        conn.commit()
+
+    worker._retry_pending_events()
+
+    assert [item[0] for item in batches[0]] == [1]
+    with worker._get_conn() as conn:
+        attempts = dict(conn.execute("SELECT id, attempts FROM items").fetchall())
+    assert attempts == {1: 1, 2: 0}
+
+
+def test_calendar_sweep_selects_use_partial_indexes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+
+    with worker._get_conn() as conn:
+        inbox_plan = " ".join(
+            r["detail"]
+            for r in conn.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT id, title FROM items
+                WHERE status = 'inbox'
+                  AND (start_at IS NULL OR start_at = '')
+                  AND (calendar_event_id IS NULL OR calendar_event_id = '')
+                ORDER BY id ASC LIMIT 20
+                """
+            )
+        )
+        retry_plan = " ".join(
+            r["detail"]
+            for r in conn.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT id FROM items
+                WHERE calendar_event_id = 'PENDING' AND attempts < 5 AND status = 'active'
+                ORDER BY id ASC LIMIT 20
+                """
+            )
+        )
+    assert "ix_items_inbox_unscheduled" in inbox_plan
+    assert "ix_items_pending_retry" in retry_plan
+
+
+def test_process_items_skips_titles_already_probed(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    _use_calendar(monkeypatch, _FakeCalendar())
+    monkeypatch.setattr(worker, "_tg_notify_calendar_success", lambda item_id: None)
+    probed: list[str] = []
+    real_extract = worker._extract_datetime
+    monkeypatch.setattr(worker, "_extract_datetime", lambda text: probed.append(text) or real_extract(text))
+    with worker._get_conn() as conn:
+        conn.execute("INSERT INTO items (id, title, status) VALUES (1, 'купить молоко', 'inbox')")
+        conn.commit()
+
+    worker._process_items()
+    worker._process_items()
+    assert probed == ["купить молоко"]
+
+    with worker._get_conn() as conn:
+        conn.execute("UPDATE items SET title = 'купить молоко завтра в 10:00' WHERE id = 1")
+        conn.commit()
+    worker._process_items()
+
+    assert probed[-1] == "купить молоко завтра в 10:00"
+    with worker._get_conn() as conn:
+        assert conn.execute("SELECT calendar_event_id FROM items WHERE id = 1").fetchone()[0] == "ev1"
+
+
+def test_retry_pending_events_waits_for_scheduled_retries(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+    monkeypatch.setattr(worker, "CALENDAR_RETRIES", 0)
+    monkeypatch.setattr(worker, "CALENDAR_RETRY_DELAY_SEC", 30.0)
+    service = _FakeCalendar(fail_ids={"1"}, times=1)
+    _use_calendar(monkeypatch, service)
+    monkeypatch.setattr(worker, "_tg_notify_calendar_success", lambda item_id: None)
+    with worker._get_conn() as conn:
+        conn.execute(
+            """
+            INSERT INTO items (id, title, status, start_at, end_at, calendar_event_id, attempts)
+            VALUES (1, 't', 'active', '2026-02-08T10:00:00+03:00', '2026-02-08T10:30:00+03:00', 'PENDING', 0)
+            """
+        )
+        conn.commit()
+
+    worker._retry_pending_events()
+    worker._retry_pending_events()
+    assert len(service.batches) == 1
+    due_at, item_id = worker._CAL_RETRY_HEAP[0]
+    assert item_id == 1 and due_at > worker.time.monotonic() + 20
+
+    worker._CAL_RETRY_HEAP[0] = (0.0, 1)
+    worker._retry_pending_events()
+
+    assert len(service.batches) == 2
+    with worker._get_conn() as conn:
+        assert conn.execute("SELECT calendar_event_id FROM items WHERE id = 1").fetchone()[0] == "ev1"
+
+
+def test_task_calendar_ticks_use_partial_indexes() -> None:
+    conn = sqlite3.connect(":memory:")
+    for path in sorted((ROOT / "migrations").glob("0[1-2][0-9]_*.sql")):
+        if 10 <= int(path.name.split("_", 1)[0]) <= 27:
+            conn.executescript(path.read_text(encoding="utf-8"))
+
+    def _plan(sql: str) -> str:
+        return " ".join(str(r[3]) for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+    assert "ix_tasks_planned_unsynced" in _plan(
+        "SELECT id FROM tasks WHERE state = 'PLANNED' AND planned_at IS NOT NULL"
+        " AND calendar_event_id IS NULL ORDER BY id ASC LIMIT 10"
+    )
+    cancel_plan = _plan(
+        "SELECT id FROM tasks WHERE state = 'CANCELLED' AND calendar_event_id IS NOT NULL"
+        " AND calendar_event_id != '' ORDER BY updated_at ASC LIMIT 3"
+    )
+    assert "ix_tasks_cancelled_synced" in cancel_plan and "TEMP B-TREE" not in cancel_plan
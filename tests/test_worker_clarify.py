@@ -0,0 +1,138 @@
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKER_ROOT = ROOT / "organizer-worker"
+sys.path.append(str(WORKER_ROOT))
+
+import worker  # noqa: E402
+
+
+def _item(item_id: int, ttl: float = 60) -> dict:
+    return {"item_id": item_id, "mode": "no_time", "expires_at": time.time() + ttl}
+
+
+def _init_worker_db(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+
+
+def _queued(chat_id: int) -> list[int]:
+    with worker._get_conn() as conn:
+        rows = conn.execute("SELECT item_json FROM clarify_queue WHERE chat_id=? ORDER BY id", (chat_id,)).fetchall()
+    return [worker._clarify_unpack(r["item_json"])["item_id"] for r in rows]
+
+
+def test_clarify_queue_roundtrip(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    assert worker._get_pending_clarify(1) is None
+    assert worker._enqueue_clarify(1, _item(10)) == 1
+    assert worker._enqueue_clarify(1, _item(11)) == 2
+    assert worker._enqueue_clarify(2, _item(20)) == 1
+    assert worker._get_pending_clarify(1)["item_id"] == 10
+
+    worker._clear_pending_clarify(1)
+    assert worker._get_pending_clarify(1)["item_id"] == 11
+    worker._clear_pending_clarify(1)
+    assert worker._get_pending_clarify(1) is None
+    assert worker._get_pending_clarify(2)["item_id"] == 20
+
+
+def test_send_ambiguous_clarify_shows_keyboard_for_queue_head_only(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    sent: list[tuple[int, str, dict]] = []
+    monkeypatch.setattr(
+        worker, "_tg_send_message_with_keyboard", lambda chat_id, text, markup: sent.append((chat_id, text, markup))
+    )
+    dt = datetime(2026, 2, 8, 6, 0, tzinfo=worker._local_tz())
+
+    worker._send_ambiguous_clarify(5, 21, dt, 7, 30)
+    worker._send_ambiguous_clarify(5, 22, dt, 8, 0)
+
+    assert len(sent) == 1
+    buttons = sent[0][2]["inline_keyboard"][0]
+    assert [b["callback_data"] for b in buttons] == [
+        f"clarify:5:21:2026-02-08:7:30:{worker.MEETING_DEFAULT_MINUTES}:am",
+        f"clarify:5:21:2026-02-08:7:30:{worker.MEETING_DEFAULT_MINUTES}:pm",
+        f"clarify:5:21:2026-02-08:7:30:{worker.MEETING_DEFAULT_MINUTES}:cancel",
+    ]
+    pending = worker._get_pending_clarify(5)
+    assert (pending["item_id"], pending["mode"], pending["hh"], pending["mm"]) == (21, "ambiguous", 7, 30)
+
+
+def test_clarify_prune_drops_expired_items_out_of_order(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    worker._enqueue_clarify(1, _item(10))
+    worker._enqueue_clarify(1, _item(11, ttl=-1))
+    worker._enqueue_clarify(2, _item(20, ttl=-5))
+
+    assert worker._get_pending_clarify(2) is None
+    assert worker._enqueue_clarify(1, _item(12)) == 2
+
+    assert _queued(1) == [10, 12]
+    assert _queued(2) == []
+
+
+def test_clarify_clear_skips_expired_head(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.execute(
+            "INSERT INTO clarify_queue (chat_id, expires_at, item_json) VALUES (1, ?, ?)",
+            (time.time() - 1, '{"item_id": 9}'),
+        )
+        conn.commit()
+    worker._enqueue_clarify(1, _item(10))
+    worker._enqueue_clarify(1, _item(11))
+
+    worker._clear_pending_clarify(1)
+
+    assert worker._get_pending_clarify(1)["item_id"] == 11
+
+
+def test_clarify_skips_duplicate_tail(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    worker._clear_pending_clarify(1)
+    assert worker._enqueue_clarify(1, _item(10)) == 1
+    assert worker._enqueue_clarify(1, _item(10)) == 1
+    assert _queued(1) == [10]
+
+
+def test_clarify_pack_roundtrip_keeps_cyrillic() -> None:
+    item = {"item_id": 7, "mode": "no_time", "date": "2026-02-08", "title": "встреча", "expires_at": 1.5}
+
+    assert worker._clarify_unpack(worker._clarify_pack(item)) == item
+    assert worker._clarify_unpack('{"item_id": 7}') == {"item_id": 7}
+
+
+def test_clarify_unpack_without_msgpack_fails_clearly(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "_msgpack", None)
+
+    assert worker._clarify_unpack(worker._clarify_pack({"item_id": 7})) == {"item_id": 7}
+    try:
+        worker._clarify_unpack(b"\x81\xa7item_id\x07")
+    except RuntimeError as exc:
+        assert "msgpack is not installed" in str(exc)
+    else:
+        raise AssertionError("bytes row must not decode without msgpack")
+
+
+def test_get_item_start_date_reads_stored_calendar_date(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO items (id, title, status, start_at) VALUES (?, 't', 'active', ?)",
+            [(1, "2026-02-08T23:30:00+03:00"), (2, "2026-02-09T06:00:00"), (3, "завтра"), (4, None)],
+        )
+        conn.commit()
+
+    assert worker._get_item_start_date(1) == date(2026, 2, 8)
+    assert worker._get_item_start_date(2) == date(2026, 2, 9)
+    assert worker._get_item_start_date(3) is None
+    assert worker._get_item_start_date(4) is None
+    assert worker._get_item_start_date(99) is None
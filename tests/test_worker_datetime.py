@@ -0,0 +1,123 @@
+from datetime import date, datetime
+
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKER_ROOT = ROOT / "organizer-worker"
+sys.path.append(str(WORKER_ROOT))
+
+import worker  # noqa: E402
+
+
+def _now() -> datetime:
+    return datetime(2026, 2, 7, 9, 30, tzinfo=worker._local_tz())
+
+
+def test_extract_datetime_dot_time_uses_given_now() -> None:
+    dt = worker._extract_datetime("21.16", now_local=_now())
+    assert dt == datetime(2026, 2, 7, 21, 16, tzinfo=worker._local_tz())
+
+
+def test_extract_datetime_tomorrow_with_time() -> None:
+    dt = worker._extract_datetime("завтра в 10:00", now_local=_now())
+    assert dt == datetime(2026, 2, 8, 10, 0, tzinfo=worker._local_tz())
+
+
+def test_extract_datetime_no_date() -> None:
+    assert worker._extract_datetime("купить молоко", now_local=_now()) is None
+
+
+def test_clamp_day_month_ends() -> None:
+    assert worker._clamp_day(2024, 2, 31) == 29
+    assert worker._clamp_day(2100, 2, 30) == 28
+    assert worker._clamp_day(2000, 2, 30) == 29
+    assert worker._clamp_day(2026, 4, 31) == 30
+    assert worker._clamp_day(2026, 12, 31) == 31
+    assert worker._clamp_day(2026, 13, 40) == 31
+    assert worker._clamp_day(2026, 5, 0) == 1
+
+
+def test_extract_datetime_fast_shapes_match_full_parser() -> None:
+    now = _now()
+    tz = worker._local_tz()
+    for phrase, days in (("Сегодня", 0), ("  завтра ", 1), ("послезавтра", 2)):
+        dt = worker._extract_datetime(phrase, now_local=now)
+        assert dt == datetime(2026, 2, 7 + days, worker.DEFAULT_HOUR, worker.DEFAULT_MINUTE, tzinfo=tz)
+    assert worker._extract_datetime("задача завтра", now_local=now) == worker._extract_datetime(
+        "завтра", now_local=now
+    )
+
+
+def test_try_parse_schedule_command_variants() -> None:
+    today = datetime.now(worker._local_tz()).date()
+    for text in ("#21 завтра 16:00", "номер 21 завтра в 16", "встреча #21 завтра 16.00"):
+        parsed = worker._try_parse_schedule_command(text)
+        assert parsed is not None, text
+        item_id, when, _ = parsed
+        assert item_id == 21
+        assert (when.hour, when.minute) == (16, 0)
+        assert (when.date() - today).days == 1
+    assert worker._try_parse_schedule_command("встреча завтра в 8") is None
+    assert worker._looks_like_schedule_intent("встреча завтра в 8") is False
+    assert worker._extract_first_item_ref("для 7 в 9") == 7
+    assert worker._try_parse_schedule_command("для 21 завтра 9:30") is not None
+    assert worker._try_parse_schedule_command("встреча 21 завтра 9:30") is None
+
+
+def test_parse_month_and_weekday_keep_table_priority() -> None:
+    assert worker._parse_month_ru("встреча у мамы 3 января") == 1
+    assert worker._parse_month_ru("8 марта") == 3
+    assert worker._parse_month_ru("мапрель") == 4
+    assert worker._parse_month_ru("купить молоко") is None
+    assert worker._parse_weekday_ru("в пт или в понедельник") == 0
+    assert worker._parse_weekday_ru("Среда") == 2
+    assert worker._parse_weekday_ru("пнд") is None
+
+
+def test_extract_datetime_skips_text_without_words() -> None:
+    now = _now()
+    for text in ("", "   ", "?!", " — "):
+        assert worker._extract_datetime(text, now_local=now) is None
+    assert worker._extract_datetime("3 марта в 10:00", now_local=now) == datetime(
+        2026, 3, 3, 10, 0, tzinfo=worker._local_tz()
+    )
+
+
+def test_add_months_wraps_years_and_clamps() -> None:
+    assert worker._add_months(date(2026, 1, 31), 1) == date(2026, 2, 28)
+    assert worker._add_months(date(2026, 11, 15), 3) == date(2027, 2, 15)
+    assert worker._add_months(date(2026, 1, 31), -1) == date(2025, 12, 31)
+    assert worker._add_months(date(2024, 3, 31), -13) == date(2023, 2, 28)
+    assert worker._add_months(date(2026, 5, 10), 25) == date(2028, 6, 10)
+
+
+def test_extract_datetime_word_only_dates_survive_signal_scan() -> None:
+    now = _now()
+    tz = worker._local_tz()
+    assert worker._extract_datetime("купить хлеб", now_local=now) is None
+    assert worker._extract_datetime("созвон в понедельник", now_local=now).date() == date(2026, 2, 9)
+    assert worker._extract_datetime("на следующей неделе", now_local=now) == datetime(
+        2026, 2, 9 + worker.DEFAULT_WEEKDAY, worker.MARKER_HOUR, worker.MARKER_MINUTE, tzinfo=tz
+    )
+    assert worker._extract_datetime("в марте", now_local=now).month == 3
+
+
+def test_parse_time_full_matches_split_helpers() -> None:
+    for text in ("в 7", "в 7 вечера", "в 7 утра", "в 5 часов", "в 10:30", "в 3 дня", "без времени"):
+        tm = worker._parse_time_full(text)
+        assert worker._parse_time_ru(text) == (tm[:2] if tm else None)
+        assert worker._is_time_ambiguous(text) == (tm is not None and tm[2])
+    assert worker._parse_time_full("в 7") == (7, 0, bool(worker.DT_REQUIRE_AMPM_FOR_SHORT_HOURS))
+    assert worker._parse_time_full("в 7 вечера") == (19, 0, False)
+    assert worker._parse_time_full("в 5 часов") == (5, 0, False)
+
+
+def test_parse_title_returns_start_and_ambiguity_together() -> None:
+    assert worker._parse_title("купить молоко") == (None, False)
+    start, ambiguous = worker._parse_title("встреча завтра в 19:00")
+    assert (start.hour, ambiguous) == (19, False)
+    start, ambiguous = worker._parse_title("встреча завтра в 7")
+    assert start is not None
+    assert ambiguous == worker._is_time_ambiguous("встреча завтра в 7")
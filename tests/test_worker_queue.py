@@ -0,0 +1,312 @@
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKER_ROOT = ROOT / "organizer-worker"
+sys.path.append(str(WORKER_ROOT))
+
+import worker  # noqa: E402
+
+
+def _queue_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript((ROOT / "migrations" / "001_inbox_queue.sql").read_text(encoding="utf-8"))
+    return conn
+
+
+def _add_claimed(conn: sqlite3.Connection, attempts: int, lease_until: str) -> int:
+    cur = conn.execute(
+        """
+        INSERT INTO inbox_queue (source, kind, payload_json, status, attempts, claimed_by, lease_until)
+        VALUES ('telegram', 'text', '{}', 'CLAIMED', ?, 'w1', ?)
+        """,
+        (attempts, lease_until),
+    )
+    return int(cur.lastrowid)
+
+
+def test_reap_claims_reclaims_and_kills_expired() -> None:
+    conn = _queue_conn()
+    fresh = _add_claimed(conn, 1, "2000-01-01T00:00:00.000Z")
+    spent = _add_claimed(conn, worker.B2_MAX_ATTEMPTS, "2000-01-01T00:00:00.000Z")
+    alive = _add_claimed(conn, 1, "2999-01-01T00:00:00.000Z")
+
+    assert worker.reap_claims(conn) == (1, 1)
+
+    status = dict(conn.execute("SELECT id, status FROM inbox_queue").fetchall())
+    assert status == {fresh: "NEW", spent: "DEAD", alive: "CLAIMED"}
+    row = conn.execute("SELECT claimed_by, lease_until FROM inbox_queue WHERE id=?", (fresh,)).fetchone()
+    assert row == (None, None)
+
+
+def _init_worker_db(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker, "DB_PATH", str(tmp_path / "organizer.db"))
+    monkeypatch.setattr(worker, "SCHEMA_PATH", str(ROOT / "migrations" / "001_inbox_queue.sql"))
+    worker._init_db()
+
+
+def test_insert_item_from_text_returns_stored_row(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    row_item = worker._insert_item_from_text("купить молоко", "telegram", None, None, None)
+
+    assert row_item["id"] > 0
+    assert row_item["title"] == "купить молоко"
+    assert row_item["type"] == "task"
+    with worker._get_conn() as conn:
+        stored = dict(conn.execute("SELECT id, status FROM items WHERE id=?", (row_item["id"],)).fetchone())
+    assert stored == {"id": row_item["id"], "status": row_item["status"]}
+
+
+def test_queue_claim_returns_claimed_row(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.execute(
+            "INSERT INTO inbox_queue (source, kind, payload_json, priority) VALUES ('telegram', 'text', '{}', 100)"
+        )
+        conn.execute(
+            "INSERT INTO inbox_queue (source, kind, payload_json, priority) VALUES ('telegram', 'text', '{}', 10)"
+        )
+        conn.commit()
+
+    first = worker._queue_claim()
+    second = worker._queue_claim()
+
+    assert (first["id"], first["status"], first["attempts"]) == (2, "CLAIMED", 1)
+    assert second["id"] == 1
+    assert worker._queue_claim() is None
+
+
+def test_queue_ops_share_the_writer_connection(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.execute("INSERT INTO inbox_queue (source, kind, payload_json) VALUES ('telegram', 'text', '{}')")
+        conn.commit()
+
+    row = worker._queue_claim()
+    writer = worker._WRITE_CONN[1]
+    worker._queue_mark(row["id"], "FAILED", "boom")
+    assert worker._queue_requeue_failed(10) == 1
+    worker._queue_reaper()
+
+    assert worker._WRITE_CONN[1] is writer
+    assert not writer.in_transaction
+    with worker._read_conn() as reader:
+        assert tuple(reader.execute("SELECT status, last_error FROM inbox_queue").fetchone()) == ("NEW", "boom")
+
+
+def test_queue_claim_batch_claims_in_priority_order(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO inbox_queue (source, kind, payload_json, priority) VALUES ('telegram', 'text', '{}', ?)",
+            [(50,), (10,), (50,), (90,)],
+        )
+        conn.commit()
+
+    batch = worker._queue_claim_batch(3)
+
+    assert [row["id"] for row in batch] == [2, 1, 3]
+    assert {row["status"] for row in batch} == {"CLAIMED"}
+    assert worker._queue_claim()["id"] == 4
+    assert worker._queue_claim_batch(5) == []
+
+
+def test_queue_dispatch_keeps_per_chat_order(monkeypatch) -> None:
+    rows = [
+        {"id": 1, "tg_chat_id": 7},
+        {"id": 2, "tg_chat_id": 8},
+        {"id": 3, "tg_chat_id": 7},
+        {"id": 4, "tg_chat_id": 7},
+    ]
+    seen: list[int] = []
+    done = threading.Event()
+    release_first = threading.Event()
+
+    def _process(row: dict) -> None:
+        if row["id"] == 1:
+            release_first.wait(2)
+        seen.append(row["id"])
+        if len(seen) == 4:
+            done.set()
+
+    def _claim_batch(limit: int) -> list[dict]:
+        batch = rows[:limit]
+        del rows[:limit]
+        return batch
+
+    monkeypatch.setattr(worker, "_queue_claim_batch", _claim_batch)
+    monkeypatch.setattr(worker, "_process_queue_item", _process)
+
+    assert worker._queue_dispatch() == 4
+    release_first.set()
+    assert done.wait(5)
+    assert [i for i in seen if i != 2] == [1, 3, 4]
+
+
+def test_read_pool_and_writer_reuse_connections(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    with worker._write_conn() as first_writer:
+        first_writer.execute("INSERT INTO items (title, status) VALUES ('a', 'inbox')")
+    with worker._write_conn() as writer:
+        assert writer is first_writer
+    with worker._read_conn() as first_reader:
+        assert first_reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+    with worker._read_conn() as reader:
+        assert reader is first_reader
+
+    try:
+        with worker._write_conn() as writer:
+            writer.execute("INSERT INTO items (title, status) VALUES ('b', 'inbox')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with worker._read_conn() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+
+def test_worker_wait_wakes_on_foreign_commit_and_event(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(worker, "WORKER_WAKE_POLL_SEC", 0.01)
+
+    def _enqueue_later() -> None:
+        time.sleep(0.05)
+        with sqlite3.connect(worker.DB_PATH) as other:
+            other.execute("INSERT INTO inbox_queue (source, kind, payload_json) VALUES ('telegram', 'text', '{}')")
+
+    t = threading.Thread(target=_enqueue_later)
+    started = time.monotonic()
+    t.start()
+    worker._worker_wait(5)
+    t.join()
+    assert time.monotonic() - started < 2
+
+    threading.Timer(0.05, worker._WORKER_WAKEUP.set).start()
+    started = time.monotonic()
+    worker._worker_wait(5)
+    assert time.monotonic() - started < 2
+    assert not worker._WORKER_WAKEUP.is_set()
+
+
+def test_queue_and_voice_dedup_queries_use_indexes(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    def _plan(conn: sqlite3.Connection, sql: str) -> str:
+        return " ".join(str(r["detail"]) for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+    with worker._read_conn() as conn:
+        assert "idx_inbox_queue_new" in _plan(
+            conn, "SELECT id FROM inbox_queue WHERE status='NEW' ORDER BY priority ASC, id ASC LIMIT 4"
+        )
+        assert "idx_inbox_queue_failed" in _plan(
+            conn, "SELECT id FROM inbox_queue WHERE status='FAILED' AND attempts < 5 ORDER BY id ASC LIMIT 10"
+        )
+        assert "idx_inbox_queue_claimed" in _plan(
+            conn, "SELECT id FROM inbox_queue WHERE status='CLAIMED' AND lease_until < '2000-01-01'"
+        )
+        assert "ix_items_tg_voice_unique_id" in _plan(
+            conn, "SELECT id FROM items WHERE tg_voice_unique_id = 'u' ORDER BY id DESC LIMIT 1"
+        )
+        assert "ix_items_tg_update_message" in _plan(
+            conn, "SELECT id FROM items WHERE tg_update_id = 1 AND tg_message_id = 2 ORDER BY id DESC LIMIT 1"
+        )
+
+
+def test_init_db_skips_bootstrap_once_marked(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.execute("DROP INDEX ix_items_tg_update_message")
+        conn.commit()
+
+    worker._init_db()
+    with worker._get_conn() as conn:
+        names = {r["name"] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert "ix_items_tg_update_message" not in names
+        conn.execute("DELETE FROM schema_migrations WHERE name = ?", (worker._INIT_DB_MARK,))
+        conn.commit()
+
+    worker._init_db()
+    with worker._get_conn() as conn:
+        names = {r["name"] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert "ix_items_tg_update_message" in names
+
+
+def test_queue_claim_on_idle_queue_skips_the_writer(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    def _no_writer():
+        raise AssertionError("idle claim must not take the write lock")
+
+    monkeypatch.setattr(worker, "_write_conn", _no_writer)
+
+    assert worker._queue_claim() is None
+    assert worker._queue_claim_batch(4) == []
+
+
+def test_tx_holds_the_write_lock_and_close_drops_pooled_conns(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+
+    with worker._tx() as conn:
+        assert conn.in_transaction
+        conn.execute("INSERT INTO items (title, status) VALUES ('a', 'inbox')")
+    try:
+        with worker._tx() as conn:
+            conn.execute("INSERT INTO items (title, status) VALUES ('b', 'inbox')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with worker._read_conn() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+    writer = worker._WRITE_CONN[1]
+    worker._close_db_conns()
+    assert worker._WRITE_CONN is None and worker._READ_POOL.empty()
+    with worker._write_conn() as conn:
+        assert conn is not writer
+
+
+def test_worker_poll_delay_backs_off_while_idle(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "WORKER_INTERVAL_SEC", 5)
+    monkeypatch.setattr(worker, "B2_IDLE_SLEEP_SEC", 0.5)
+
+    delays = [worker._worker_poll_delay(streak) for streak in range(6)]
+
+    assert delays == [0.5, 0.5, 1.0, 2.0, 4.0, 5.0]
+    monkeypatch.setattr(worker, "WORKER_INTERVAL_SEC", 0)
+    assert worker._worker_poll_delay(0) == 0.05
+
+
+def test_worker_poll_delay_survives_long_idle_runs(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "WORKER_INTERVAL_SEC", 5)
+    monkeypatch.setattr(worker, "B2_IDLE_SLEEP_SEC", 0.5)
+
+    for streak in (33, 1025, 10**6):
+        assert worker._worker_poll_delay(streak) == 5.0
+
+
+def test_queue_reaper_renews_leases_of_in_flight_rows(tmp_path, monkeypatch) -> None:
+    _init_worker_db(tmp_path, monkeypatch)
+    with worker._get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO inbox_queue (source, kind, payload_json) VALUES ('telegram', 'text', '{}')",
+            [(), ()],
+        )
+        conn.commit()
+    running, abandoned = worker._queue_claim_batch(2)
+    with worker._get_conn() as conn:
+        conn.execute("UPDATE inbox_queue SET lease_until='2000-01-01T00:00:00.000Z'")
+        conn.commit()
+    monkeypatch.setattr(worker, "_QUEUE_IN_FLIGHT", {running["id"]})
+
+    worker._queue_reaper()
+
+    with worker._read_conn() as conn:
+        rows = {r["id"]: (r["status"], r["lease_until"]) for r in conn.execute("SELECT * FROM inbox_queue")}
+    assert rows[running["id"]][0] == "CLAIMED"
+    assert rows[running["id"]][1] > "2000-01-02"
+    assert rows[abandoned["id"]] == ("NEW", None)
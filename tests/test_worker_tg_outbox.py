@@ -0,0 +1,133 @@
+import queue
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKER_ROOT = ROOT / "organizer-worker"
+sys.path.append(str(WORKER_ROOT))
+
+import worker  # noqa: E402
+
+
+def test_outbox_flush_coalesces_plain_and_keeps_keyboard_order(monkeypatch) -> None:
+    sent: list[tuple[int, str, dict | None]] = []
+    monkeypatch.setattr(
+        worker, "_tg_send_now", lambda chat_id, text, reply_markup=None: sent.append((chat_id, text, reply_markup))
+    )
+    kb = {"inline_keyboard": []}
+
+    worker._tg_outbox_flush(
+        [
+            (1, "a", None),
+            (2, "x", None),
+            (1, "b", None),
+            (1, "pick", kb),
+            (1, "c", None),
+        ]
+    )
+
+    assert sent == [
+        (1, "a\n\nb", None),
+        (1, "pick", kb),
+        (2, "x", None),
+        (1, "c", None),
+    ]
+
+
+def test_outbox_flush_splits_at_telegram_limit(monkeypatch) -> None:
+    sent: list[str] = []
+    monkeypatch.setattr(worker, "_tg_send_now", lambda chat_id, text, reply_markup=None: sent.append(text))
+    long_text = "x" * 3000
+
+    worker._tg_outbox_flush([(1, long_text, None), (1, long_text, None)])
+
+    assert sent == [long_text, long_text]
+
+
+class _FakeSession:
+    def __init__(self, statuses: list[int], headers: dict | None = None) -> None:
+        self.statuses = statuses
+        self.headers = headers or {}
+        self.calls: list[tuple[str, bytes]] = []
+
+    def post(self, url, data, headers, timeout):
+        self.calls.append((url, data))
+        return SimpleNamespace(status_code=self.statuses.pop(0), headers=self.headers, json=lambda: {})
+
+
+def test_tg_send_now_reuses_session_and_retries(monkeypatch) -> None:
+    session = _FakeSession([502, 200])
+    monkeypatch.setattr(worker, "_TG_SESSION", session)
+    monkeypatch.setattr(worker, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(worker, "TG_HTTP_RETRIES", 3)
+    monkeypatch.setattr(worker, "TG_HTTP_RETRY_SLEEP", 0)
+
+    assert worker._tg_send_now(5, "hi") is True
+    assert len(session.calls) == 2
+    assert session.calls[0][0].endswith("/sendMessage")
+
+
+def test_tg_send_now_honours_retry_after_and_stops_on_client_errors(monkeypatch) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr(worker.time, "sleep", sleeps.append)
+    monkeypatch.setattr(worker, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(worker, "TG_HTTP_RETRIES", 3)
+    monkeypatch.setattr(worker, "TG_HTTP_RETRY_SLEEP", 0.01)
+
+    limited = _FakeSession([429, 200], headers={"Retry-After": "2"})
+    monkeypatch.setattr(worker, "_TG_SESSION", limited)
+    assert worker._tg_send_now(5, "hi") is True
+    assert sleeps == [2.0]
+
+    blocked = _FakeSession([403, 200])
+    monkeypatch.setattr(worker, "_TG_SESSION", blocked)
+    assert worker._tg_send_now(5, "hi") is False
+    assert len(blocked.calls) == 1
+
+
+def test_tg_errors_do_not_leak_the_bot_token(monkeypatch, caplog) -> None:
+    token = "123:SECRET"
+
+    def _fail(url, **kwargs):
+        raise worker.requests.ConnectionError(f"Max retries exceeded with url: {url}")
+
+    monkeypatch.setattr(worker, "TELEGRAM_BOT_TOKEN", token)
+    monkeypatch.setattr(worker, "TG_HTTP_RETRIES", 1)
+    monkeypatch.setattr(worker, "_TG_SESSION", SimpleNamespace(post=_fail, get=_fail))
+
+    with caplog.at_level("WARNING"):
+        assert worker._tg_send_now(5, "hi") is False
+    assert "SECRET" not in caplog.text
+    assert "/bot<token>/sendMessage" in caplog.text
+
+    try:
+        worker._tg_download_voice("f1")
+    except RuntimeError as exc:
+        assert "SECRET" not in str(exc) and exc.__cause__ is None
+    else:
+        raise AssertionError("download must fail")
+
+
+def test_outbox_drain_waits_for_queued_sends(monkeypatch) -> None:
+    sent: list[tuple[int, str]] = []
+    release = threading.Event()
+
+    def _send(chat_id, text, reply_markup=None):
+        release.wait(5)
+        sent.append((chat_id, text))
+        return True
+
+    monkeypatch.setattr(worker, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(worker, "TG_OUTBOX_FLUSH_SEC", 0.01)
+    monkeypatch.setattr(worker, "_TG_OUTBOX", queue.Queue())
+    monkeypatch.setattr(worker, "_TG_OUTBOX_THREAD", None)
+    monkeypatch.setattr(worker, "_tg_send_now", _send)
+
+    assert worker._tg_send_message(1, "a") is True
+    assert worker._tg_outbox_drain(0.05) is False
+    release.set()
+    assert worker._tg_outbox_drain(5) is True
+    assert sent == [(1, "a")]